@@ -0,0 +1,4 @@
+# l'app celery est chargée avec django pour que @shared_task l'utilise
+from .celery import app as celery_app
+
+__all__ = ['celery_app']
@@ -0,0 +1,12 @@
+import os
+from celery import Celery
+
+# Tâches en arrière-plan (hors du cycle requête/réponse)
+# worker : celery -A app worker -B -l info (service worker du docker-compose, -B : tâches planifiées)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+
+app = Celery('app')
+# toute la config est dans settings.py, préfixée par CELERY_
+app.config_from_object('django.conf:settings', namespace='CELERY')
+# charge les tasks.py des apps installées
+app.autodiscover_tasks()
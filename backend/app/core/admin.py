@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Movie, Genre, User, Role, Director, Actor, Image, Rating, Favorite, Watchlist
+from .models import Movie, Genre, User, Role, Director, Actor, Image, Rating, Favorite, Watchlist, OutboundEmail
 
 admin.site.register(Movie)
 admin.site.register(Genre) 
@@ -10,4 +10,5 @@ admin.site.register(Actor)
 admin.site.register(Image)
 admin.site.register(Rating)
 admin.site.register(Favorite)
-admin.site.register(Watchlist)
\ No newline at end of file
+admin.site.register(Watchlist)
+admin.site.register(OutboundEmail)
@@ -4,4 +4,14 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app.core'
-    verbose_name = 'Core'
\ No newline at end of file
+    verbose_name = 'Core'
+
+    def ready(self):
+        # enregistre les signaux d'invalidation du cache du catalogue
+        from . import cache  # noqa: F401
+        # et celui de la génération des versions des affiches
+        from . import images  # noqa: F401
+        # et ceux du cache des utilisateurs connectés
+        from . import backends  # noqa: F401
+        # et ceux de l'index d'autocomplétion
+        from . import autocomplete  # noqa: F401
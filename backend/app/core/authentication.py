@@ -0,0 +1,87 @@
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from .backends import CachedModelBackend, is_revoked
+from .models import User, Role, TokenUser
+
+
+# Mode JWT sans état : l'utilisateur est reconstruit depuis les claims du token d'accès
+# (id, username, rôle) : ni session, ni CSRF, ni requête users/roles à chaque appel
+# un changement de rôle s'applique au prochain refresh (durée de vie courte) ; un utilisateur supprimé
+# ou désactivé est refusé tout de suite (marque dans le cache, voir core/backends.py)
+class StatelessJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise AuthenticationFailed('Token sans identifiant utilisateur', code='token_not_valid')
+
+        if is_revoked(user_id):
+            raise AuthenticationFailed('Utilisateur inactif ou supprimé', code='user_inactive')
+
+        # instance non chargée : suffit pour les filtres / créations (user=request.user) et IsAdminRole
+        # save() lève une erreur : full_user() pour lire ou modifier le profil
+        user = TokenUser(pk=user_id, username=validated_token.get('username', ''), is_active=True)
+        user._state.adding = False
+        role_id = validated_token.get('role_id')
+        if role_id:
+            user.role = Role(pk=role_id, role=validated_token.get('role', ''))
+        user.from_token = True
+        return user
+
+
+# Utilisateur complet (email, nom, mot de passe...) quand la requête vient d'un token
+# passe par le cache des utilisateurs connectés (voir core/backends.py)
+def full_user(user):
+    if getattr(user, 'from_token', False):
+        user = CachedModelBackend().get_user(user.pk)
+        if user is None:
+            raise AuthenticationFailed('Utilisateur inactif ou supprimé', code='user_inactive')
+    return user
+
+
+# objet de l'utilisateur (favori, note...) avec l'utilisateur complet, pour les serializers qui l'incluent
+# (l'utilisateur d'un token n'a ni email ni nom : il ne doit pas apparaître tel quel dans une réponse)
+def with_full_user(instance, user):
+    instance.user = full_user(user)
+    return instance
+
+
+# Tokens d'un utilisateur, avec son rôle dans les claims (recopiés dans le token d'accès)
+def tokens_for_user(user):
+    refresh = RefreshToken.for_user(user)
+    refresh['username'] = user.username
+    refresh['role_id'] = user.role_id
+    refresh['role'] = user.role.role if user.role_id else None
+    return refresh
+
+
+# Rotation : le refresh présenté est mis en liste noire et remplacé
+# l'utilisateur est relu (une requête) : rôle à jour dans les nouveaux claims, refus si désactivé
+def rotate_refresh_token(token):
+    refresh = RefreshToken(token)
+    user = User.objects.select_related('role').filter(
+        pk=refresh[api_settings.USER_ID_CLAIM], is_active=True
+    ).first()
+    if user is None:
+        raise TokenError('Utilisateur inactif ou supprimé')
+    refresh.blacklist()
+    return tokens_for_user(user)
+
+
+# Utilisateur de la requête pour les vues async, dans le même ordre que REST_FRAMEWORK : session puis token
+# lève AuthenticationFailed si le token est invalide (réponse : auth_failed_data, en 403 comme DRF
+# puisque SessionAuthentication est la première classe)
+async def arequest_user(request):
+    user = await request.auser()
+    if user.is_authenticated:
+        return user
+    result = StatelessJWTAuthentication().authenticate(request)
+    return result[0] if result is not None else user
+
+
+# même corps que la réponse de DRF (detail / code / messages pour un token invalide)
+def auth_failed_data(exc):
+    return exc.detail if isinstance(exc.detail, dict) else {'detail': str(exc.detail)}
@@ -0,0 +1,173 @@
+import heapq
+import threading
+from bisect import bisect_left
+from django.db import connection
+from django.db.models import Count
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .cache import get_versions, schedule_bump
+from .models import Movie, Director, Actor
+from .models.movie_search import search_terms
+
+#
+# Autocomplétion de la barre de recherche (titres, acteurs, réalisateurs) servie depuis la mémoire du worker
+# index préfixe : pour chaque mot d'un nom, la suite du nom à partir de ce mot ("nolan", "christopher nolan")
+# dans une liste triée (bisect) ; le top-n des préfixes courts est gardé après la première demande
+# les entrées sont triées par popularité (notes du film, films de la personne) : leur position est leur rang
+# une faute de frappe (mot d'au moins 4 lettres, une lettre en trop / en moins / changée / inversée)
+# est rattrapée par les suppressions d'une lettre (comme SymSpell), seulement si rien ne commence par la saisie
+#
+# chaque worker garde sa copie : un film / une personne modifiés incrémentent la génération 'autocomplete'
+# (cache partagé) et chaque worker reconstruit son index en arrière-plan à la requête suivante
+#
+
+# nombre de suggestions par défaut / au plus (?limit=)
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+# préfixes dont le top-n (MAX_LIMIT entrées) est gardé : longueur max
+TOP_PREFIX_LENGTH = 3
+# longueur minimale d'un mot pour la correction des fautes de frappe
+FUZZY_MIN_LENGTH = 4
+# génération (voir cache.py) de l'index, à incrémenter après tout changement de noms hors signaux (import...)
+GENERATION = 'autocomplete'
+
+
+class PrefixIndex:
+    def __init__(self, entries):
+        # entries : (type, id, nom, popularité)
+        self.entries = sorted(entries, key=lambda entry: -entry[3])
+        self.words = [search_terms(entry[2]) for entry in self.entries]
+        keys = []
+        # top-n des préfixes courts ("a", "ma"...), rempli à la première demande
+        self.top = {}
+        # mot -> rangs des entrées qui le contiennent, variante (mot ou mot moins une lettre) -> mots
+        self.word_ranks = {}
+        self.variants = {}
+        for rank, words in enumerate(self.words):
+            for i, word in enumerate(words):
+                keys.append((' '.join(words[i:]), rank))
+                self.word_ranks.setdefault(word, []).append(rank)
+        for word in self.word_ranks:
+            if len(word) >= FUZZY_MIN_LENGTH:
+                for variant in {word} | deletions(word):
+                    self.variants.setdefault(variant, set()).add(word)
+        keys.sort()
+        self.keys = [key for key, _ in keys]
+        self.ranks = [rank for _, rank in keys]
+
+    def search(self, text, limit):
+        terms = search_terms(text)
+        if not terms:
+            return []
+        ranks = self.match(terms, limit) or self.match_fuzzy(terms, limit)
+        return [self.entries[rank] for rank in ranks]
+
+    # rangs des entrées dont un mot commence par chaque terme, les plus populaires d'abord
+    # ("chris nol" trouve "christopher nolan") : on part du terme le moins fréquent, dans l'ordre des rangs
+    def match(self, terms, limit):
+        if len(terms) == 1 and len(terms[0]) <= TOP_PREFIX_LENGTH:
+            top = self.top.get(terms[0])
+            if top is None:
+                top = self.top[terms[0]] = heapq.nsmallest(MAX_LIMIT, set(self.scan(terms[0])))
+            return top[:limit]
+        ranks = []
+        for rank in sorted(set(min((self.scan(term) for term in terms), key=len))):
+            if len(terms) == 1 or self.has_terms(rank, terms):
+                ranks.append(rank)
+                if len(ranks) == limit:
+                    break
+        return ranks
+
+    # même chose en remplaçant les termes sans correspondance par les mots à une faute près
+    def match_fuzzy(self, terms, limit):
+        ranks = None
+        corrected = False
+        for term in terms:
+            term_ranks = set(self.scan(term))
+            if not term_ranks and len(term) >= FUZZY_MIN_LENGTH:
+                words = set()
+                for variant in {term} | deletions(term):
+                    words |= self.variants.get(variant, set())
+                for word in words:
+                    term_ranks.update(self.word_ranks[word])
+                corrected = True
+            ranks = term_ranks if ranks is None else ranks & term_ranks
+            if not ranks:
+                return []
+        return sorted(ranks)[:limit] if corrected else []
+
+    def has_terms(self, rank, terms):
+        return all(any(word.startswith(term) for word in self.words[rank]) for term in terms)
+
+    # rangs des entrées dont une clé commence par prefix (deux recherches dichotomiques)
+    def scan(self, prefix):
+        return self.ranks[bisect_left(self.keys, prefix):bisect_left(self.keys, prefix + '\uffff')]
+
+
+def deletions(word):
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+# entrées de l'index depuis la base (3 requêtes)
+def build_index():
+    entries = [
+        ('movie', pk, title, rating_count)
+        for pk, title, rating_count in Movie.objects.order_by().values_list('pk', 'title', 'rating_count')
+    ]
+    for kind, model in (('director', Director), ('actor', Actor)):
+        people = model.objects.annotate(movie_count=Count('movies')).values_list('pk', 'firstname', 'lastname', 'movie_count')
+        entries += [(kind, pk, f'{firstname} {lastname}', movie_count) for pk, firstname, lastname, movie_count in people]
+    return PrefixIndex(entries)
+
+
+_index = None
+_generation = None
+_lock = threading.Lock()
+
+
+# index du worker ; si la génération a changé, reconstruit dans un thread pendant que l'ancien index répond
+# (la construction prend quelques centaines de ms pour 20000 films) ; seul le tout premier appel attend
+def get_index():
+    global _index, _generation
+    generations, _ = get_versions((GENERATION,))
+    generation = generations[0]
+    if _index is None:
+        with _lock:
+            if _index is None:
+                _index, _generation = build_index(), generation
+    elif _generation != generation and _lock.acquire(blocking=False):
+        threading.Thread(target=rebuild_index, args=(generation,), daemon=True).start()
+    return _index
+
+
+def rebuild_index(generation):
+    global _index, _generation
+    try:
+        _index, _generation = build_index(), generation
+    finally:
+        _lock.release()
+        connection.close()  # connexion propre à ce thread
+
+
+def autocomplete(text, limit):
+    return [
+        {'type': kind, 'id': pk, 'label': label}
+        for kind, pk, label, _ in get_index().search(text, limit)
+    ]
+
+
+# noms ajoutés / modifiés / supprimés (les notes passent par un UPDATE : la popularité suit au prochain changement)
+@receiver(post_save, sender=Movie)
+@receiver(post_save, sender=Director)
+@receiver(post_save, sender=Actor)
+def refresh_autocomplete_on_save(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields and not set(update_fields) & {'title', 'firstname', 'lastname'}:
+        return
+    schedule_bump(GENERATION)
+
+
+@receiver(post_delete, sender=Movie)
+@receiver(post_delete, sender=Director)
+@receiver(post_delete, sender=Actor)
+def refresh_autocomplete_on_delete(sender, instance, **kwargs):
+    schedule_bump(GENERATION)
@@ -1,7 +1,32 @@
+import time
+from django.conf import settings
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from .models import User, Role
 
-class EmailBackend(ModelBackend):
+
+# Utilisateur connecté (avec son rôle) gardé en cache : pas de requête users/roles à chaque requête
+# la clé contient une version par utilisateur, incrémentée dès qu'il ou son rôle est modifié (signaux plus bas)
+# AUTH_USER_CACHE_TIMEOUT = 0 : pas de cache (une seule requête, rôle joint)
+class CachedUserMixin:
+    def get_user(self, user_id):
+        timeout = settings.AUTH_USER_CACHE_TIMEOUT
+        key = user_cache_key(user_id) if timeout else None
+        user = cache.get(key) if key else None
+        if user is None:
+            user = User.objects.select_related('role').filter(pk=user_id).first()
+            if user is None:
+                return None
+            if timeout:
+                cache.set(key, user, timeout)
+        return user if self.user_can_authenticate(user) else None
+
+
+class EmailBackend(CachedUserMixin, ModelBackend):
     def authenticate(self, request, username=None, password=None, **kwargs):
         UserModel = get_user_model()
         if username is None:
@@ -13,3 +38,83 @@ class EmailBackend(ModelBackend):
         if user.check_password(password) and self.user_can_authenticate(user):
             return user
         return None
+
+
+# connexion par l'admin django
+class CachedModelBackend(CachedUserMixin, ModelBackend):
+    pass
+
+
+def user_version_key(user_id):
+    return f'auth:user-version:{user_id}'
+
+
+# clé de la version actuelle de l'utilisateur
+# version absente (premier appel ou éviction) : on repart d'une valeur jamais utilisée, comme cache.get_versions
+def user_cache_key(user_id):
+    version_key = user_version_key(user_id)
+    version = cache.get(version_key)
+    if version is None:
+        cache.add(version_key, time.time_ns(), timeout=None)
+        version = cache.get(version_key)
+    return f'auth:user:{user_id}:{version}'
+
+
+def bump_user_version(user_id):
+    try:
+        cache.incr(user_version_key(user_id))
+    except ValueError:
+        cache.set(user_version_key(user_id), time.time_ns(), timeout=None)
+
+
+# après le commit, on change de version au lieu de supprimer l'entrée : une requête qui a lu l'ancienne ligne
+# juste avant peut encore la mettre en cache, mais sous l'ancienne version que plus personne ne lit
+def schedule_invalidation(user_ids):
+    user_ids = list(user_ids)
+    if user_ids:
+        transaction.on_commit(lambda: [bump_user_version(pk) for pk in user_ids])
+
+
+# mot de passe, rôle, is_active, last_login... tout passe par save()
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_on_change(sender, instance, **kwargs):
+    schedule_invalidation([instance.pk])
+
+
+def revoked_key(user_id):
+    return f'auth:user-revoked:{user_id}'
+
+
+# utilisateur supprimé ou désactivé : ses tokens d'accès encore valides sont refusés (StatelessJWTAuthentication)
+# la marque dure autant qu'un token d'accès, ensuite le refresh est refusé (rotate_refresh_token)
+def is_revoked(user_id):
+    return cache.get(revoked_key(user_id)) is not None
+
+
+def set_revoked(user_id, revoked):
+    if revoked:
+        lifetime = settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME']
+        cache.set(revoked_key(user_id), True, timeout=int(lifetime.total_seconds()))
+    else:
+        cache.delete(revoked_key(user_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def revoke_tokens_on_change(sender, instance, signal, **kwargs):
+    user_id = instance.pk
+    revoked = signal is post_delete or not instance.is_active
+    transaction.on_commit(lambda: set_revoked(user_id, revoked))
+
+
+@receiver(post_save, sender=Role)
+def invalidate_users_on_role_save(sender, instance, created, **kwargs):
+    if not created:
+        schedule_invalidation(list(instance.users.values_list('pk', flat=True)))
+
+
+# à la suppression les utilisateurs passent à role=NULL sans post_save, on les récupère avant
+@receiver(pre_delete, sender=Role)
+def invalidate_users_on_role_delete(sender, instance, **kwargs):
+    schedule_invalidation(list(instance.users.values_list('pk', flat=True)))
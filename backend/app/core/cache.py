@@ -0,0 +1,251 @@
+import hashlib
+import time
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from .authentication import arequest_user, auth_failed_data
+from .models import Movie, Genre, Director, Actor, Image, Rating
+
+#
+# Cache partagé des réponses du catalogue (genres, réalisateurs, acteurs, liste des films)
+# chaque modèle a un compteur de génération, incrémenté par les signaux à chaque modification :
+# la clé d'une réponse contient les générations des modèles dont elle dépend, donc une modif
+# rend les anciennes entrées inaccessibles sans avoir à les chercher pour les supprimer
+# marche avec le cache local (locmem) comme avec redis (voir CACHES dans settings.py)
+#
+
+CACHE_PREFIX = 'catalog'
+STATS_KEYS = {'hits': f'{CACHE_PREFIX}:stats:hits', 'misses': f'{CACHE_PREFIX}:stats:misses'}
+
+
+def generation_key(model_name):
+    return f'{CACHE_PREFIX}:gen:{model_name}'
+
+
+def modified_key(model_name):
+    return f'{CACHE_PREFIX}:modified:{model_name}'
+
+
+def delayed_key(model_name):
+    return f'{CACHE_PREFIX}:delayed:{model_name}'
+
+
+# générations actuelles des modèles et date de dernière modif (une seule lecture pour tout)
+def get_versions(model_names):
+    versions = read_versions([name for name in model_names if name not in DELAYED_GENERATIONS])
+    versions.update({name: delayed_version(name) for name in model_names if name in DELAYED_GENERATIONS})
+    generations = [versions[name][0] for name in model_names]
+    last_modified = max((versions[name][1] for name in model_names), default=0)
+    return generations, last_modified // 10 ** 9
+
+
+# {modèle: (génération, date de modif en ns)}
+def read_versions(model_names):
+    keys = [generation_key(name) for name in model_names] + [modified_key(name) for name in model_names]
+    values = cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            # compteur absent (premier appel ou éviction) : on repart d'une valeur jamais utilisée
+            # pour ne pas retomber sur d'anciennes entrées (et on considère le modèle modifié maintenant)
+            cache.add(key, time.time_ns(), timeout=None)
+            values[key] = cache.get(key)
+    return {name: (values[generation_key(name)], values[modified_key(name)]) for name in model_names}
+
+
+# version d'un modèle de DELAYED_GENERATIONS : relue au plus une fois par période, les réponses qui en
+# dépendent sont donc invalidées au plus une fois par période quel que soit le nombre de modifs
+def delayed_version(model_name):
+    key = delayed_key(model_name)
+    version = cache.get(key)
+    if version is None:
+        version = read_versions([model_name])[model_name]
+        cache.add(key, version, timeout=DELAYED_GENERATIONS[model_name])
+    return version
+
+
+def bump_generation(model_name):
+    key = generation_key(model_name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+    cache.set(modified_key(model_name), time.time_ns(), timeout=None)
+
+
+# compteurs hit/miss partagés entre les workers
+def record(stat):
+    key = STATS_KEYS[stat]
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def get_stats():
+    values = cache.get_many(STATS_KEYS.values())
+    hits = values.get(STATS_KEYS['hits'], 0)
+    misses = values.get(STATS_KEYS['misses'], 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else None,
+    }
+
+
+# version d'une réponse : vue + générations des modèles + paramètres de la requête (triés)
+# + schéma et hôte (les liens next / previous de la pagination sont des urls absolues)
+# sert à la fois de clé de cache et d'ETag, sans requête SQL ni sérialisation
+# (request DRF ou HttpRequest django pour les vues async)
+def response_version(name, generations, request):
+    params = getattr(request, 'query_params', request.GET)
+    query = '&'.join(f'{key}={value}' for key, value in sorted(params.lists()))
+    raw = f"{name}:{'.'.join(str(gen) for gen in generations)}:{request.scheme}://{request.get_host()}:{query}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+# 304 (ou 412) si le client a déjà cette version, avec ses validateurs comme le demande la RFC 9110
+# (get_conditional_response ne les ajoute pas sans réponse) ; None sinon
+def conditional_response(request, etag, last_modified):
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+# Mixin pour les ListAPIView publiques : GET conditionnel (ETag / Last-Modified) et cache partagé
+# cache_models : modèles dont dépend la réponse
+# cache_authenticated = False : seules les requêtes anonymes passent par le cache
+# (le 304 reste possible pour tout le monde, la réponse ne dépend pas de l'utilisateur)
+class CachedListMixin:
+    cache_models = ()
+    cache_authenticated = True
+
+    # nom de la réponse dans la clé : à surcharger si elle dépend aussi de l'url (ex: id du film)
+    def get_cache_name(self):
+        return self.__class__.__name__
+
+    def list(self, request, *args, **kwargs):
+        generations, last_modified = get_versions(self.cache_models)
+        version = response_version(self.get_cache_name(), generations, request)
+        etag = quote_etag(version)
+
+        # le client a déjà cette version : 304 sans rien charger
+        not_modified = conditional_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        if not self.cache_authenticated and request.user.is_authenticated:
+            response = super().list(request, *args, **kwargs)
+        else:
+            key = f'{CACHE_PREFIX}:resp:{version}'
+            data = cache.get(key)
+            if data is not None:
+                record('hits')
+                response = Response(data)
+                response['X-Cache'] = 'HIT'
+            else:
+                record('misses')
+                response = super().list(request, *args, **kwargs)
+                if response.status_code == 200:
+                    cache.set(key, response.data, settings.CATALOG_CACHE_TIMEOUT)
+                response['X-Cache'] = 'MISS'
+
+        if response.status_code == 200:
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+# Même chose pour les vues async (views/async_read.py), mêmes clés et ETag que CachedListMixin :
+# une réponse mise en cache par la vue DRF sert aussi la vue async, et inversement
+# name : nom de la vue DRF équivalente, build : coroutine qui construit les données (cache manqué)
+async def acached_list(request, name, cache_models, build, cache_authenticated=True):
+    generations, last_modified = await sync_to_async(get_versions)(cache_models)
+    version = response_version(name, generations, request)
+    etag = quote_etag(version)
+
+    not_modified = conditional_response(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    try:
+        user = await arequest_user(request)
+    except AuthenticationFailed as e:
+        return json_response(auth_failed_data(e), status=403)
+    if not cache_authenticated and user.is_authenticated:
+        response = await build()
+    else:
+        key = f'{CACHE_PREFIX}:resp:{version}'
+        data = await cache.aget(key)
+        if data is not None:
+            await sync_to_async(record)('hits')
+            response = json_response(data)
+            response['X-Cache'] = 'HIT'
+        else:
+            await sync_to_async(record)('misses')
+            response = await build()
+            if response.status_code == 200:
+                await cache.aset(key, response.data, settings.CATALOG_CACHE_TIMEOUT)
+            response['X-Cache'] = 'MISS'
+
+    if response.status_code == 200:
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+# réponse json rendue comme par DRF (décimaux en nombres, dates iso...), data gardé pour le cache
+def json_response(data, status=200):
+    response = HttpResponse(JSONRenderer().render(data), content_type='application/json', status=status)
+    response.data = data
+    return response
+
+
+#
+# Invalidation : un modèle modifié -> sa génération est incrémentée après le commit
+# (après les autres on_commit, dont la maj de l'index de recherche)
+#
+
+CACHED_MODELS = {Movie: 'movie', Genre: 'genre', Director: 'director', Actor: 'actor', Image: 'image'}
+# une note change la moyenne du film via un UPDATE (sans post_save sur Movie) : génération à part,
+# 'rating', pour ne pas vider tout le catalogue en cache à chaque vote
+DEPENDENT_MODELS = {Rating: 'rating'}
+# générations lues avec retard (secondes) : les moyennes / nombres de notes des listes peuvent avoir
+# jusqu'à RATING_CACHE_SECONDS de retard, en échange les listes restent en cache sur un site actif
+DELAYED_GENERATIONS = {'rating': settings.RATING_CACHE_SECONDS}
+
+
+def schedule_bump(*model_names):
+    transaction.on_commit(lambda: [bump_generation(name) for name in model_names])
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_generation_on_change(sender, **kwargs):
+    if sender in CACHED_MODELS:
+        schedule_bump(CACHED_MODELS[sender])
+    elif sender in DEPENDENT_MODELS:
+        schedule_bump(DEPENDENT_MODELS[sender])
+
+
+# relations du film : on invalide les deux côtés (ex: liste des films filtrée par genre)
+@receiver(m2m_changed, sender=Movie.genres.through)
+@receiver(m2m_changed, sender=Movie.directors.through)
+@receiver(m2m_changed, sender=Movie.actors.through)
+@receiver(m2m_changed, sender=Movie.images.through)
+def bump_generation_on_m2m_change(sender, instance, action, model, reverse, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        related = model if not reverse else instance.__class__
+        schedule_bump('movie', CACHED_MODELS[related])
@@ -0,0 +1,102 @@
+from django.db.models import Count, Q
+from django.db.models.functions import ExtractYear
+from .filters import MovieFilter
+from .models import Movie
+
+
+# Comptes par facette de la liste des films filtrée (endpoint movies/facets/)
+# chaque facette est comptée avec tous les filtres sauf les siens : cocher "Drame" n'efface pas le compte
+# des autres genres, et les comptes donnent le nombre de résultats si on ajoute / remplace la valeur
+# une requête d'agrégat par facette (GROUP BY sur les tables de liaison ou conditions sur movies),
+# plus les noms des genres / réalisateurs / acteurs renvoyés
+
+# réalisateurs / acteurs les plus représentés renvoyés (les genres sont tous renvoyés)
+FACET_LIMIT = 20
+# tranches de durée en minutes (bornes incluses, comme duration_min / duration_max)
+DURATION_BUCKETS = [(None, 89), (90, 119), (120, 149), (150, None)]
+# seuils de note ("au moins 7"), comme rating_min
+RATING_THRESHOLDS = [5, 6, 7, 8, 9]
+
+
+# queryset avec tous les filtres actifs sauf ceux de la facette (filterset déjà validé)
+def filtered_without(filterset, queryset, facet):
+    skipped = MovieFilter.FACETS[facet]
+    for name, value in filterset.form.cleaned_data.items():
+        if name not in skipped:
+            queryset = filterset.filters[name].filter(queryset, value)
+    return queryset.order_by()
+
+
+# comptes groupés sur la table de liaison (index (film, genre) / (genre, film)), les noms ensuite pour les
+# seules lignes renvoyées : grouper avant la jointure coûte 3 fois moins cher sur les acteurs
+def related_counts(queryset, name, label_fields, limit=None):
+    through = getattr(Movie, name).through
+    related = Movie._meta.get_field(name).m2m_reverse_name()
+    rows = through.objects.all()
+    # sans filtre la sous-requête sur movies ne retire rien
+    if queryset.query.has_filters():
+        rows = rows.filter(movie_id__in=queryset.values('pk'))
+    rows = rows.values(related).annotate(count=Count('movie_id')).order_by('-count', related)
+    if limit:
+        rows = rows[:limit]
+    rows = list(rows)
+    labels = Movie._meta.get_field(name).related_model.objects.in_bulk([row[related] for row in rows])
+    return [
+        {
+            'id': row[related],
+            'name': ' '.join(getattr(labels[row[related]], field) for field in label_fields),
+            'count': row['count'],
+        }
+        for row in rows
+    ]
+
+
+def year_counts(queryset):
+    rows = (
+        queryset.filter(release_date__isnull=False)
+        .annotate(year=ExtractYear('release_date'))
+        .values('year')
+        .annotate(count=Count('pk'))
+        .order_by('-year')
+    )
+    return [{'year': row['year'], 'count': row['count']} for row in rows]
+
+
+def duration_counts(queryset):
+    conditions = {}
+    for i, (low, high) in enumerate(DURATION_BUCKETS):
+        condition = Q()
+        if low is not None:
+            condition &= Q(duration__gte=low)
+        if high is not None:
+            condition &= Q(duration__lte=high)
+        conditions[f'b{i}'] = Count('pk', filter=condition)
+    counts = queryset.aggregate(**conditions)
+    return [
+        {'min': low, 'max': high, 'count': counts[f'b{i}']}
+        for i, (low, high) in enumerate(DURATION_BUCKETS)
+    ]
+
+
+def rating_counts(queryset):
+    counts = queryset.aggregate(**{
+        f't{threshold}': Count('pk', filter=Q(average_rating__gte=threshold)) for threshold in RATING_THRESHOLDS
+    })
+    return [{'min': threshold, 'count': counts[f't{threshold}']} for threshold in RATING_THRESHOLDS]
+
+
+# toutes les facettes pour les filtres de la requête
+# queryset : films après les filtres hors MovieFilter (recherche...)
+def facet_counts(filterset, queryset):
+    return {
+        'genres': related_counts(filtered_without(filterset, queryset, 'genres'), 'genres', ['genre']),
+        'directors': related_counts(
+            filtered_without(filterset, queryset, 'directors'), 'directors', ['firstname', 'lastname'], FACET_LIMIT
+        ),
+        'actors': related_counts(
+            filtered_without(filterset, queryset, 'actors'), 'actors', ['firstname', 'lastname'], FACET_LIMIT
+        ),
+        'years': year_counts(filtered_without(filterset, queryset, 'years')),
+        'duration': duration_counts(filtered_without(filterset, queryset, 'duration')),
+        'rating': rating_counts(filtered_without(filterset, queryset, 'rating')),
+    }
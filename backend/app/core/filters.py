@@ -0,0 +1,118 @@
+from datetime import date
+import django_filters
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db import connection
+from django.db.models import F, FloatField, Q
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
+from .models import Movie, Genre, Director, Actor
+from .models.movie_search import SQLITE_FTS_TABLE, search_terms
+
+
+# Filtres de la liste des films (?genres=1&genres=2&directors=3&year_min=1990&duration_max=120&rating_min=7...)
+# plusieurs valeurs d'une même relation : l'une OU l'autre ; des filtres différents : ET
+# les relations passent par une sous-requête sur la table de liaison (index (genre, film)...) : pas de DISTINCT
+# FACETS : filtres de chaque facette, ignorés pour calculer ses propres comptes (voir core/facets.py)
+class MovieFilter(django_filters.FilterSet):
+    FACETS = {
+        'genres': ('genres',),
+        'directors': ('directors',),
+        'actors': ('actors',),
+        'years': ('year_min', 'year_max'),
+        'duration': ('duration_min', 'duration_max'),
+        'rating': ('rating_min', 'rating_max'),
+    }
+
+    genres = django_filters.ModelMultipleChoiceFilter(queryset=Genre.objects.all(), method='filter_related')
+    directors = django_filters.ModelMultipleChoiceFilter(queryset=Director.objects.all(), method='filter_related')
+    actors = django_filters.ModelMultipleChoiceFilter(queryset=Actor.objects.all(), method='filter_related')
+    # années de sortie incluses (sur release_date, pour garder l'index)
+    year_min = django_filters.NumberFilter(method='filter_year', min_value=1, max_value=9999)
+    year_max = django_filters.NumberFilter(method='filter_year', min_value=1, max_value=9999)
+    # durée en minutes, bornes incluses
+    duration_min = django_filters.NumberFilter(field_name='duration', lookup_expr='gte')
+    duration_max = django_filters.NumberFilter(field_name='duration', lookup_expr='lte')
+    # note moyenne, bornes incluses
+    rating_min = django_filters.NumberFilter(field_name='average_rating', lookup_expr='gte')
+    rating_max = django_filters.NumberFilter(field_name='average_rating', lookup_expr='lte')
+
+    class Meta:
+        model = Movie
+        fields = []
+
+    def filter_related(self, queryset, name, value):
+        if not value:
+            return queryset
+        through = getattr(Movie, name).through
+        related = Movie._meta.get_field(name).m2m_reverse_name()
+        return queryset.filter(pk__in=through.objects.filter(**{f'{related}__in': value}).values('movie_id'))
+
+    def filter_year(self, queryset, name, value):
+        if value is None:
+            return queryset
+        if name == 'year_min':
+            return queryset.filter(release_date__gte=date(int(value), 1, 1))
+        return queryset.filter(release_date__lte=date(int(value), 12, 31))
+
+
+# Recherche des films sur titre, description, réalisateurs et acteurs (sans accents, triée par pertinence)
+# s'appuie sur l'index maintenu par models/movie_search.py
+class MovieSearchFilter(BaseFilterBackend):
+    search_param = api_settings.SEARCH_PARAM
+
+    def filter_queryset(self, request, queryset, view):
+        terms = search_terms(request.query_params.get(self.search_param, ''))
+        if not terms:
+            return queryset
+
+        if connection.vendor == 'postgresql':
+            queryset = self.filter_postgresql(queryset, terms)
+        elif connection.vendor == 'sqlite':
+            queryset = self.filter_sqlite(queryset, terms)
+        else:
+            # pas d'index dispo : au moins la recherche sans accents sur tous les champs
+            for term in terms:
+                queryset = queryset.filter(search_text__contains=term)
+            return queryset
+
+        # tri par pertinence sauf si le client demande un tri explicite (?ordering=)
+        if api_settings.ORDERING_PARAM not in request.query_params:
+            queryset = queryset.order_by('-search_rank', '-created_at')
+        return queryset
+
+    # plein texte avec préfixe sur le dernier mot tapé ("interst" -> interstellar)
+    # + similarité par trigrammes pour les fautes de frappe
+    def filter_postgresql(self, queryset, terms):
+        query = SearchQuery(' & '.join(f'{term}:*' for term in terms), config='simple', search_type='raw')
+        text = ' '.join(terms)
+        return queryset.filter(
+            Q(search_vector=query) | Q(search_text__trigram_word_similar=text)
+        ).annotate(
+            search_rank=SearchRank(F('search_vector'), query) + TrigramWordSimilarity(text, 'search_text')
+        )
+
+    # sqlite : FTS5 avec préfixe, classé par bm25 (titre > personnes > description)
+    def filter_sqlite(self, queryset, terms):
+        match = ' '.join(f'"{term}"*' for term in terms)
+        table = SQLITE_FTS_TABLE
+        return queryset.filter(
+            pk__in=RawSQL(f"SELECT rowid FROM {table} WHERE {table} MATCH %s", [match])
+        ).annotate(
+            # bm25 est négatif (plus petit = plus pertinent), on inverse pour trier comme postgres
+            search_rank=RawSQL(
+                f"SELECT -bm25({table}, 10.0, 5.0, 1.0) FROM {table} "
+                f"WHERE {table} MATCH %s AND {table}.rowid = movies.id_film",
+                [match],
+                output_field=FloatField()
+            )
+        )
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.search_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Recherche sur le titre, la description, les réalisateurs et les acteurs',
+            'schema': {'type': 'string'},
+        }]
@@ -0,0 +1,93 @@
+import hashlib
+from io import BytesIO
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from PIL import Image as PILImage, ImageOps
+from .models import Image
+
+#
+# Versions redimensionnées des affiches (webp + jpeg) pour les listes
+# l'original reste dans Image.url (page détail), les cartes utilisent les versions légères
+# le nom de fichier contient le hash du contenu de l'original : un fichier ne change jamais,
+# il peut être servi avec Cache-Control: immutable, et un même original n'est traité qu'une fois
+#
+
+# largeurs générées (px) : vignette du profil, carte de la liste et sa version écran haute densité
+VARIANT_WIDTHS = (160, 320, 640)
+VARIANT_DIR = 'movies/variants'
+VARIANT_FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 6}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def content_hash(field_file):
+    digest = hashlib.sha256()
+    with field_file.open('rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+# génère (si besoin) les versions d'une image et renvoie la liste à stocker dans Image.variants
+def build_variants(image):
+    digest = content_hash(image.url)
+    with image.url.open('rb') as f:
+        original = PILImage.open(f)
+        # photos de téléphone : on applique la rotation EXIF avant de redimensionner
+        original = ImageOps.exif_transpose(original)
+        # palette, niveaux de gris, CMJN... : on travaille en RGB(A)
+        if original.mode not in ('RGB', 'RGBA'):
+            original = original.convert('RGBA')
+
+    variants = []
+    for width in VARIANT_WIDTHS:
+        # jamais d'agrandissement : une seule version à la taille d'origine si elle est plus petite
+        if width > original.width and variants:
+            break
+        target = min(width, original.width)
+        height = max(1, round(original.height * target / original.width))
+        resized = original.resize((target, height), PILImage.LANCZOS)
+        variant = {'width': target}
+        for name, (pil_format, extension, options) in VARIANT_FORMATS.items():
+            path = f'{VARIANT_DIR}/{digest}-{target}w.{extension}'
+            if not default_storage.exists(path):
+                # jpeg sans transparence, webp la garde
+                buffer = BytesIO()
+                (resized.convert('RGB') if pil_format == 'JPEG' else resized).save(buffer, pil_format, **options)
+                default_storage.save(path, ContentFile(buffer.getvalue()))
+            variant[name] = path
+        variants.append(variant)
+    return variants
+
+
+# urls des versions d'une image (pour les serializers)
+def variant_urls(image):
+    return [
+        {'width': variant['width'], **{name: default_storage.url(variant[name]) for name in VARIANT_FORMATS}}
+        for variant in image.variants or []
+    ]
+
+
+# nouvel upload (ou fichier remplacé) : génération en arrière-plan, après le commit
+# sans broker (CELERY_TASK_ALWAYS_EAGER) le redimensionnement tournerait dans la requête d'upload :
+# l'image reste sans versions (celles de l'ancien fichier sont retirées) jusqu'à la commande generate_image_variants
+@receiver(post_save, sender=Image)
+def schedule_variants_on_save(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields and 'url' not in update_fields:
+        return
+    unchanged = not created and instance.url.name == getattr(instance, '_loaded_url', None)
+    instance._loaded_url = instance.url.name
+    if not instance.url or (unchanged and instance.variants):
+        return
+    if settings.CELERY_TASK_ALWAYS_EAGER:
+        if instance.variants:
+            instance.variants = []
+            Image.objects.filter(pk=instance.pk).update(variants=[])
+        return
+    from .tasks import generate_image_variants  # j'evite les problème de dependance
+    transaction.on_commit(lambda: generate_image_variants.delay(instance.pk))
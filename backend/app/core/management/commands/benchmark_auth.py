@@ -0,0 +1,80 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from ...authentication import tokens_for_user
+from ...models import Movie, User
+
+# Compare le coût par requête de l'authentification par session (cookie + CSRF) et du mode JWT sans état
+# (Authorization: Bearer) : requêtes SQL et temps moyen / p50 pour chaque url, sur la base configurée
+# les écarts de requêtes viennent de la session et de l'utilisateur (voir core/backends.py pour leur cache)
+
+BENCHMARK_URLS = [
+    '/api/favorites/',
+    '/api/favorites/{movie_id}/check/',
+    '/api/watchlist/{movie_id}/check/',
+    '/api/ratings/',
+    '/api/movies/states/?ids={movie_id}',
+]
+
+
+class Command(BaseCommand):
+    help = "Benchmark de l'authentification : session contre JWT sans état"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requêtes par url et par mode')
+        parser.add_argument('--username', help='Utilisateur connecté (défaut : le premier)')
+
+    def handle(self, *args, **options):
+        users = User.objects.select_related('role').order_by('pk')
+        user = users.filter(username=options['username']).first() if options['username'] else users.first()
+        movie = Movie.objects.order_by('-pk').first()
+        if user is None or movie is None:
+            raise CommandError('Il faut au moins un utilisateur et un film en base')
+
+        session_client = Client(SERVER_NAME='localhost')
+        session_client.force_login(user)
+        access = str(tokens_for_user(user).access_token)
+        jwt_client = Client(SERVER_NAME='localhost', HTTP_AUTHORIZATION=f'Bearer {access}')
+        modes = {'session': session_client, 'jwt': jwt_client}
+
+        urls = [url.format(movie_id=movie.pk) for url in BENCHMARK_URLS]
+
+        self.stdout.write(f"{'url':<38} {'mode':<8} {'requêtes':>8} {'moy ms':>8} {'p50 ms':>8}")
+        totals = {name: [0, 0.0] for name in modes}
+        for url in urls:
+            for name, client in modes.items():
+                row = self.measure(client, url, options['requests'])
+                totals[name][0] += row['queries']
+                totals[name][1] += row['mean']
+                self.stdout.write(
+                    f"{url:<38} {name:<8} {row['queries']:>8} {row['mean']:>8.2f} {row['p50']:>8.2f}"
+                )
+
+        saved_queries = totals['session'][0] - totals['jwt'][0]
+        saved_ms = (totals['session'][1] - totals['jwt'][1]) / len(urls)
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(
+            f'JWT : {saved_queries / len(urls):.1f} requête(s) SQL et {saved_ms:.2f} ms de moins par appel en moyenne'
+        ))
+
+    def measure(self, client, url, total):
+        # chauffe + nombre de requêtes SQL d'un appel (journal vidé : il est plafonné, DEBUG le remplit)
+        reset_queries()
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f'{url} -> statut {response.status_code}')
+
+        latencies = []
+        for _ in range(total):
+            started = time.perf_counter()
+            client.get(url)
+            latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+        return {
+            'queries': len(ctx.captured_queries),
+            'mean': sum(latencies) / len(latencies),
+            'p50': latencies[len(latencies) // 2],
+        }
@@ -0,0 +1,148 @@
+import asyncio
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from ...models import Movie, User
+
+# Compare le débit et la latence (p50 / p99) des lectures les plus appelées
+# entre le mode WSGI (gunicorn, vues DRF) et le mode ASGI (uvicorn, vues async, ASYNC_READ_VIEWS=True)
+# les deux serveurs sont lancés sur la base configurée, avec le même nombre de workers
+# dépendances : gunicorn, uvicorn, httpx (requirements.txt)
+
+BENCHMARK_URLS = [
+    '/api/movies/',
+    '/api/movies/?page=2',
+    '/api/movies/{movie_id}/',
+    '/api/genres/',
+    '/api/favorites/{movie_id}/check/',
+    '/api/watchlist/{movie_id}/check/',
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark WSGI (gunicorn) contre ASGI (uvicorn + vues async) sur les lectures du catalogue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Requêtes par url')
+        parser.add_argument('--concurrency', type=int, default=50, help='Requêtes simultanées')
+        parser.add_argument('--workers', type=int, default=2, help='Workers par serveur')
+        parser.add_argument('--threads', type=int, default=4, help='Threads par worker gunicorn (WSGI)')
+        parser.add_argument('--username', help='Utilisateur connecté pour les requêtes (défaut : le premier)')
+        parser.add_argument('--port', type=int, default=8765)
+
+    def handle(self, *args, **options):
+        try:
+            import httpx  # noqa: F401
+        except ImportError:
+            raise CommandError('httpx est requis : pip install httpx')
+        for binary in ('gunicorn', 'uvicorn'):
+            if shutil.which(binary) is None:
+                raise CommandError(f'{binary} est requis : pip install {binary}')
+
+        users = User.objects.order_by('pk')
+        user = users.filter(username=options['username']).first() if options['username'] else users.first()
+        movie = Movie.objects.order_by('-pk').first()
+        if user is None or movie is None:
+            raise CommandError('Il faut au moins un utilisateur et un film en base')
+
+        # session partagée par les deux serveurs (même base / même cache)
+        client = Client()
+        client.force_login(user)
+        cookies = {'sessionid': client.cookies['sessionid'].value}
+        urls = [url.format(movie_id=movie.pk) for url in BENCHMARK_URLS]
+
+        workers = str(options['workers'])
+        servers = {
+            'WSGI': (
+                ['gunicorn', 'app.wsgi:application', '--workers', workers, '--threads', str(options['threads'])],
+                'False',
+            ),
+            'ASGI': (
+                ['uvicorn', 'app.asgi:application', '--workers', workers, '--no-access-log', '--log-level', 'warning'],
+                'True',
+            ),
+        }
+
+        results = {}
+        for name, (command, async_views) in servers.items():
+            port = options['port']
+            if name == 'WSGI':
+                command = command + ['--bind', f'127.0.0.1:{port}', '--log-level', 'warning']
+            else:
+                command = command + ['--host', '127.0.0.1', '--port', str(port)]
+            env = {**os.environ, 'ASYNC_READ_VIEWS': async_views, 'PYTHONPATH': os.pathsep.join(sys.path)}
+            self.stdout.write(f'Démarrage {name} : {" ".join(command)}')
+            process = subprocess.Popen(command, env=env)
+            try:
+                self.wait_for_port(port)
+                base_url = f'http://127.0.0.1:{port}'
+                results[name] = asyncio.run(
+                    self.run_load(base_url, urls, cookies, options['requests'], options['concurrency'])
+                )
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+
+        self.report(urls, results)
+
+    def wait_for_port(self, port, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with socket.socket() as sock:
+                if sock.connect_ex(('127.0.0.1', port)) == 0:
+                    return
+            time.sleep(0.2)
+        raise CommandError(f'Le serveur ne répond pas sur le port {port}')
+
+    async def run_load(self, base_url, urls, cookies, total, concurrency):
+        import httpx
+        results = {}
+        limits = httpx.Limits(max_connections=concurrency)
+        async with httpx.AsyncClient(base_url=base_url, cookies=cookies, limits=limits, timeout=60) as client:
+            for url in urls:
+                # chauffe : connexions, cache du catalogue, documents
+                for _ in range(10):
+                    await client.get(url)
+
+                latencies = []
+                errors = 0
+                queue = asyncio.Queue()
+                for _ in range(total):
+                    queue.put_nowait(url)
+
+                async def worker():
+                    nonlocal errors
+                    while not queue.empty():
+                        queue.get_nowait()
+                        started = time.perf_counter()
+                        response = await client.get(url)
+                        latencies.append(time.perf_counter() - started)
+                        if response.status_code != 200:
+                            errors += 1
+
+                started = time.perf_counter()
+                await asyncio.gather(*(worker() for _ in range(concurrency)))
+                elapsed = time.perf_counter() - started
+                latencies.sort()
+                results[url] = {
+                    'rps': total / elapsed,
+                    'p50': latencies[len(latencies) // 2] * 1000,
+                    'p99': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+                    'errors': errors,
+                }
+        return results
+
+    def report(self, urls, results):
+        self.stdout.write('')
+        self.stdout.write(f"{'url':<34} {'mode':<5} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'erreurs':>8}")
+        for url in urls:
+            for name, by_url in results.items():
+                row = by_url[url]
+                self.stdout.write(
+                    f"{url:<34} {name:<5} {row['rps']:>8.0f} {row['p50']:>8.1f} {row['p99']:>8.1f} {row['errors']:>8}"
+                )
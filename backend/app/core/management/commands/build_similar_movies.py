@@ -0,0 +1,31 @@
+import time
+from django.core.management.base import BaseCommand
+from ...recommendations import build_similar_movies, changed_movie_ids
+
+
+# Construit l'index des films similaires (filtrage collaboratif item-item sur notes / favoris / watchlist)
+# planifié par celery beat (voir CELERY_BEAT_SCHEDULE), à lancer à la main après un import par exemple
+class Command(BaseCommand):
+    help = "Construit l'index des films similaires (top-k voisins par film)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--incremental', action='store_true',
+                            help='Seulement les films avec de nouvelles interactions depuis la dernière construction')
+        parser.add_argument('--movie', type=int, action='append', dest='movies', help='Film à recalculer (répétable)')
+        parser.add_argument('--top-k', type=int, default=None, help='Voisins gardés par film')
+
+    def handle(self, *args, **options):
+        movie_ids = None
+        if options['movies']:
+            movie_ids = set(options['movies'])
+        elif options['incremental']:
+            movie_ids = changed_movie_ids()
+            if movie_ids is None:
+                self.stdout.write("Pas encore d'index : construction complète")
+
+        started = time.perf_counter()
+        kwargs = {'top_k': options['top_k']} if options['top_k'] else {}
+        count = build_similar_movies(movie_ids, **kwargs)
+        self.stdout.write(self.style.SUCCESS(
+            f'{count} films indexés en {time.perf_counter() - started:.1f}s'
+        ))
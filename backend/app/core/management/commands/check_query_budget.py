@@ -0,0 +1,94 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from ...models import User, Movie, Genre, Image, Favorite, Watchlist, Rating, MovieDocument
+
+# Nombre maximum de requêtes SQL par page pour chaque endpoint de liste
+# les requêtes sont faites connecté : session + utilisateur (2 requêtes) sont inclus dans chaque budget
+# (0 avec le cache de session / utilisateur activé par REDIS_URL, voir core/backends.py)
+# si un endpoint dépasse son budget, c'est qu'un N+1 est revenu
+QUERY_BUDGETS = {
+    '/api/movies/': 5,                    # count + films + images principales
+    '/api/movies/?page=2': 5,
+    '/api/movies/?ordering=title': 5,
+    '/api/movies/?pagination=cursor': 4,  # par curseur : pas de count
+    '/api/favorites/?pagination=cursor': 4,
+    '/api/favorites/': 5,                 # count + favoris (film joint) + images principales
+    '/api/watchlist/': 5,
+    '/api/ratings/': 5,
+    '/api/ratings/?page=2': 5,
+    '/api/genres/': 4,                    # count + genres
+    '/api/movies/{movie_id}/': 4,         # versions (ETag) + document pré-calculé
+    '/api/movies/{movie_id}/ratings/': 5, # film + distribution (GROUP BY) + page de notes
+    '/api/movies/states/?ids={movie_ids}': 5,  # favoris + watchlist + notes, pour toute la liste
+}
+
+
+class Command(BaseCommand):
+    help = 'Vérifie que les endpoints de liste restent sous un nombre fixe de requêtes SQL par page'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--movies', type=int, default=25, help='Nombre de films créés pour le test')
+
+    def handle(self, *args, **options):
+        failures = []
+
+        # toutes les données de test sont annulées à la fin (rollback)
+        try:
+            with transaction.atomic():
+                user, movie_ids = self.seed(options['movies'])
+                movie_id = movie_ids[-1]
+                client = Client(SERVER_NAME='localhost')
+                client.force_login(user)
+
+                for url, budget in QUERY_BUDGETS.items():
+                    url = url.format(movie_id=movie_id, movie_ids=','.join(str(pk) for pk in movie_ids))
+                    with CaptureQueriesContext(connection) as ctx:
+                        response = client.get(url)
+                    count = len(ctx.captured_queries)
+
+                    if response.status_code != 200:
+                        failures.append(f'{url}: statut {response.status_code}')
+                        self.stdout.write(self.style.ERROR(f'❌ {url} -> statut {response.status_code}'))
+                    elif count > budget:
+                        failures.append(f'{url}: {count} requêtes (budget {budget})')
+                        self.stdout.write(self.style.ERROR(f'❌ {url} -> {count} requêtes (budget {budget})'))
+                        for query in ctx.captured_queries:
+                            self.stdout.write(f'    {query["sql"]}')
+                    else:
+                        self.stdout.write(self.style.SUCCESS(f'✅ {url} -> {count} requêtes (budget {budget})'))
+
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+        if failures:
+            raise CommandError('Budget de requêtes dépassé : ' + ', '.join(failures))
+        self.stdout.write(self.style.SUCCESS('Tous les endpoints respectent leur budget de requêtes'))
+
+    # crée un jeu de données : des films avec images principales, et un utilisateur avec favoris/watchlist/notes
+    def seed(self, nb_movies):
+        user = User.objects.create_user(
+            username='query_budget', email='query_budget@cinemet.test', password='query_budget',
+            first_name='Query', last_name='Budget'
+        )
+        genre, _ = Genre.objects.get_or_create(genre='Query budget')
+
+        movie_ids = []
+        for i in range(nb_movies):
+            movie = Movie.objects.create(title=f'Film budget {i}', duration=100)
+            movie.genres.add(genre)
+            movie.images.add(Image.objects.create(name=f'poster {i}', url=f'movies/budget_{i}.jpg', is_main=True))
+            Favorite.objects.create(user=user, movie=movie)
+            Watchlist.objects.create(user=user, movie=movie)
+            Rating.objects.create(user=user, movie=movie, rating=1 + i % 9)
+            movie_ids.append(movie.pk)
+
+        # dans la transaction les on_commit ne partent pas : on construit les documents nous-même
+        MovieDocument.rebuild([movie.pk])
+        return user, movie_ids
+
+
+class _Rollback(Exception):
+    pass
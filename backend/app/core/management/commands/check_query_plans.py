@@ -0,0 +1,281 @@
+import json
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from ...models import (
+    User, Role, Movie, Genre, Director, Actor, Image, Favorite, Watchlist, Rating, MovieDocument,
+    SimilarMovies, UserRecommendations
+)
+from ...models.movie_search import update_search_index
+
+# Vérifie le plan (EXPLAIN) des requêtes SQL de chaque endpoint de core/urls.py sur un jeu de données créé
+# pour l'occasion (annulé à la fin) : une requête qui lit toute une table ou trie sans index fait échouer la commande
+# les plans sont demandés avec enable_seqscan désactivé, puis aussi enable_sort : postgres n'y recourt alors
+# que s'il n'a pas d'index pour faire autrement, quelle que soit la taille des tables
+# sont signalés :
+#  - un parcours séquentiel qui filtre ses lignes (Seq Scan avec Filter) ; sans filtre la requête demande
+#    toute la table (count, export...) et le tri éventuel est signalé à part
+#  - un index lu en entier pour filtrer ses lignes (Index Scan avec Filter mais sans Index Cond)
+#  - un tri (Sort) qui reste avec enable_sort désactivé, sauf celui des groupes d'un agrégat
+#    (GROUP BY ... ORDER BY count) et celui des lignes lues pour une liste d'ids (IN (...) : préchargements)
+# un cas peut autoriser un noeud (ex: tri par pertinence de la recherche, calculé à la requête)
+# postgres uniquement
+
+# (méthode, url, données, noeuds autorisés[, client]) ; les urls admin sont appelées avec l'admin,
+# les autres avec l'utilisateur, sauf client donné ('newcomer' : utilisateur sans recommandations pré-calculées)
+PLAN_CASES = [
+    ('get', '/api/profile/', None, ()),
+    ('get', '/api/users/', None, ()),
+    ('get', '/api/users/export/', None, ()),
+    ('post', '/api/login/', {'email': 'query_plans@cinemet.test', 'password': 'query_plans'}, ()),
+    ('post', '/api/token/', {'email': 'query_plans@cinemet.test', 'password': 'query_plans'}, ()),
+    ('get', '/api/movies/', None, ()),
+    ('get', '/api/movies/?page=2', None, ()),
+    ('get', '/api/movies/?ordering=title', None, ()),
+    ('get', '/api/movies/?ordering=-release_date', None, ()),
+    ('get', '/api/movies/?ordering=-average_rating', None, ()),
+    ('get', '/api/movies/?ordering=-bayesian_rating&pagination=cursor', None, ()),
+    ('get', '/api/movies/?pagination=cursor', None, ()),
+    ('get', '/api/movies/?genres={genre_id}', None, ()),
+    ('get', '/api/movies/?directors={director_id}&actors={actor_id}', None, ()),
+    ('get', '/api/movies/?year_min=2000&year_max=2005&duration_max=120&rating_min=5', None, ()),
+    ('get', '/api/movies/?search=budget', None, ('Sort',)),  # tri par pertinence
+    ('get', '/api/movies/facets/?genres={genre_id}', None, ()),
+    ('get', '/api/movies/autocomplete/?q=film', None, ()),
+    ('get', '/api/movies/{movie_id}/', None, ()),
+    ('get', '/api/movies/{movie_id}/similar/', None, ()),
+    ('get', '/api/movies/states/?ids={movie_ids}', None, ()),
+    ('get', '/api/movies/trending/', None, ()),
+    ('get', '/api/genres/', None, ()),
+    ('get', '/api/directors/', None, ()),
+    ('get', '/api/actors/', None, ()),
+    ('get', '/api/favorites/', None, ()),
+    ('get', '/api/favorites/?pagination=cursor', None, ()),
+    ('get', '/api/favorites/{movie_id}/check/', None, ()),
+    ('post', '/api/favorites/toggle/', {'movie_id': '{movie_id}'}, ()),
+    ('get', '/api/watchlist/', None, ()),
+    ('get', '/api/watchlist/{movie_id}/check/', None, ()),
+    ('post', '/api/watchlist/toggle/', {'movie_id': '{movie_id}'}, ()),
+    ('get', '/api/recommendations/', None, ()),
+    ('get', '/api/recommendations/?limit=10', None, (), 'newcomer'),  # les plus notés
+    ('get', '/api/ratings/', None, ()),
+    ('get', '/api/ratings/user/?movie_id={movie_id}', None, ()),
+    ('post', '/api/ratings/rate/', {'movie_id': '{movie_id}', 'rating': 7}, ()),
+    ('get', '/api/movies/{movie_id}/ratings/', None, ()),
+    ('get', '/api/contact/info/', None, ()),
+    # tout le catalogue : les préchargements portent sur tous les films, lire les index en entier est normal
+    ('get', '/api/admin/movies/', None, ('Index Scan', 'Index Only Scan')),
+    ('get', '/api/admin/movies/export/', None, ()),
+    ('get', '/api/admin/cache-stats/', None, ()),
+    ('get', '/api/admin/throttle-stats/', None, ()),
+]
+
+class Command(BaseCommand):
+    help = "Vérifie (EXPLAIN) qu'aucune requête des endpoints ne lit une table entière ou ne trie sans index"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--movies', type=int, default=60, help='Nombre de films créés pour le test')
+        parser.add_argument('--only', default='', help="N'appelle que les urls qui contiennent ce texte")
+        parser.add_argument('--show-plans', action='store_true', help='Affiche le plan de chaque requête')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Vérification des plans disponible sur postgres uniquement')
+        failures = []
+
+        # cache local vide : les réponses ne viennent pas du cache (sinon pas de requête à vérifier)
+        # toutes les données de test sont annulées à la fin (rollback)
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'query-plans'
+        }}):
+            try:
+                with transaction.atomic():
+                    params = self.seed(options['movies'])
+                    for method, url, data, allowed, *client in PLAN_CASES:
+                        url = url.format(**params)
+                        if options['only'] not in url:
+                            continue
+                        problems = self.check_case(
+                            method, url, data, params, allowed, options['show_plans'], client[0] if client else None
+                        )
+                        if problems:
+                            failures.append(url)
+                            self.stdout.write(self.style.ERROR(f'❌ {method.upper()} {url}'))
+                            for sql, problem in problems:
+                                self.stdout.write(f'    {problem}')
+                                if sql:
+                                    self.stdout.write(f'      {shorten(sql)}')
+                        else:
+                            self.stdout.write(self.style.SUCCESS(f'✅ {method.upper()} {url}'))
+                    raise _Rollback()
+            except _Rollback:
+                pass
+
+        if failures:
+            raise CommandError('Plans sans index : ' + ', '.join(failures))
+        self.stdout.write(self.style.SUCCESS('Toutes les requêtes des endpoints passent par un index'))
+
+    # appelle l'endpoint puis explique ses requêtes : [(sql, problème)]
+    def check_case(self, method, url, data, params, allowed, show_plans, client=None):
+        if client is not None:
+            client = params[f'{client}_client']
+        elif url.startswith('/api/admin/') or url.startswith('/api/users/'):
+            client = params['admin_client']
+        else:
+            client = params['client']
+        if data is not None:
+            data = {key: value.format(**params) if isinstance(value, str) else value for key, value in data.items()}
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(client, method)(url, data, content_type='application/json') if data else getattr(client, method)(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        if response.status_code >= 400:
+            return [(None, f'statut {response.status_code}')]
+
+        problems = []
+        with connection.cursor() as cursor:
+            for query in ctx.captured_queries:
+                sql = query['sql']
+                if not sql.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+                    continue
+                # parcours : le tri reste permis (sinon postgres préfère lire tout un index déjà dans l'ordre
+                # plutôt que trier 10 lignes) ; tris : ceux qui restent quand il est interdit
+                scan_plan = explain(cursor, sql, enable_sort=True)
+                sort_plan = explain(cursor, sql, enable_sort=False)
+                if show_plans:
+                    self.stdout.write(f'    {shorten(sql)}')
+                    self.stdout.write('\n'.join(f'      {row}' for row in explain(cursor, sql, enable_sort=True, text=True)))
+                problems += [(sql, problem) for problem in scan_problems(scan_plan, allowed)]
+                problems += [(sql, problem) for problem in sort_problems(sort_plan, allowed)]
+        return problems
+
+    # films avec genres / personnes / affiches, un utilisateur avec favoris / watchlist / notes, un admin,
+    # un nouvel utilisateur (quelques interactions, pas de recommandations pré-calculées)
+    def seed(self, nb_movies):
+        role, _ = Role.objects.get_or_create(role='admin')
+        admin = User.objects.create_user(
+            username='query_plans_admin', email='query_plans_admin@cinemet.test', password='query_plans',
+            first_name='Query', last_name='Plans', role=role
+        )
+        user = User.objects.create_user(
+            username='query_plans', email='query_plans@cinemet.test', password='query_plans',
+            first_name='Query', last_name='Plans'
+        )
+        newcomer = User.objects.create_user(
+            username='query_plans_new', email='query_plans_new@cinemet.test', password='query_plans',
+            first_name='Query', last_name='Plans'
+        )
+        genres = [Genre.objects.create(genre=f'Query plans {i}') for i in range(3)]
+        directors = [Director.objects.create(firstname='Query', lastname=f'Director {i}') for i in range(5)]
+        actors = [Actor.objects.create(firstname='Query', lastname=f'Actor {i}') for i in range(10)]
+
+        movie_ids = []
+        for i in range(nb_movies):
+            movie = Movie.objects.create(
+                title=f'Film budget {i}', duration=80 + i % 90, release_date=date(1995 + i % 20, 1, 1)
+            )
+            movie.genres.add(genres[i % len(genres)])
+            movie.directors.add(directors[i % len(directors)])
+            movie.actors.add(actors[i % len(actors)], actors[(i + 1) % len(actors)])
+            movie.images.add(Image.objects.create(name=f'poster {i}', url=f'movies/plans_{i}.jpg', is_main=True))
+            if i % 2:
+                Favorite.objects.create(user=user, movie=movie)
+                Watchlist.objects.create(user=user, movie=movie)
+                Rating.objects.create(user=user, movie=movie, rating=1 + i % 9)
+            Rating.objects.create(user=admin, movie=movie, rating=1 + (i * 7) % 9)
+            if i % 10 == 0:
+                Favorite.objects.create(user=newcomer, movie=movie)
+            movie_ids.append(movie.pk)
+
+        SimilarMovies.objects.create(movie_id=movie_ids[-1], neighbors=movie_ids[:10], scores=[0.5] * 10)
+        UserRecommendations.objects.create(user=user, movies=movie_ids[:20], scores=[1.0] * 20)
+        # dans la transaction les on_commit ne partent pas : index de recherche et documents faits ici
+        update_search_index(movie_ids)
+        MovieDocument.rebuild(movie_ids)
+        # statistiques à jour pour le planificateur (annulées avec le reste)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        client = Client(SERVER_NAME='localhost')
+        client.force_login(user)
+        admin_client = Client(SERVER_NAME='localhost')
+        admin_client.force_login(admin)
+        newcomer_client = Client(SERVER_NAME='localhost')
+        newcomer_client.force_login(newcomer)
+        return {
+            'client': client,
+            'admin_client': admin_client,
+            'newcomer_client': newcomer_client,
+            'movie_id': movie_ids[-1],
+            'movie_ids': ','.join(str(pk) for pk in movie_ids[:20]),
+            'genre_id': genres[0].pk,
+            'director_id': directors[0].pk,
+            'actor_id': actors[0].pk,
+        }
+
+
+# plan d'une requête (le dict du noeud racine, ou les lignes du texte), avec enable_seqscan désactivé
+def explain(cursor, sql, enable_sort, text=False):
+    cursor.execute('SET LOCAL enable_seqscan = off')
+    cursor.execute(f"SET LOCAL enable_sort = {'on' if enable_sort else 'off'}")
+    try:
+        cursor.execute(f"EXPLAIN {'' if text else '(FORMAT JSON) '}{sql}")
+        if text:
+            return [row[0] for row in cursor.fetchall()]
+        plan = cursor.fetchone()[0]
+        return (json.loads(plan) if isinstance(plan, str) else plan)[0]['Plan']
+    finally:
+        cursor.execute('RESET enable_seqscan')
+        cursor.execute('RESET enable_sort')
+
+
+# parcours qui lisent une table (ou un index) entière pour en filtrer les lignes
+def scan_problems(node, allowed):
+    problems = []
+    node_type = node['Node Type']
+    relation = node.get('Relation Name', '')
+    if node_type in allowed:
+        pass
+    elif node_type == 'Seq Scan' and 'Filter' in node:
+        problems.append(f"Seq Scan sur {relation} filtré par {node['Filter']}")
+    elif node_type in ('Index Scan', 'Index Only Scan') and 'Filter' in node and 'Index Cond' not in node:
+        problems.append(f"{node_type} complet de {node['Index Name']} ({relation}) filtré par {node['Filter']}")
+    for child in node.get('Plans', []):
+        problems += scan_problems(child, allowed)
+    return problems
+
+
+# tris qu'aucun index ne peut remplacer
+def sort_problems(node, allowed):
+    problems = []
+    if (
+        node['Node Type'] == 'Sort' and 'Sort' not in allowed
+        and not has_node(node, is_aggregate) and not has_node(node, is_id_list_lookup)
+    ):
+        problems.append(f"Sort sur {', '.join(node.get('Sort Key', []))}")
+    for child in node.get('Plans', []):
+        problems += sort_problems(child, allowed)
+    return problems
+
+
+def has_node(node, predicate):
+    return any(predicate(child) or has_node(child, predicate) for child in node.get('Plans', []))
+
+
+def is_aggregate(node):
+    return node['Node Type'] in ('Aggregate', 'GroupAggregate', 'HashAggregate')
+
+
+def is_id_list_lookup(node):
+    return '= ANY (' in node.get('Index Cond', '') or '= ANY (' in node.get('Filter', '')
+
+
+# les listes d'ids (IN (...)) rendent certaines requêtes illisibles
+def shorten(sql, length=400):
+    return sql if len(sql) <= length else f'{sql[:length]}...'
+
+
+class _Rollback(Exception):
+    pass
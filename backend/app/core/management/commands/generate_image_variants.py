@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from ...cache import bump_generation
+from ...images import build_variants
+from ...models import Image
+from ...tasks import generate_image_variants
+
+
+class Command(BaseCommand):
+    help = 'Génère les versions redimensionnées des images (images existantes ou importées avec import_catalog)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Toutes les images, pas seulement celles sans versions')
+        parser.add_argument('--async', action='store_true', dest='run_async', help='Envoie les images au worker celery')
+
+    def handle(self, *args, **options):
+        images = Image.objects.exclude(url='').order_by('pk')
+        if not options['all']:
+            images = images.filter(variants=[])
+
+        done = failed = 0
+        for image in images.iterator(chunk_size=500):
+            if options['run_async']:
+                generate_image_variants.delay(image.pk)
+                done += 1
+                continue
+            try:
+                variants = build_variants(image)
+            except (OSError, ValueError) as e:
+                # fichier absent ou illisible : on continue avec les autres
+                failed += 1
+                self.stdout.write(self.style.WARNING(f'⚠️  Image {image.pk} ({image.url.name}) : {e}'))
+                continue
+            Image.objects.filter(pk=image.pk).update(variants=variants)
+            done += 1
+
+        if done and not options['run_async']:
+            bump_generation('image')
+
+        verb = 'envoyées au worker' if options['run_async'] else 'traitées'
+        self.stdout.write(self.style.SUCCESS(f'{done} images {verb}, {failed} en erreur'))
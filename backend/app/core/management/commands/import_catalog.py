@@ -0,0 +1,410 @@
+import csv
+import json
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from ... import autocomplete
+from ...cache import CACHED_MODELS, bump_generation
+from ...models import Movie, Genre, Director, Actor, Image
+from ...models.movie_search import index_rows, search_parts, search_text_from_parts
+
+#
+# Import en masse du catalogue (films + genres, réalisateurs, acteurs, images) depuis un dump CSV ou JSONL
+#
+# JSONL, un film par ligne :
+#   {"title": "Inception", "description": "...", "release_date": "2010-07-16", "duration": 148,
+#    "url_trailer": "https://...", "genres": ["Science-fiction"], "directors": ["Christopher Nolan"],
+#    "actors": ["Leonardo DiCaprio", {"firstname": "Elliot", "lastname": "Page"}],
+#    "images": [{"name": "Affiche", "url": "movies/inception.jpg", "is_main": true}]}
+# CSV : mêmes colonnes, les listes séparées par des "|" (pour images, la première est l'image principale)
+#
+# Le fichier est lu en flux et importé par lots : chaque lot est une transaction, la progression est
+# notée dans un fichier (--checkpoint) après chaque commit, --resume repart du lot suivant.
+# Postgres : lignes et tables de liaison en COPY, les ids sont réservés avec nextval() (séquences cohérentes)
+# autres bases : bulk_create
+# Les signaux ne sont pas déclenchés : l'index de recherche est rempli par lot, le cache et l'autocomplétion
+# invalidés à la fin
+# (les documents de la page détail sont construits au premier affichage)
+#
+
+LIST_SEPARATOR = '|'
+# plus grande valeur d'une colonne entière (int4) : au-delà le COPY échouerait pour tout le lot
+MAX_INTEGER = 2147483647
+
+
+class Command(BaseCommand):
+    help = 'Importe en masse un catalogue de films depuis un fichier CSV ou JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='Fichier .csv ou .jsonl')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Format du fichier (déduit de l\'extension sinon)')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Nombre de films par transaction')
+        parser.add_argument('--checkpoint', help='Fichier de progression (par défaut <file>.progress)')
+        parser.add_argument('--resume', action='store_true', help='Reprend après le dernier lot importé')
+
+    def handle(self, *args, **options):
+        path = options['file']
+        if not os.path.exists(path):
+            raise CommandError(f'Fichier introuvable : {path}')
+        file_format = options['format'] or ('csv' if path.endswith('.csv') else 'jsonl')
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            raise CommandError('--chunk-size doit être positif')
+        checkpoint = options['checkpoint'] or f'{path}.progress'
+
+        skip = self.read_checkpoint(checkpoint) if options['resume'] else 0
+        if skip:
+            self.stdout.write(f'Reprise après {skip} lignes déjà importées')
+
+        self.use_copy = connection.vendor == 'postgresql'
+        self.load_existing()
+
+        started = time.monotonic()
+        imported = rejected = 0
+        position = skip
+        chunk = []
+
+        for number, record in self.read_records(path, file_format):
+            if number <= skip:
+                continue
+            position = number
+            try:
+                chunk.append(self.parse_movie(record))
+            except (TypeError, ValueError) as e:
+                rejected += 1
+                self.stdout.write(self.style.WARNING(f'⚠️  Ligne {number} ignorée : {e}'))
+
+            if len(chunk) >= chunk_size:
+                imported += self.import_chunk(chunk, position, checkpoint)
+                chunk = []
+                self.stdout.write(f'{imported} films importés ({time.monotonic() - started:.1f}s)')
+
+        if chunk:
+            imported += self.import_chunk(chunk, position, checkpoint)
+        elif position > skip:
+            # dernières lignes toutes rejetées : on avance quand même la reprise
+            self.write_checkpoint(checkpoint, position)
+
+        # les bulk_create / COPY ne passent pas par les signaux : on invalide le cache du catalogue ici
+        # et on recalcule moyenne globale et notes bayésiennes comme la tâche de nuit (films importés sans note : 0)
+        if imported:
+            Movie.refresh_bayesian_ratings()
+            for name in CACHED_MODELS.values():
+                bump_generation(name)
+            # nouveaux titres et noms : les workers reconstruisent leur index d'autocomplétion
+            bump_generation(autocomplete.GENERATION)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Import terminé : {imported} films importés, {rejected} lignes ignorées '
+            f'en {time.monotonic() - started:.1f}s'
+        ))
+
+    #
+    # Lecture
+    #
+
+    # (numéro de ligne, enregistrement), sans charger le fichier en mémoire
+    def read_records(self, path, file_format):
+        with open(path, newline='', encoding='utf-8') as f:
+            if file_format == 'csv':
+                yield from enumerate(csv.DictReader(f), start=1)
+                return
+            for number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield number, json.loads(line)
+                except ValueError:
+                    # ligne illisible : rejetée par parse_movie
+                    yield number, None
+
+    def parse_movie(self, record):
+        if not isinstance(record, dict):
+            raise ValueError('ligne illisible')
+        title = self.parse_text(record.get('title'), 'title').strip()
+        if not title:
+            raise ValueError('titre manquant')
+        if len(title) > Movie._meta.get_field('title').max_length:
+            raise ValueError('titre trop long')
+
+        release_date = record.get('release_date') or None
+        if release_date is not None:
+            release_date = parse_date(str(release_date))
+            if release_date is None:
+                raise ValueError('release_date invalide (attendu AAAA-MM-JJ)')
+
+        try:
+            duration = int(record.get('duration'))
+        except (TypeError, ValueError):
+            raise ValueError('duration manquante ou invalide')
+        if duration < 0:
+            raise ValueError('duration négative')
+        if duration > MAX_INTEGER:
+            raise ValueError('duration trop grande')
+
+        return {
+            'title': title,
+            'description': self.parse_text(record.get('description'), 'description'),
+            'release_date': release_date,
+            'duration': duration,
+            'url_trailer': self.check_length(
+                Movie, 'url_trailer', self.parse_text(record.get('url_trailer'), 'url_trailer')
+            ),
+            'genres': [
+                self.check_length(Genre, 'genre', self.parse_text(name, 'genre'))
+                for name in self.parse_list(record.get('genres'))
+            ],
+            'directors': [self.parse_person(Director, value) for value in self.parse_list(record.get('directors'))],
+            'actors': [self.parse_person(Actor, value) for value in self.parse_list(record.get('actors'))],
+            'images': self.parse_images(self.parse_list(record.get('images'))),
+        }
+
+    # liste JSON ou chaîne "a|b|c" (CSV), sans doublons
+    def parse_list(self, value):
+        if not value:
+            return []
+        if isinstance(value, str):
+            value = value.split(LIST_SEPARATOR)
+        items = []
+        for item in value:
+            if isinstance(item, str):
+                item = item.strip()
+            if item and item not in items:
+                items.append(item)
+        return items
+
+    # champ texte facultatif : un JSON peut contenir un nombre, une liste... à la place
+    def parse_text(self, value, field):
+        if not value:
+            return ''
+        if not isinstance(value, str):
+            raise ValueError(f'{field} invalide (texte attendu) : {value!r}')
+        return value
+
+    def check_length(self, model, field, value):
+        if len(value) > model._meta.get_field(field).max_length:
+            raise ValueError(f'{field} trop long : {value}')
+        return value
+
+    # "Prénom Nom" ou {"firstname": ..., "lastname": ...}
+    def parse_person(self, model, value):
+        if isinstance(value, dict):
+            firstname = self.parse_text(value.get('firstname'), 'firstname').strip()
+            lastname = self.parse_text(value.get('lastname'), 'lastname').strip()
+        elif isinstance(value, str):
+            firstname, _, lastname = value.partition(' ')
+            lastname = lastname.strip()
+        else:
+            raise ValueError(f'personne invalide : {value!r}')
+        return (
+            self.check_length(model, 'firstname', firstname),
+            self.check_length(model, 'lastname', lastname),
+        )
+
+    # chemin (relatif à MEDIA_ROOT) ou {"name", "url", "is_main"}
+    # si aucune image n'est marquée principale, la première l'est
+    def parse_images(self, values):
+        images = []
+        for value in values:
+            if isinstance(value, str):
+                value = {'url': value}
+            elif not isinstance(value, dict):
+                raise ValueError(f'image invalide : {value!r}')
+            url = self.check_length(Image, 'url', self.parse_text(value.get('url'), 'url').strip())
+            if not url:
+                raise ValueError('image sans url')
+            name = self.parse_text(value.get('name'), 'name') or os.path.splitext(os.path.basename(url))[0]
+            images.append({
+                'name': self.check_length(Image, 'name', name),
+                'url': url,
+                'is_main': bool(value.get('is_main')),
+            })
+        if images and not any(image['is_main'] for image in images):
+            images[0]['is_main'] = True
+        return images
+
+    #
+    # Ecriture
+    #
+
+    # genres et personnes déjà en base, pour dédoublonner sans requête par ligne
+    def load_existing(self):
+        self.genres = {self.genre_key(name): pk for name, pk in Genre.objects.values_list('genre', 'pk')}
+        self.people = {}
+        for model in (Director, Actor):
+            self.people[model] = {
+                self.person_key(firstname, lastname): pk
+                for pk, firstname, lastname in model.objects.values_list('pk', 'firstname', 'lastname')
+            }
+
+    # même genre / personne quelle que soit la casse ("drame" = "Drame", "christopher nolan" = "Christopher Nolan")
+    def genre_key(self, name):
+        return name.casefold()
+
+    def person_key(self, firstname, lastname):
+        return firstname.casefold(), lastname.casefold()
+
+    def import_chunk(self, movies, position, checkpoint):
+        try:
+            with transaction.atomic():
+                self.insert_chunk(movies)
+        except DatabaseError as e:
+            raise CommandError(
+                f'Erreur pendant le lot se terminant ligne {position} : {e}\n'
+                f'Les lots précédents sont enregistrés, relancer avec --resume pour reprendre.'
+            )
+        self.write_checkpoint(checkpoint, position)
+        return len(movies)
+
+    def insert_chunk(self, movies):
+        now = timezone.now()
+
+        genre_ids = self.resolve_genres([name for movie in movies for name in movie['genres']])
+        director_ids = self.resolve_people(Director, [person for movie in movies for person in movie['directors']], now)
+        actor_ids = self.resolve_people(Actor, [person for movie in movies for person in movie['actors']], now)
+
+        parts = [
+            search_parts(
+                movie['title'],
+                [f'{firstname} {lastname}' for firstname, lastname in movie['directors'] + movie['actors']],
+                movie['description']
+            )
+            for movie in movies
+        ]
+        movie_ids = self.insert_rows(Movie, [
+            'title', 'description', 'release_date', 'duration', 'url_trailer', 'created_at', 'updated_at',
+            'average_rating', 'rating_count', 'rating_sum', 'bayesian_rating', 'search_text',
+        ], [
+            (
+                movie['title'], movie['description'], movie['release_date'], movie['duration'],
+                movie['url_trailer'], now, now, 0, 0, 0, 0, search_text_from_parts(movie_parts),
+            )
+            for movie, movie_parts in zip(movies, parts)
+        ])
+
+        images = [(movie_id, image) for movie_id, movie in zip(movie_ids, movies) for image in movie['images']]
+        image_ids = self.insert_rows(
+            Image,
+            ['name', 'url', 'is_main', 'created_at', 'variants'],
+            [(image['name'], image['url'], image['is_main'], now, []) for _, image in images]
+        )
+
+        self.insert_links(Movie.genres.through, 'genre', [
+            (movie_id, genre_ids[self.genre_key(name)])
+            for movie_id, movie in zip(movie_ids, movies) for name in movie['genres']
+        ])
+        self.insert_links(Movie.directors.through, 'director', [
+            (movie_id, director_ids[self.person_key(*person)])
+            for movie_id, movie in zip(movie_ids, movies) for person in movie['directors']
+        ])
+        self.insert_links(Movie.actors.through, 'actor', [
+            (movie_id, actor_ids[self.person_key(*person)])
+            for movie_id, movie in zip(movie_ids, movies) for person in movie['actors']
+        ])
+        self.insert_links(Movie.images.through, 'image', [
+            (movie_id, image_id) for (movie_id, _), image_id in zip(images, image_ids)
+        ])
+
+        index_rows(list(zip(movie_ids, parts)))
+
+    # le premier nom rencontré est gardé pour un nouveau genre
+    def resolve_genres(self, names):
+        missing = {}
+        for name in names:
+            key = self.genre_key(name)
+            if key not in self.genres and key not in missing:
+                missing[key] = name
+        if missing:
+            # genre est unique : un import concurrent ne fait pas planter le lot
+            Genre.objects.bulk_create([Genre(genre=name) for name in missing.values()], ignore_conflicts=True)
+            self.genres.update(
+                (self.genre_key(name), pk)
+                for name, pk in Genre.objects.filter(genre__in=missing.values()).values_list('genre', 'pk')
+            )
+        return self.genres
+
+    def resolve_people(self, model, people, now):
+        known = self.people[model]
+        missing = {}
+        for firstname, lastname in people:
+            key = self.person_key(firstname, lastname)
+            if key not in known and key not in missing:
+                missing[key] = (firstname, lastname, now)
+        if missing:
+            ids = self.insert_rows(model, ['firstname', 'lastname', 'created_at'], list(missing.values()))
+            known.update(zip(missing, ids))
+        return known
+
+    # insère les lignes et renvoie leurs pk, dans l'ordre
+    def insert_rows(self, model, fields, rows):
+        if not rows:
+            return []
+        if not self.use_copy:
+            objects = model._default_manager.bulk_create(
+                [model(**dict(zip(fields, row))) for row in rows],
+                batch_size=1000
+            )
+            return [obj.pk for obj in objects]
+
+        # ids pris dans la séquence de la table : la séquence reste en avance sur les données (pas de fix_sequences)
+        opts = model._meta
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)',
+                [opts.db_table, opts.pk.column, len(rows)]
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        # COPY n'a pas de valeur par défaut pour les colonnes NOT NULL : fields doit toutes les donner
+        # valeurs préparées par leur champ comme pour bulk_create (JSONField -> jsonb...)
+        model_fields = [opts.get_field(name) for name in fields]
+        columns = [opts.pk.column] + [field.column for field in model_fields]
+        self.copy(opts.db_table, columns, (
+            (pk, *(field.get_db_prep_save(value, connection) for field, value in zip(model_fields, row)))
+            for pk, row in zip(ids, rows)
+        ))
+        return ids
+
+    # lignes (film, objet lié) d'une table de liaison many to many
+    def insert_links(self, through, target, rows):
+        # même personne écrite deux fois pour un film ("Nolan" / "nolan") : une seule liaison
+        rows = list(dict.fromkeys(rows))
+        if not rows:
+            return
+        if not self.use_copy:
+            through.objects.bulk_create(
+                [through(**{'movie_id': movie_id, f'{target}_id': target_id}) for movie_id, target_id in rows],
+                batch_size=1000,
+                ignore_conflicts=True
+            )
+            return
+        opts = through._meta
+        self.copy(opts.db_table, [opts.get_field('movie').column, opts.get_field(target).column], rows)
+
+    def copy(self, table, columns, rows):
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            sql = f"COPY {quote(table)} ({', '.join(quote(column) for column in columns)}) FROM STDIN"
+            with cursor.copy(sql) as copy:
+                for row in rows:
+                    copy.write_row(row)
+
+    #
+    # Reprise
+    #
+
+    def read_checkpoint(self, checkpoint):
+        try:
+            with open(checkpoint, encoding='utf-8') as f:
+                return int(json.load(f)['line'])
+        except FileNotFoundError:
+            return 0
+        except (KeyError, TypeError, ValueError):
+            raise CommandError(f'Fichier de progression invalide : {checkpoint}')
+
+    def write_checkpoint(self, checkpoint, line):
+        with open(checkpoint, 'w', encoding='utf-8') as f:
+            json.dump({'line': line}, f)
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from ...models import TrendingScore
+
+
+# Recalcule le classement des tendances depuis les notes / favoris / watchlist récents
+# (reprise initiale, changement de TRENDING_HALF_LIFE_HOURS ou de TRENDING_EPOCH) ;
+# en fonctionnement normal les scores sont maintenus à chaque événement, et recalculés chaque nuit par le worker
+class Command(BaseCommand):
+    help = 'Recalcule les scores des films tendance'
+
+    def handle(self, *args, **options):
+        count = TrendingScore.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'{count} films classés'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from ...cache import bump_generation
+from ...models import Movie
+from ...models.movie import global_rating_mean
+
+
+# Recalcule la note bayésienne de tous les films avec la moyenne globale actuelle
+# (chaque note met déjà à jour son film, ceci rattrape l'évolution de la moyenne ; aussi fait chaque nuit par le worker)
+class Command(BaseCommand):
+    help = 'Recalcule la note bayésienne (tri "mieux notés") de tous les films'
+
+    def handle(self, *args, **options):
+        count = Movie.refresh_bayesian_ratings()
+        bump_generation('movie')
+        self.stdout.write(self.style.SUCCESS(f'{count} films mis à jour (moyenne globale {global_rating_mean():.3f})'))
@@ -0,0 +1,27 @@
+import time
+from django.core.management.base import BaseCommand
+from ...models import OutboundEmail
+
+
+class Command(BaseCommand):
+    help = 'Envoie les mails en attente de la boîte d\'envoi (sans worker celery, ou pour forcer un envoi)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Tourne en continu (runner sans celery)')
+        parser.add_argument('--interval', type=int, default=10, help='Secondes entre deux passages avec --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            sent = 0
+            while True:
+                batch = OutboundEmail.deliver_due()
+                if not batch:
+                    break
+                sent += batch
+            if sent:
+                self.stdout.write(self.style.SUCCESS(f'{sent} mails envoyés'))
+            if not options['loop']:
+                pending = OutboundEmail.objects.filter(status=OutboundEmail.STATUS_PENDING).count()
+                self.stdout.write(f'{pending} mails en attente')
+                return
+            time.sleep(options['interval'])
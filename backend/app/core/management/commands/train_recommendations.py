@@ -0,0 +1,69 @@
+import time
+import numpy as np
+from django.core.management.base import BaseCommand
+from ... import recommendations
+from ...models import UserRecommendations
+
+
+# Entraîne le modèle ALS sur les notes / favoris / watchlist et pré-calcule les recommandations de chaque utilisateur
+# planifié chaque nuit par celery beat (voir CELERY_BEAT_SCHEDULE)
+# --evaluate : met de côté une interaction positive par utilisateur et mesure le taux de rappel dans le top-n
+class Command(BaseCommand):
+    help = 'Entraîne le modèle de recommandation (ALS) et pré-calcule les listes "pour vous"'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--factors', type=int, default=recommendations.ALS_FACTORS)
+        parser.add_argument('--iterations', type=int, default=recommendations.ALS_ITERATIONS)
+        parser.add_argument('--regularization', type=float, default=recommendations.ALS_REGULARIZATION)
+        parser.add_argument('--alpha', type=float, default=recommendations.ALS_ALPHA)
+        parser.add_argument('--top-n', type=int, default=UserRecommendations.TOP_N)
+        parser.add_argument('--evaluate', action='store_true', help="Mesure le rappel sans rien enregistrer")
+
+    def handle(self, *args, **options):
+        params = {
+            'factors': options['factors'], 'iterations': options['iterations'],
+            'regularization': options['regularization'], 'alpha': options['alpha'],
+        }
+        started = time.perf_counter()
+        if options['evaluate']:
+            self.evaluate(params, options['top_n'])
+        else:
+            count = recommendations.build_recommendations(top=options['top_n'], **params)
+            self.stdout.write(self.style.SUCCESS(f'{count} utilisateurs recommandés'))
+        self.stdout.write(f'{time.perf_counter() - started:.1f}s')
+
+    def evaluate(self, params, n):
+        matrix, _, _ = recommendations.interaction_matrix()
+        rng = np.random.default_rng(0)
+        train = matrix.tolil()
+        held_out = {}
+        for user in range(matrix.shape[0]):
+            row = matrix[user]
+            positives = row.indices[row.data > 0]
+            if len(positives) >= 2:
+                movie = int(rng.choice(positives))
+                held_out[user] = movie
+                train[user, movie] = 0
+        train = train.tocsr()
+        train.eliminate_zeros()
+        if not held_out:
+            self.stdout.write('Pas assez de données pour évaluer')
+            return
+
+        user_factors, item_factors = recommendations.train_als(train, **params)
+        users = np.array(sorted(held_out))
+        ranked = recommendations.top_n(user_factors[users], item_factors, train[users], n)
+        hits = sum(1 for user, (columns, _) in zip(users, ranked) if held_out[user] in columns)
+
+        # référence : les films avec le plus d'interactions positives
+        popularity = np.asarray((train > 0).sum(axis=0)).ravel()
+        popular_hits = 0
+        for user in users:
+            scores = popularity.astype(np.float64)
+            scores[train[user].indices] = -1
+            popular_hits += held_out[user] in np.argsort(-scores)[:n]
+
+        self.stdout.write(
+            f'rappel@{n} : ALS {hits / len(users):.3f}, populaires {popular_hits / len(users):.3f} '
+            f'({len(users)} utilisateurs)'
+        )
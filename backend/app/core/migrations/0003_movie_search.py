@@ -0,0 +1,56 @@
+# Generated by Django 5.2.4 on 2026-10-18 07:54
+
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+# index spécifiques à la base : GIN plein texte + trigrammes sur postgres, table FTS5 sur sqlite
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute("CREATE INDEX movies_search_vector_gin ON movies USING gin (search_vector)")
+        schema_editor.execute("CREATE INDEX movies_search_text_trgm ON movies USING gin (search_text gin_trgm_ops)")
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE movie_search USING fts5("
+            "title, people, description, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS movies_search_text_trgm")
+        schema_editor.execute("DROP INDEX IF EXISTS movies_search_vector_gin")
+    elif vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS movie_search")
+
+
+# indexe les films déjà en base
+def index_existing_movies(apps, schema_editor):
+    from app.core.models.movie_search import index_movies
+    Movie = apps.get_model('core', 'Movie')
+    index_movies(Movie.objects.all())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_movie_document'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movie',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='movie',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+        migrations.RunPython(index_existing_movies, migrations.RunPython.noop),
+    ]
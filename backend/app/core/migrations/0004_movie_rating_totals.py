@@ -0,0 +1,46 @@
+# Generated by Django 5.2.4 on 2026-10-18 08:00
+
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import Count, F, FloatField, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf, Round
+
+
+# remplit les compteurs des films existants depuis la table des notes
+def fill_rating_totals(apps, schema_editor):
+    Movie = apps.get_model('core', 'Movie')
+    Rating = apps.get_model('core', 'Rating')
+    ratings = Rating.objects.filter(movie=OuterRef('pk')).order_by().values('movie')
+    Movie.objects.update(
+        rating_count=Coalesce(Subquery(ratings.annotate(c=Count('id')).values('c'), output_field=IntegerField()), Value(0)),
+        rating_sum=Coalesce(Subquery(ratings.annotate(s=Sum('rating')).values('s'), output_field=IntegerField()), Value(0)),
+    )
+    Movie.objects.update(
+        average_rating=Coalesce(Round(Cast(F('rating_sum'), FloatField()) / NullIf(F('rating_count'), 0), 2), 0.0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_movie_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movie',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='movie',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='movie',
+            name='average_rating',
+            field=models.DecimalField(decimal_places=2, default=0.0, max_digits=4, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(10)]),
+        ),
+        migrations.RunPython(fill_rating_totals, migrations.RunPython.noop),
+    ]
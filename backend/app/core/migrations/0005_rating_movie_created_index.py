@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-18 08:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_movie_rating_totals'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rating',
+            index=models.Index(fields=['movie', '-created_at'], name='ratings_movie_i_fd72cb_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-18 08:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_outbound_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarMovies',
+            fields=[
+                ('movie', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='similar_index', serialize=False, to='core.movie')),
+                ('neighbors', models.JSONField(default=list)),
+                ('scores', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Films similaires',
+                'db_table': 'similar_movies',
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.4 on 2026-10-18 08:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_similar_movies'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecommenderModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('factors', models.PositiveSmallIntegerField()),
+                ('regularization', models.FloatField()),
+                ('alpha', models.FloatField()),
+                ('movie_ids', models.BinaryField()),
+                ('item_factors', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Modèle de recommandation',
+                'db_table': 'recommender_models',
+            },
+        ),
+        migrations.CreateModel(
+            name='UserRecommendations',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='recommendations', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('movies', models.JSONField(default=list)),
+                ('scores', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Recommandations',
+                'db_table': 'user_recommendations',
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.4 on 2026-10-18 08:44
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, F, FloatField, Sum, When
+from django.db.models.functions import Cast
+
+
+# calcule la note bayésienne des films existants (même formule que Movie.bayesian_expression)
+def fill_bayesian_ratings(apps, schema_editor):
+    Movie = apps.get_model('core', 'Movie')
+    totals = Movie.objects.aggregate(count=Sum('rating_count'), total=Sum('rating_sum'))
+    mean = totals['total'] / totals['count'] if totals['count'] else settings.BAYESIAN_DEFAULT_MEAN
+    prior_votes = settings.BAYESIAN_MIN_VOTES
+    Movie.objects.update(bayesian_rating=Case(
+        When(rating_count__gt=0, then=Cast(
+            (Cast(F('rating_sum'), FloatField()) + prior_votes * mean) / (Cast(F('rating_count'), FloatField()) + prior_votes),
+            models.DecimalField(max_digits=6, decimal_places=4)
+        )),
+        default=0,
+        output_field=models.DecimalField(max_digits=6, decimal_places=4),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_trending_scores'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movie',
+            name='bayesian_rating',
+            field=models.DecimalField(decimal_places=4, default=0, editable=False, max_digits=6),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['bayesian_rating', 'id_film'], name='movies_bayesian_idx'),
+        ),
+        migrations.RunPython(fill_bayesian_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-18 08:47
+
+from django.db import migrations, models
+
+
+# tables de liaison créées par django : seul l'index (film, genre) de la contrainte unique et des index
+# simples existent ; (genre, film) permet de filtrer par genre / réalisateur / acteur sans lire la table
+FACET_INDEXES = [
+    ('movies_genres', 'movies_genres_genre_movie_idx', 'genre_id'),
+    ('movies_directors', 'movies_directors_director_movie_idx', 'director_id'),
+    ('movies_actors', 'movies_actors_actor_movie_idx', 'actor_id'),
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_movie_bayesian_rating'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['duration'], name='movies_duratio_87dab3_idx'),
+        ),
+        *(
+            migrations.RunSQL(
+                f"CREATE INDEX {name} ON {table} ({column}, movie_id)",
+                f"DROP INDEX IF EXISTS {name}",
+            )
+            for table, name, column in FACET_INDEXES
+        ),
+    ]
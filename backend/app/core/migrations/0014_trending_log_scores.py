@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:20
+
+from django.db import migrations
+from django.db.models import F
+from django.db.models.functions import Exp, Ln
+
+
+# les scores tendance passent en logarithme (voir TrendingScore.event_score)
+# un score nul ou négatif (dernier événement retiré) n'a pas de logarithme : le film sort du classement
+def scores_to_log(apps, schema_editor):
+    TrendingScore = apps.get_model('core', 'TrendingScore')
+    TrendingScore.objects.filter(score__lte=0).delete()
+    TrendingScore.objects.update(score=Ln(F('score')))
+
+
+def scores_from_log(apps, schema_editor):
+    TrendingScore = apps.get_model('core', 'TrendingScore')
+    TrendingScore.objects.update(score=Exp(F('score')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_library_and_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(scores_to_log, scores_from_log),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_trending_log_scores'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['rating_count', 'id_film'], name='movies_rating_count_idx'),
+        ),
+    ]
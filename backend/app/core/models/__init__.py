@@ -1,11 +1,18 @@
-from .user import User, Role
-from .movie import Genre, Director, Actor, Movie, Image
+from .user import User, Role, TokenUser
+from .movie import Genre, Director, Actor, Movie, Image, main_image_prefetch
 from .rating import Rating
 from .favorite import Favorite
 from .watchlist import Watchlist
+from .movie_document import MovieDocument
+from .outbound_email import OutboundEmail
+from .similar_movies import SimilarMovies
+from .user_recommendations import RecommenderModel, UserRecommendations
+from .trending import TrendingScore
+from . import movie_search  # signaux de l'index de recherche
 
 __all__ = [
-    'User', 'Role',
-    'Movie', 'Genre', 'Director', 'Actor', 'Image',
-    'Rating', 'Favorite', 'Watchlist'
+    'User', 'Role', 'TokenUser',
+    'Movie', 'Genre', 'Director', 'Actor', 'Image', 'main_image_prefetch',
+    'Rating', 'Favorite', 'Watchlist', 'MovieDocument', 'OutboundEmail',
+    'SimilarMovies', 'RecommenderModel', 'UserRecommendations', 'TrendingScore'
 ]
\ No newline at end of file
@@ -11,6 +11,10 @@ class Favorite(models.Model):
     class Meta:
         db_table = 'favorites'
         unique_together = ['user', 'movie']
+        indexes = [
+            # liste de l'utilisateur, les plus récents d'abord (la pagination par curseur ajoute l'id)
+            models.Index(fields=['user', '-created_at', '-id'], name='favorites_user_created_idx'),
+        ]
         verbose_name = 'Favori'
     
     def __str__(self):
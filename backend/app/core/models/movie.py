@@ -1,5 +1,12 @@
+from django.conf import settings
+from django.core.cache import cache
 from django.db import models
+from django.db.models import Case, Count, F, FloatField, Sum, When
+from django.db.models.lookups import GreaterThan
+from django.db.models.functions import Cast, Coalesce, NullIf, Round
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.contrib.postgres.search import SearchVectorField
 
 # le genre de film 
 class Genre(models.Model):
@@ -62,12 +69,26 @@ class Movie(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     # note(moyenne des notes données par les users)(entre 0 et 10)
+    # calculée à partir de rating_sum / rating_count (4 chiffres pour pouvoir stocker 10.00)
     average_rating = models.DecimalField(
-        max_digits=3, 
+        max_digits=4, 
         decimal_places=2, 
         default=0.00,
         validators=[MinValueValidator(0), MaxValueValidator(10)]
     )
+    # nombre et somme des notes, maintenus à chaque vote (voir Movie.apply_rating_delta)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    # note bayésienne (façon IMDb) pour le tri "mieux notés" : (somme + m * C) / (nombre + m)
+    # m = BAYESIAN_MIN_VOTES votes fictifs à la moyenne C de toutes les notes : un seul 10/10 ne passe pas devant
+    # des milliers de votes à 8 ; 0 pour un film sans note. Maintenue par apply_rating_delta, indexée (?ordering=)
+    bayesian_rating = models.DecimalField(max_digits=6, decimal_places=4, default=0, editable=False)
+
+    # index de recherche (maintenu par models/movie_search.py, ne pas modifier à la main)
+    # texte sans accents : titre + réalisateurs + acteurs + description
+    search_text = models.TextField(blank=True, default='', editable=False)
+    # vecteur pondéré pour postgres (titre > personnes > description), vide sur sqlite
+    search_vector = SearchVectorField(null=True, editable=False)
     
     #
     # Relations Many to Many
@@ -101,27 +122,90 @@ class Movie(models.Model):
         verbose_name = 'Film'
         ordering = ['created_at']
         indexes = [
+            # tri par défaut de la liste (-created_at, la pagination par curseur ajoute la pk) et ?ordering=title
+            models.Index(fields=['created_at', 'id_film'], name='movies_created_idx'),
+            models.Index(fields=['title', 'id_film'], name='movies_title_idx'),
             models.Index(fields=['release_date']),
             models.Index(fields=['average_rating']),
+            # filtre ?duration_min= / ?duration_max= (voir filters.py)
+            models.Index(fields=['duration']),
+            # ?ordering=-bayesian_rating : parcours de l'index (la pagination par curseur ajoute la pk)
+            models.Index(fields=['bayesian_rating', 'id_film'], name='movies_bayesian_idx'),
+            # films les plus notés (recommandations d'un utilisateur sans liste pré-calculée)
+            models.Index(fields=['rating_count', 'id_film'], name='movies_rating_count_idx'),
         ]
     
     def __str__(self):
         return self.title
 
-    #calcule la moyenne des notes pour LE film
-    def calculate_average_rating(self):
-        from .rating import Rating # j'evite les problème de dependance
-        ratings = Rating.objects.filter(movie=self)
-        if ratings.exists():
-            total = sum(rating.rating for rating in ratings)
-            return round(total / ratings.count(), 2)
-        return 0.00
-    
-    #met a jour la moyenne des notes du film (fonction appelé dans rating.py, pour re maj si 
-    # une note est ajoutée ou supprimée)
+    # maj incrémentale des notes du film : un seul UPDATE, quel que soit le nombre de notes
+    # (+1, +note) pour une nouvelle note, (0, nouvelle - ancienne) pour une modif, (-1, -note) pour une suppression
+    # les F() sont évalués par la base : pas de course entre deux votes simultanés
+    @classmethod
+    def apply_rating_delta(cls, movie_id, count_delta, sum_delta):
+        count = F('rating_count') + count_delta
+        total = F('rating_sum') + sum_delta
+        cls.objects.filter(pk=movie_id).update(
+            rating_count=count,
+            rating_sum=total,
+            average_rating=Coalesce(Round(Cast(total, FloatField()) / NullIf(count, 0), 2), 0.0),
+            bayesian_rating=cls.bayesian_expression(count, total),
+            # updated_at suit pour que l'ETag / Last-Modified de la page détail change
+            updated_at=timezone.now()
+        )
+
+    # recalcule les totaux depuis la table des notes (une requête d'agrégat)
+    # sert à réparer les compteurs, le fonctionnement normal passe par apply_rating_delta
     def update_average_rating(self):
-        self.average_rating = self.calculate_average_rating()
-        self.save(update_fields=['average_rating'])
+        from .rating import Rating # j'evite les problème de dependance
+        totals = Rating.objects.filter(movie=self).aggregate(count=Count('id'), total=Sum('rating'))
+        self.rating_count = totals['count']
+        self.rating_sum = totals['total'] or 0
+        self.average_rating = round(self.rating_sum / self.rating_count, 2) if self.rating_count else 0.00
+        self.save(update_fields=['rating_count', 'rating_sum', 'average_rating', 'updated_at'])
+        Movie.objects.filter(pk=self.pk).update(
+            bayesian_rating=self.bayesian_expression(F('rating_count'), F('rating_sum'))
+        )
+
+    # note bayésienne calculée par la base à partir du nombre et de la somme des notes
+    @classmethod
+    def bayesian_expression(cls, count, total):
+        prior_votes = settings.BAYESIAN_MIN_VOTES
+        prior_total = prior_votes * global_rating_mean()
+        return Case(
+            When(GreaterThan(count, 0), then=Cast(
+                (Cast(total, FloatField()) + prior_total) / (Cast(count, FloatField()) + prior_votes),
+                models.DecimalField(max_digits=6, decimal_places=4)
+            )),
+            default=0,
+            output_field=models.DecimalField(max_digits=6, decimal_places=4),
+        )
+
+    # recalcule la note bayésienne de tous les films en un UPDATE, avec la moyenne globale du moment
+    # (la moyenne C évolue lentement : rafraîchie chaque nuit par le worker, ou refresh_bayesian_ratings)
+    @classmethod
+    def refresh_bayesian_ratings(cls):
+        refresh_global_rating_mean()
+        return cls.objects.update(bayesian_rating=cls.bayesian_expression(F('rating_count'), F('rating_sum')))
+
+
+GLOBAL_RATING_MEAN_KEY = 'ratings:global_mean'
+
+
+# moyenne de toutes les notes (C de la note bayésienne), gardée dans le cache partagé
+# recalculée si absente : un agrégat sur la table des films, pas sur celle des notes
+def global_rating_mean():
+    mean = cache.get(GLOBAL_RATING_MEAN_KEY)
+    if mean is None:
+        mean = refresh_global_rating_mean()
+    return mean
+
+
+def refresh_global_rating_mean():
+    totals = Movie.objects.aggregate(count=Sum('rating_count'), total=Sum('rating_sum'))
+    mean = totals['total'] / totals['count'] if totals['count'] else settings.BAYESIAN_DEFAULT_MEAN
+    cache.set(GLOBAL_RATING_MEAN_KEY, mean, timeout=None)
+    return mean
 
 #POSTER
 class Image(models.Model):
@@ -130,6 +214,9 @@ class Image(models.Model):
     url = models.ImageField(upload_to='movies/', max_length=300)
     is_main = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # versions redimensionnées (webp/jpeg) générées en arrière-plan après l'upload (voir core/images.py)
+    # [{"width": 320, "webp": "movies/variants/....webp", "jpeg": "movies/variants/....jpg"}, ...]
+    variants = models.JSONField(default=list, blank=True, editable=False)
     
     
     class Meta:
@@ -138,4 +225,21 @@ class Image(models.Model):
         ordering = ['-created_at']
     
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+    # on garde le fichier lu en base pour savoir si l'upload a changé (voir core/images.py)
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_url = instance.__dict__.get('url')
+        return instance
+
+
+# précharge uniquement l'image principale des films d'une liste (une seule requête pour toute la page)
+# prefix permet de passer par une relation, ex: main_image_prefetch('movie__') pour les favoris
+def main_image_prefetch(prefix=''):
+    return models.Prefetch(
+        f'{prefix}images',
+        queryset=Image.objects.filter(is_main=True),
+        to_attr='main_images'
+    )
\ No newline at end of file
@@ -0,0 +1,134 @@
+import json
+from asgiref.sync import sync_to_async
+from django.db import models, transaction
+from django.db.models.signals import post_save, pre_delete, m2m_changed
+from django.dispatch import receiver
+from rest_framework.renderers import JSONRenderer
+from .movie import Movie, Genre, Director, Actor, Image
+
+
+# Document pré-calculé de la page détail d'un film
+# (le json complet de MovieSerializer, reconstruit seulement quand le film ou une de ses relations change)
+class MovieDocument(models.Model):
+    movie = models.OneToOneField(
+        Movie,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='document'
+    )
+    data = models.JSONField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'movie_documents'
+        verbose_name = 'Document film'
+
+    def __str__(self):
+        return f"Document {self.movie_id}"
+
+    # reconstruit (ou crée) les documents des films donnés
+    @classmethod
+    def rebuild(cls, movie_ids):
+        from ..serializers import MovieSerializer  # j'evite les problème de dependance
+        movies = Movie.objects.filter(pk__in=movie_ids).prefetch_related(
+            'genres', 'directors', 'actors', 'images'
+        )
+        documents = []
+        for movie in movies:
+            # on passe par le renderer pour stocker exactement ce que l'API renverrait
+            data = json.loads(JSONRenderer().render(MovieSerializer(movie).data))
+            cls.objects.update_or_create(movie=movie, defaults={'data': data})
+            documents.append(data)
+        return documents
+
+    # renvoie le document d'un film (une seule requête), le construit s'il n'existe pas encore
+    # None si le film n'existe pas
+    @classmethod
+    def get_data(cls, id_film):
+        row = cls.objects.filter(movie_id=id_film).values_list(
+            'data', 'movie__average_rating', 'movie__updated_at'
+        ).first()
+        if row is None:
+            documents = cls.rebuild([id_film])
+            return documents[0] if documents else None
+        data, average_rating, updated_at = row
+        # la moyenne change à chaque note : on la lit directement sur le film plutôt que de reconstruire
+        data['average_rating'] = float(average_rating)
+        data['updated_at'] = json.loads(JSONRenderer().render(updated_at))
+        return data
+
+    # dates du document et du film, sans charger le document (pour l'ETag / Last-Modified)
+    # None si le document n'est pas encore construit
+    @classmethod
+    def get_versions(cls, id_film):
+        return cls.objects.filter(movie_id=id_film).values_list('updated_at', 'movie__updated_at').first()
+
+    # versions async (vues ASGI, voir views/async_read.py)
+    @classmethod
+    async def aget_data(cls, id_film):
+        row = await cls.objects.filter(movie_id=id_film).values_list(
+            'data', 'movie__average_rating', 'movie__updated_at'
+        ).afirst()
+        if row is None:
+            documents = await sync_to_async(cls.rebuild)([id_film])
+            return documents[0] if documents else None
+        data, average_rating, updated_at = row
+        data['average_rating'] = float(average_rating)
+        data['updated_at'] = json.loads(JSONRenderer().render(updated_at))
+        return data
+
+    @classmethod
+    async def aget_versions(cls, id_film):
+        return await cls.objects.filter(movie_id=id_film).values_list('updated_at', 'movie__updated_at').afirst()
+
+
+# planifie la reconstruction après le commit (rien n'est fait si la transaction est annulée)
+def schedule_rebuild(movie_ids):
+    movie_ids = set(movie_ids)
+    if movie_ids:
+        transaction.on_commit(lambda: MovieDocument.rebuild(movie_ids))
+
+
+@receiver(post_save, sender=Movie)
+def rebuild_document_on_movie_save(sender, instance, update_fields=None, **kwargs):
+    # une simple maj de la moyenne ne touche pas le document (voir get_data)
+    if update_fields and set(update_fields) <= {'average_rating', 'rating_count', 'rating_sum', 'updated_at'}:
+        return
+    schedule_rebuild([instance.pk])
+
+
+# maj des relations many to many, dans les deux sens (film.genres.add(...) ou genre.movies.add(...))
+@receiver(m2m_changed, sender=Movie.genres.through)
+@receiver(m2m_changed, sender=Movie.directors.through)
+@receiver(m2m_changed, sender=Movie.actors.through)
+@receiver(m2m_changed, sender=Movie.images.through)
+def rebuild_document_on_m2m_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            schedule_rebuild([instance.pk])
+    elif action == 'pre_clear':
+        # après le clear on ne sait plus quels films étaient liés, on les garde de côté
+        instance._cleared_movie_ids = list(instance.movies.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        schedule_rebuild(getattr(instance, '_cleared_movie_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        schedule_rebuild(pk_set or [])
+
+
+# un genre/réal/acteur/image renommé change le document de tous ses films
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Director)
+@receiver(post_save, sender=Actor)
+@receiver(post_save, sender=Image)
+def rebuild_document_on_related_save(sender, instance, created, **kwargs):
+    if not created:
+        schedule_rebuild(instance.movies.values_list('pk', flat=True))
+
+
+# à la suppression les lignes de liaison partent sans m2m_changed, on récupère les films avant
+@receiver(pre_delete, sender=Genre)
+@receiver(pre_delete, sender=Director)
+@receiver(pre_delete, sender=Actor)
+@receiver(pre_delete, sender=Image)
+def rebuild_document_on_related_delete(sender, instance, **kwargs):
+    schedule_rebuild(list(instance.movies.values_list('pk', flat=True)))
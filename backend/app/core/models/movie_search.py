@@ -0,0 +1,162 @@
+import re
+import unicodedata
+from django.contrib.postgres.search import SearchVector
+from django.db import connection, transaction
+from django.db.models import Value
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+from .movie import Movie, Director, Actor
+
+#
+# Index de recherche des films (titre, description, réalisateurs, acteurs)
+#  - postgres : search_vector (GIN) pour le plein texte + trigrammes (GIN) sur search_text pour le flou
+#  - sqlite   : table virtuelle FTS5 movie_search (pour lancer le projet en local)
+# Les index sont créés par la migration 0003, ici on ne fait que les remplir
+#
+
+# table FTS5 utilisée sur sqlite
+SQLITE_FTS_TABLE = 'movie_search'
+
+
+# minuscules et sans accents ("Amélie" -> "amelie")
+# fait en python des deux côtés (index et requête) : unaccent() n'est pas IMMUTABLE et ne peut pas servir dans un index
+def normalize_search_text(value):
+    value = unicodedata.normalize('NFKD', value or '')
+    return ''.join(char for char in value if not unicodedata.combining(char)).lower()
+
+
+# découpe une saisie utilisateur en termes de recherche (lettres et chiffres seulement)
+def search_terms(value):
+    return re.findall(r'\w+', normalize_search_text(value))
+
+
+# parties normalisées de l'index d'un film : (titre, personnes, description)
+def search_parts(title, people, description):
+    return (
+        normalize_search_text(title),
+        normalize_search_text(' '.join(people)),
+        normalize_search_text(description),
+    )
+
+
+# texte stocké dans Movie.search_text (sert au flou par trigrammes et au repli sans index)
+def search_text_from_parts(parts):
+    return ' '.join(part for part in parts if part)
+
+
+# (re)calcule l'index de recherche des films du queryset
+# marche aussi avec le modèle historique d'une migration
+def index_movies(queryset):
+    manager = queryset.model._default_manager
+    movies = queryset.prefetch_related('directors', 'actors')
+    for movie in movies:
+        title, people, description = parts = search_parts(
+            movie.title,
+            [f"{person.firstname} {person.lastname}" for person in [*movie.directors.all(), *movie.actors.all()]],
+            movie.description
+        )
+        fields = {'search_text': search_text_from_parts(parts)}
+
+        if connection.vendor == 'postgresql':
+            fields['search_vector'] = (
+                SearchVector(Value(title), weight='A', config='simple')
+                + SearchVector(Value(people), weight='B', config='simple')
+                + SearchVector(Value(description), weight='C', config='simple')
+            )
+        elif connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT OR REPLACE INTO {SQLITE_FTS_TABLE}(rowid, title, people, description) VALUES (%s, %s, %s, %s)",
+                    [movie.pk, title, people, description]
+                )
+
+        # update() ne déclenche pas post_save : pas de boucle avec les signaux plus bas
+        manager.filter(pk=movie.pk).update(**fields)
+
+
+# index d'un lot de films déjà insérés avec leur search_text (import en masse)
+# rows : [(pk, (titre, personnes, description))] venant de search_parts
+# postgres : COPY dans une table temporaire puis un seul UPDATE, à appeler dans une transaction
+def index_rows(rows):
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                "CREATE TEMPORARY TABLE movie_search_import (id integer, title text, people text, description text) "
+                "ON COMMIT DROP"
+            )
+            with cursor.copy("COPY movie_search_import (id, title, people, description) FROM STDIN") as copy:
+                for pk, parts in rows:
+                    copy.write_row((pk, *parts))
+            # mêmes poids que index_movies (titre > personnes > description)
+            cursor.execute(
+                "UPDATE movies SET search_vector = "
+                "setweight(to_tsvector('simple', i.title), 'A') "
+                "|| setweight(to_tsvector('simple', i.people), 'B') "
+                "|| setweight(to_tsvector('simple', i.description), 'C') "
+                "FROM movie_search_import i WHERE movies.id_film = i.id"
+            )
+            cursor.execute("DROP TABLE movie_search_import")
+        elif connection.vendor == 'sqlite':
+            cursor.executemany(
+                f"INSERT OR REPLACE INTO {SQLITE_FTS_TABLE}(rowid, title, people, description) VALUES (%s, %s, %s, %s)",
+                [(pk, *parts) for pk, parts in rows]
+            )
+
+
+def update_search_index(movie_ids):
+    movie_ids = set(movie_ids)
+    if movie_ids:
+        index_movies(Movie.objects.filter(pk__in=movie_ids))
+
+
+# l'index est mis à jour après le commit, seulement pour les films touchés
+def schedule_index(movie_ids):
+    movie_ids = set(movie_ids)
+    if movie_ids:
+        transaction.on_commit(lambda: update_search_index(movie_ids))
+
+
+@receiver(post_save, sender=Movie)
+def index_movie_on_save(sender, instance, update_fields=None, **kwargs):
+    # pas besoin de ré-indexer si ni le titre ni la description n'ont pu changer
+    if update_fields and not set(update_fields) & {'title', 'description'}:
+        return
+    schedule_index([instance.pk])
+
+
+@receiver(post_delete, sender=Movie)
+def unindex_movie_on_delete(sender, instance, **kwargs):
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SQLITE_FTS_TABLE} WHERE rowid = %s", [instance.pk])
+
+
+# réalisateurs et acteurs ajoutés/retirés d'un film (dans les deux sens)
+@receiver(m2m_changed, sender=Movie.directors.through)
+@receiver(m2m_changed, sender=Movie.actors.through)
+def index_movie_on_people_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            schedule_index([instance.pk])
+    elif action == 'pre_clear':
+        instance._search_cleared_movie_ids = list(instance.movies.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        schedule_index(getattr(instance, '_search_cleared_movie_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        schedule_index(pk_set or [])
+
+
+# un réalisateur/acteur renommé ou supprimé change l'index de tous ses films
+@receiver(post_save, sender=Director)
+@receiver(post_save, sender=Actor)
+def index_movies_on_person_save(sender, instance, created, **kwargs):
+    if not created:
+        schedule_index(instance.movies.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Director)
+@receiver(pre_delete, sender=Actor)
+def index_movies_on_person_delete(sender, instance, **kwargs):
+    schedule_index(list(instance.movies.values_list('pk', flat=True)))
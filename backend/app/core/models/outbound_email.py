@@ -0,0 +1,134 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import models, transaction
+from django.utils import timezone
+
+
+# Boîte d'envoi des mails (ex: formulaire de contact)
+# la vue enregistre le mail et répond tout de suite, un worker l'envoie ensuite (voir core/tasks.py)
+# les mails restent en base : rien n'est perdu si le SMTP est lent ou en panne, on réessaie plus tard
+class OutboundEmail(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'En attente'),
+        (STATUS_SENT, 'Envoyé'),
+        (STATUS_FAILED, 'Abandonné'),
+    ]
+
+    # après MAX_ATTEMPTS échecs le mail est abandonné (status failed, visible dans l'admin)
+    MAX_ATTEMPTS = 8
+    # délai avant le nouvel essai : 30s, 1min, 2min, 4min... plafonné à 1h
+    RETRY_BASE_DELAY = 30
+    RETRY_MAX_DELAY = 60 * 60
+    # mails envoyés par connexion SMTP
+    BATCH_SIZE = 50
+    # un lot pris par un worker n'est plus "à envoyer" pendant LEASE secondes (repris ensuite si le worker est mort)
+    LEASE = 10 * 60
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255)
+    to = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'outbound_emails'
+        verbose_name = 'Mail sortant'
+        indexes = [
+            # mails à envoyer maintenant
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
+
+    # enregistre un mail et demande l'envoi au worker une fois la transaction validée
+    # sans broker (CELERY_TASK_ALWAYS_EAGER) la tâche tournerait dans la requête, SMTP compris :
+    # le mail attend alors la commande send_outbox (--loop pour un runner permanent)
+    @classmethod
+    def queue(cls, subject, body, to, from_email=None):
+        email = cls.objects.create(
+            subject=subject,
+            body=body,
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+            to=list(to)
+        )
+        if not settings.CELERY_TASK_ALWAYS_EAGER:
+            from ..tasks import deliver_outbox  # j'evite les problème de dependance
+            transaction.on_commit(lambda: deliver_outbox.delay())
+        return email
+
+    @classmethod
+    def due(cls):
+        return cls.objects.filter(status=cls.STATUS_PENDING, next_attempt_at__lte=timezone.now())
+
+    # envoie un lot de mails en attente sur une seule connexion SMTP, renvoie le nombre de mails envoyés
+    # le lot est d'abord réservé (next_attempt_at repoussé de LEASE) dans une transaction courte (skip_locked) :
+    # deux workers ne prennent jamais le même mail, et aucun verrou n'est gardé pendant les envois
+    @classmethod
+    def deliver_due(cls, batch_size=None):
+        emails = cls.claim_due(batch_size or cls.BATCH_SIZE)
+        if not emails:
+            return 0
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception as e:
+            # serveur injoignable : tout le lot est reporté
+            for email in emails:
+                email.schedule_retry(e)
+            return 0
+        sent = 0
+        try:
+            for email in emails:
+                try:
+                    EmailMessage(
+                        subject=email.subject,
+                        body=email.body,
+                        from_email=email.from_email,
+                        to=email.to,
+                        connection=connection
+                    ).send()
+                except Exception as e:
+                    email.schedule_retry(e)
+                else:
+                    email.mark_sent()
+                    sent += 1
+        finally:
+            connection.close()
+        return sent
+
+    @classmethod
+    def claim_due(cls, batch_size):
+        with transaction.atomic():
+            emails = list(cls.due().select_for_update(skip_locked=True).order_by('next_attempt_at')[:batch_size])
+            if emails:
+                cls.objects.filter(pk__in=[email.pk for email in emails]).update(
+                    next_attempt_at=timezone.now() + timedelta(seconds=cls.LEASE)
+                )
+        return emails
+
+    def mark_sent(self):
+        self.status = self.STATUS_SENT
+        self.attempts += 1
+        self.sent_at = timezone.now()
+        self.last_error = ''
+        self.save(update_fields=['status', 'attempts', 'sent_at', 'last_error'])
+
+    def schedule_retry(self, error):
+        self.attempts += 1
+        self.last_error = str(error)
+        if self.attempts >= self.MAX_ATTEMPTS:
+            self.status = self.STATUS_FAILED
+        else:
+            delay = min(self.RETRY_BASE_DELAY * 2 ** (self.attempts - 1), self.RETRY_MAX_DELAY)
+            self.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+        self.save(update_fields=['status', 'attempts', 'last_error', 'next_attempt_at'])
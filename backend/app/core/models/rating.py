@@ -1,5 +1,5 @@
 from django.db import models
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_save, pre_delete, post_delete
 from django.dispatch import receiver
 from .user import User
 from .movie import Movie
@@ -14,14 +14,61 @@ class Rating(models.Model):
         db_table = 'ratings'
         verbose_name = 'Note'
         unique_together = ('user', 'movie')
+        indexes = [
+            # notes d'un film, les plus récentes d'abord (pagination de get_movie_ratings_view)
+            models.Index(fields=['movie', '-created_at']),
+            # notes de l'utilisateur, les plus récentes d'abord (UserRatingsListView)
+            models.Index(fields=['user', '-created_at', '-id'], name='ratings_user_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user} - {self.movie}: {self.rating}"
 
+    # on garde la note lue en base pour connaître l'écart lors d'une modif (sans requête en plus)
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_rating = instance.__dict__.get('rating')
+        return instance
+
 #getteur qui vient nous dire si une note est creer(je pars du principe que le save comprend la maj et la création)
-# ou supprimer
+# ou supprimer, et on met à jour les compteurs du film en incrémental (même transaction que la note)
 @receiver(post_save, sender=Rating)
+def add_rating_to_movie(sender, instance, created, **kwargs):
+    if created:
+        Movie.apply_rating_delta(instance.movie_id, 1, instance.rating)
+    else:
+        previous = getattr(instance, '_loaded_rating', None)
+        if previous is None:
+            # note modifiée sans être passée par la base (cas rare) : on recalcule
+            instance.movie.update_average_rating()
+        elif instance.rating != previous:
+            Movie.apply_rating_delta(instance.movie_id, 0, instance.rating - previous)
+    instance._loaded_rating = instance.rating
+
+
+# avant le DELETE (même transaction) : on verrouille la ligne et on relit sa note ; deux suppressions
+# simultanées de la même note enverraient sinon toutes les deux post_delete (le compteur baisserait deux fois)
+# la seconde attend le verrou puis ne trouve plus la ligne : rien à retirer
+@receiver(pre_delete, sender=Rating)
+def lock_rating_before_delete(sender, instance, origin=None, **kwargs):
+    if is_movie_deletion(origin):
+        return
+    instance._deleted_rating = (
+        Rating.objects.select_for_update().filter(pk=instance.pk).values_list('rating', flat=True).first()
+    )
+
+
 @receiver(post_delete, sender=Rating)
-#maj de la moyenne si signalé par ce nos poucave du dessus
-def update_movie_average_rating(sender, instance, **kwargs):
-    instance.movie.update_average_rating()
+def remove_rating_from_movie(sender, instance, origin=None, **kwargs):
+    # film supprimé avec ses notes : plus de compteurs à tenir
+    if is_movie_deletion(origin):
+        return
+    # la note supprimée : on retire sa valeur en base (pas celle éventuellement modifiée en mémoire)
+    rating = getattr(instance, '_deleted_rating', None)
+    if rating is not None:
+        Movie.apply_rating_delta(instance.movie_id, -1, -rating)
+
+
+def is_movie_deletion(origin):
+    return isinstance(origin, Movie) or getattr(origin, 'model', None) is Movie
@@ -0,0 +1,27 @@
+from django.db import models
+from .movie import Movie
+
+
+# Index pré-calculé des films similaires (filtrage collaboratif item-item, voir core/recommendations.py)
+# une ligne par film : ses k plus proches voisins triés par similarité décroissante
+# l'endpoint similar/ ne fait qu'une lecture par clé primaire, quelle que soit la taille du catalogue
+class SimilarMovies(models.Model):
+    # voisins gardés par film
+    TOP_K = 20
+
+    movie = models.OneToOneField(
+        Movie,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='similar_index'
+    )
+    neighbors = models.JSONField(default=list)  # id_film des voisins
+    scores = models.JSONField(default=list)     # similarité de chaque voisin (même ordre)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'similar_movies'
+        verbose_name = 'Films similaires'
+
+    def __str__(self):
+        return f"Similaires {self.movie_id}"
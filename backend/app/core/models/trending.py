@@ -0,0 +1,145 @@
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import models, transaction, IntegrityError
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Exp, Greatest, Least, Ln
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from .movie import Movie
+from .rating import Rating
+from .favorite import Favorite
+from .watchlist import Watchlist
+
+
+# Classement des films "tendance" : activité récente (notes, favoris, watchlist) avec décroissance exponentielle
+# décroissance "vers l'avant" : un événement ajoute poids * exp(λ (t - TRENDING_EPOCH)) au total du film,
+# au lieu de faire décroître tous les totaux avec le temps ; l'ordre est le même qu'avec
+# poids * exp(-λ (maintenant - t)), donc un seul UPDATE par événement et le top-n se lit dans l'index sur score
+# λ = ln 2 / TRENDING_HALF_LIFE_HOURS : un événement compte moitié moins au bout d'une demi-vie
+# score = logarithme du total : exp(λ (t - TRENDING_EPOCH)) dépasserait les float après ~1000 demi-vies
+# (quelques mois avec une demi-vie de quelques heures), son logarithme grandit seulement linéairement
+class TrendingScore(models.Model):
+    # poids de chaque type d'événement
+    WEIGHTS = {Rating: 1.0, Favorite: 2.0, Watchlist: 1.0}
+    # fenêtre de la reconstruction, en demi-vies (au-delà un événement compte pour moins de 0.1%)
+    WINDOW_HALF_LIVES = 10
+    # part gardée quand on retire tout le total (dernier événement retiré) : score quasi nul, sans ln(0)
+    MIN_REMAINING = 1e-12
+    # borne des exposants calculés par la base (postgres refuse un exp() qui sort des float)
+    MIN_EXPONENT = -700.0
+
+    movie = models.OneToOneField(
+        Movie,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending'
+    )
+    # ln(somme des contributions), voir event_score
+    score = models.FloatField(default=0)
+
+    class Meta:
+        db_table = 'trending_scores'
+        verbose_name = 'Score tendance'
+        indexes = [
+            # top-n : parcours de l'index dans l'ordre, sans tri
+            models.Index(fields=['-score'], name='trending_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"Tendance {self.movie_id}: {self.score}"
+
+    @staticmethod
+    def decay_rate():
+        return math.log(2) / (settings.TRENDING_HALF_LIFE_HOURS * 3600)
+
+    @staticmethod
+    def epoch():
+        return datetime.fromisoformat(settings.TRENDING_EPOCH).replace(tzinfo=dt_timezone.utc)
+
+    # logarithme de la contribution d'un événement (sans décroissance depuis l'époque)
+    @classmethod
+    def event_score(cls, created_at, weight):
+        return math.log(weight) + cls.decay_rate() * (created_at - cls.epoch()).total_seconds()
+
+    # total ramené à maintenant (ce que valent les événements aujourd'hui), pour l'affichage
+    @classmethod
+    def current_value(cls, score, now=None):
+        now = now or timezone.now()
+        return math.exp(score - cls.decay_rate() * (now - cls.epoch()).total_seconds())
+
+    # ajoute (ou retire) la contribution d'un événement, dans la transaction de l'événement
+    # calcul fait par la base (F()) : pas de course entre deux événements simultanés sur le même film
+    # un retrait ne crée jamais la ligne (film en cours de suppression : ses notes partent en cascade)
+    @classmethod
+    def apply_delta(cls, movie_id, event_score, remove=False):
+        expression = cls.remove_expression(event_score) if remove else cls.add_expression(event_score)
+        if cls.objects.filter(movie_id=movie_id).update(score=expression) or remove:
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(movie_id=movie_id, score=event_score)
+        except IntegrityError:
+            # créé entre-temps par un autre événement
+            cls.objects.filter(movie_id=movie_id).update(score=expression)
+
+    # ln(exp(score) + exp(x)) = max + ln(1 + exp(min - max))
+    @classmethod
+    def add_expression(cls, x):
+        x = Value(x, output_field=FloatField())
+        high, low = Greatest(F('score'), x), Least(F('score'), x)
+        return high + Ln(Value(1.0) + Exp(Greatest(low - high, Value(cls.MIN_EXPONENT))))
+
+    # ln(exp(score) - exp(x)) = score + ln(1 - exp(x - score)), au moins MIN_REMAINING du total
+    @classmethod
+    def remove_expression(cls, x):
+        x = Value(x, output_field=FloatField())
+        exponent = Greatest(Least(x - F('score'), Value(0.0)), Value(cls.MIN_EXPONENT))
+        return F('score') + Ln(Greatest(Value(1.0) - Exp(exponent), Value(cls.MIN_REMAINING)))
+
+    # recalcule tous les scores depuis les événements de la fenêtre (reprise, ou après un changement de réglage)
+    # les films sans activité récente sortent du classement ; renvoie le nombre de films classés
+    @classmethod
+    def rebuild(cls):
+        since = timezone.now() - timedelta(hours=settings.TRENDING_HALF_LIFE_HOURS * cls.WINDOW_HALF_LIVES)
+        scores = {}
+        for model, weight in cls.WEIGHTS.items():
+            events = model.objects.filter(created_at__gte=since).values_list('movie_id', 'created_at')
+            for movie_id, created_at in events.iterator(chunk_size=10000):
+                score = cls.event_score(created_at, weight)
+                scores[movie_id] = log_add(scores[movie_id], score) if movie_id in scores else score
+        with transaction.atomic():
+            cls.objects.exclude(movie_id__in=list(scores)).delete()
+            cls.objects.bulk_create(
+                [cls(movie_id=movie_id, score=score) for movie_id, score in scores.items()],
+                batch_size=1000, update_conflicts=True, unique_fields=['movie'], update_fields=['score']
+            )
+        return len(scores)
+
+
+# un événement créé ajoute sa contribution, un événement supprimé (favori retiré...) retire exactement la sienne
+# (une note modifiée n'est pas une nouvelle activité)
+@receiver(post_save, sender=Rating)
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=Watchlist)
+def add_trending_event(sender, instance, created, **kwargs):
+    if created:
+        TrendingScore.apply_delta(
+            instance.movie_id, TrendingScore.event_score(instance.created_at, TrendingScore.WEIGHTS[sender])
+        )
+
+
+@receiver(post_delete, sender=Rating)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=Watchlist)
+def remove_trending_event(sender, instance, **kwargs):
+    TrendingScore.apply_delta(
+        instance.movie_id, TrendingScore.event_score(instance.created_at, TrendingScore.WEIGHTS[sender]), remove=True
+    )
+
+
+# ln(exp(a) + exp(b)) sans passer par exp(a) ni exp(b)
+def log_add(a, b):
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
@@ -62,4 +62,18 @@ class User(AbstractUser):
     @property
     def is_admin(self):
         # verifie si l'utilisateur est un admin
-        return self.role and self.role.role == 'admin'
\ No newline at end of file
+        return bool(self.role_id) and self.role.role == 'admin'
+
+
+# Utilisateur reconstruit depuis un token d'accès JWT (voir core/authentication.py) : id, username et rôle
+# seulement, les autres champs sont vides ; s'utilise dans les filtres et les créations (user=request.user),
+# mais ne doit jamais écrire sa ligne (elle serait remplacée par des champs vides) : full_user() pour ça
+class TokenUser(User):
+    class Meta:
+        proxy = True
+
+    def save(self, *args, **kwargs):
+        raise NotImplementedError("Utilisateur d'un token : passer par full_user() pour le modifier")
+
+    def delete(self, *args, **kwargs):
+        raise NotImplementedError("Utilisateur d'un token : passer par full_user() pour le supprimer")
@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .user import User
+from .rating import Rating
+from .favorite import Favorite
+from .watchlist import Watchlist
+
+
+# Modèle de factorisation entraîné par train_recommendations (ALS, voir core/recommendations.py)
+# seuls les facteurs des films sont gardés : ceux d'un utilisateur se recalculent à partir de ses interactions
+# tableaux numpy sérialisés (np.save), on ne garde que le dernier modèle
+class RecommenderModel(models.Model):
+    factors = models.PositiveSmallIntegerField()
+    regularization = models.FloatField()
+    alpha = models.FloatField()
+    movie_ids = models.BinaryField()      # id_film de chaque ligne de item_factors
+    item_factors = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'recommender_models'
+        verbose_name = 'Modèle de recommandation'
+
+    def __str__(self):
+        return f"ALS {self.factors} facteurs ({self.created_at:%Y-%m-%d %H:%M})"
+
+
+# Recommandations "pour vous" pré-calculées d'un utilisateur (films triés par score décroissant)
+# sans les films déjà notés, en favori ou dans la watchlist au moment du calcul
+class UserRecommendations(models.Model):
+    # films gardés par utilisateur
+    TOP_N = 50
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='recommendations'
+    )
+    movies = models.JSONField(default=list)
+    scores = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'user_recommendations'
+        verbose_name = 'Recommandations'
+
+    def __str__(self):
+        return f"Recommandations {self.user_id}"
+
+
+# Activité de l'utilisateur (note, favori, watchlist) : sa liste en cache est invalidée tout de suite
+# et ses recommandations sont recalculées en arrière-plan avec le modèle actuel (voir core/tasks.py)
+# une seule tâche par utilisateur pour une suppression de plusieurs lignes (queryset.delete())
+# rien pendant la suppression d'un utilisateur ou d'un film : ses recommandations partent avec lui, et un film
+# supprimé change la génération 'movie' (liste en cache invalidée, le film n'y est plus) ; le modèle suit la nuit
+# sans broker (CELERY_TASK_ALWAYS_EAGER) pas de recalcul : il tournerait dans la requête (numpy),
+# la liste est celle du dernier entraînement (commande train_recommendations) sans les films vus
+@receiver(post_save, sender=Rating)
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=Watchlist)
+def refresh_recommendations_on_save(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: refresh_user(user_id))
+
+
+@receiver(post_delete, sender=Rating)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=Watchlist)
+def refresh_recommendations_on_delete(sender, instance, origin=None, **kwargs):
+    if not isinstance(origin, sender) and getattr(origin, 'model', None) is not sender:
+        return
+    # utilisateurs déjà traités, gardés sur l'objet / le queryset supprimé (rempli après le commit seulement)
+    done = origin.__dict__.setdefault('_reco_refreshed', set())
+    user_id = instance.user_id
+
+    def refresh():
+        if user_id not in done:
+            done.add(user_id)
+            refresh_user(user_id)
+    transaction.on_commit(refresh)
+
+
+def refresh_user(user_id):
+    from ..cache import bump_generation  # j'evite les problème de dependance
+    from ..tasks import refresh_user_recommendations
+    bump_generation(f'reco:{user_id}')
+    if not settings.CELERY_TASK_ALWAYS_EAGER:
+        refresh_user_recommendations.delay(user_id)
@@ -11,6 +11,10 @@ class Watchlist(models.Model):
     class Meta:
         db_table = 'watchlists'
         unique_together = ['user', 'movie']
+        indexes = [
+            # liste de l'utilisateur, les plus récents d'abord (la pagination par curseur ajoute l'id)
+            models.Index(fields=['user', '-created_at', '-id'], name='watchlists_user_created_idx'),
+        ]
         verbose_name = 'Film à voir'
     
     def __str__(self):
@@ -0,0 +1,168 @@
+import base64
+import json
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+# Pagination par clé (keyset) : pas de COUNT(*) ni d'OFFSET, le coût d'une page ne dépend pas de sa profondeur
+# la position est (champ de tri, pk) du dernier élément, encodée dans un curseur opaque
+class KeysetPagination:
+    cursor_query_param = 'cursor'
+
+    def __init__(self, page_size):
+        self.page_size = page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.field, self.descending = self.get_ordering(queryset)
+        cursor = self.decode_cursor(request, queryset.model)
+        self.reverse = cursor is not None and cursor['r']
+
+        # on lit dans le sens inverse pour la page précédente, puis on remet les résultats dans l'ordre
+        descending = self.descending != self.reverse
+        prefix = '-' if descending else ''
+        queryset = queryset.order_by(f'{prefix}{self.field}', f'{prefix}pk')
+
+        if cursor is not None:
+            lookup = 'lt' if descending else 'gt'
+            if self.field == 'pk':
+                queryset = queryset.filter(**{f'pk__{lookup}': cursor['pk']})
+            else:
+                queryset = queryset.filter(
+                    Q(**{f'{self.field}__{lookup}': cursor['v']})
+                    | Q(**{self.field: cursor['v'], f'pk__{lookup}': cursor['pk']})
+                )
+
+        # un élément de plus pour savoir s'il y a une page suivante, sans count
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+
+        # en avant : il y a une suite si on a lu un élément de plus, un précédent si on est parti d'un curseur
+        # en arrière : c'est l'inverse
+        has_next = has_more if not self.reverse else cursor is not None
+        has_previous = cursor is not None if not self.reverse else has_more
+        self.next_position = self.position(results[-1]) if results and has_next else None
+        self.previous_position = self.position(results[0]) if results and has_previous else None
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_link(self.next_position, reverse=False),
+            'previous': self.get_link(self.previous_position, reverse=True),
+            'results': data,
+        })
+
+    # champ de tri du queryset (celui de OrderingFilter / de la vue), limité aux champs non nuls du modèle
+    def get_ordering(self, queryset):
+        ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering) or ['pk']
+        name = ordering[0]
+        if not isinstance(name, str):
+            raise ValidationError({'ordering': 'Tri non supporté avec la pagination par curseur'})
+        descending = name.startswith('-')
+        name = name.lstrip('-')
+
+        opts = queryset.model._meta
+        if name in ('pk', opts.pk.name):
+            return 'pk', descending
+        try:
+            field = opts.get_field(name)
+        except FieldDoesNotExist:
+            field = None
+        # un champ nullable casserait la comparaison (NULL n'est ni avant ni après)
+        if field is None or not field.concrete or field.null or field.is_relation:
+            raise ValidationError({'ordering': f'Tri "{name}" non supporté avec la pagination par curseur'})
+        return name, descending
+
+    def position(self, obj):
+        value = getattr(obj, self.field) if self.field != 'pk' else obj.pk
+        # dates et décimaux en texte, relus par le champ lors du filtre
+        if not isinstance(value, (int, float, str)):
+            value = value.isoformat() if hasattr(value, 'isoformat') else str(value)
+        return {'v': value, 'pk': obj.pk}
+
+    def get_link(self, position, reverse):
+        if position is None:
+            return None
+        payload = {
+            'o': f"{'-' if self.descending else ''}{self.field}",
+            'v': position['v'],
+            'pk': position['pk'],
+            'r': reverse,
+        }
+        cursor = base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+        url = remove_query_param(self.base_url, 'page')
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            expected = f"{'-' if self.descending else ''}{self.field}"
+            # un curseur n'est valable que pour le tri qui l'a produit
+            if cursor['o'] != expected or 'v' not in cursor or 'pk' not in cursor:
+                raise ValueError
+            cursor['r'] = bool(cursor.get('r'))
+            # valeurs relues par le champ : une valeur d'un autre type ferait échouer la requête
+            cursor['pk'] = model._meta.pk.to_python(cursor['pk'])
+            if self.field != 'pk':
+                cursor['v'] = model._meta.get_field(self.field).to_python(cursor['v'])
+            if cursor['pk'] is None or (self.field != 'pk' and cursor['v'] is None):
+                raise ValueError
+            return cursor
+        except (TypeError, ValueError, KeyError, DjangoValidationError):
+            raise NotFound('Curseur invalide')
+
+
+# Pagination par défaut de l'API : par numéro de page (ce qu'utilise le front)
+# ou par curseur si le client le demande avec ?pagination=cursor (ou en suivant un lien ?cursor=...)
+class PageOrCursorPagination(PageNumberPagination):
+    pagination_query_param = 'pagination'
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.pagination_query_param) == 'cursor'
+            or KeysetPagination.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            page_size = self.get_page_size(request)
+            if not page_size:
+                return None
+            self.keyset = KeysetPagination(page_size)
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.keyset = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                'name': self.pagination_query_param,
+                'required': False,
+                'in': 'query',
+                'description': '"cursor" pour paginer par curseur (sans count, réponse next/previous/results)',
+                'schema': {'type': 'string', 'enum': ['cursor']},
+            },
+            {
+                'name': KeysetPagination.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Curseur renvoyé dans next/previous',
+                'schema': {'type': 'string'},
+            },
+        ]
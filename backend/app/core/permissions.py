@@ -0,0 +1,12 @@
+from rest_framework.permissions import BasePermission
+
+
+# Réservé aux utilisateurs avec le rôle admin
+# le rôle est chargé avec l'utilisateur (voir core/backends.py) : pas de requête en plus
+# refus : 403 {"error": "Permission refusée"}, la réponse des anciennes vérifications dans les vues
+class IsAdminRole(BasePermission):
+    message = {'error': 'Permission refusée'}
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(user and user.is_authenticated and user.is_admin)
@@ -0,0 +1,325 @@
+import io
+import numpy as np
+from scipy import sparse
+from django.db.models import Max
+from django.utils import timezone
+from .cache import bump_generation, schedule_bump
+from .models import Rating, Favorite, Watchlist, SimilarMovies, RecommenderModel, UserRecommendations
+
+#
+# Recommandations construites hors ligne à partir des interactions (notes, favoris, watchlist)
+# matrice creuse utilisateurs x films (scipy.sparse), calculée par la commande build_similar_movies
+# ou par la tâche planifiée (core/tasks.py) : les vues ne lisent que les index pré-calculés
+#
+
+# poids d'une interaction dans la matrice : une note est centrée sur le milieu de l'échelle
+# (un 2/10 éloigne les films, un 9/10 les rapproche), favori et watchlist sont des signaux positifs
+RATING_MIDPOINT = 5
+RATING_SCALE = 5
+FAVORITE_WEIGHT = 1.0
+WATCHLIST_WEIGHT = 0.5
+
+# rétrécissement : une similarité calculée sur n utilisateurs communs est multipliée par n / (n + SHRINKAGE)
+# (deux films vus par un seul utilisateur en commun ne sont pas "identiques")
+SHRINKAGE = 10
+# films traités par produit matriciel (borne la mémoire : BATCH_SIZE x nombre de films)
+BATCH_SIZE = 500
+
+
+# Matrice des interactions : (matrice csr utilisateurs x films, ids des utilisateurs, ids des films)
+# les interactions d'un même couple utilisateur / film s'additionnent
+def interaction_matrix():
+    users, movies, weights = [], [], []
+    for user_id, movie_id, rating in Rating.objects.values_list('user_id', 'movie_id', 'rating').iterator(chunk_size=10000):
+        users.append(user_id)
+        movies.append(movie_id)
+        weights.append((rating - RATING_MIDPOINT) / RATING_SCALE)
+    for model, weight in ((Favorite, FAVORITE_WEIGHT), (Watchlist, WATCHLIST_WEIGHT)):
+        for user_id, movie_id in model.objects.values_list('user_id', 'movie_id').iterator(chunk_size=10000):
+            users.append(user_id)
+            movies.append(movie_id)
+            weights.append(weight)
+
+    user_ids, user_index = np.unique(np.array(users, dtype=np.int64), return_inverse=True)
+    movie_ids, movie_index = np.unique(np.array(movies, dtype=np.int64), return_inverse=True)
+    matrix = sparse.coo_matrix(
+        (np.array(weights, dtype=np.float32), (user_index, movie_index)),
+        shape=(len(user_ids), len(movie_ids))
+    ).tocsr()  # les doublons sont additionnés ici
+    # une note neutre (5/10) reste dans la matrice avec un poids nul : le film compte comme vu
+    return matrix, user_ids, movie_ids
+
+
+# k plus proches voisins (similarité cosinus rétrécie) des films donnés, None : tous les films
+# renvoie {id_film: ([ids des voisins], [scores])}, seuls les voisins de similarité positive sont gardés
+def similar_movies(matrix, movie_ids, only_ids=None, top_k=SimilarMovies.TOP_K):
+    # colonnes normalisées : le produit de deux colonnes est leur cosinus
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0))).ravel()
+    norms[norms == 0] = 1
+    normalized = (matrix @ sparse.diags(1 / norms)).tocsc()
+    normalized_t = normalized.T.tocsr()
+    # nombre d'utilisateurs en commun entre deux films
+    seen = (matrix != 0).astype(np.float32).tocsc()
+    seen_t = seen.T.tocsr()
+
+    if only_ids is None:
+        rows = np.arange(len(movie_ids))
+    else:
+        rows = np.flatnonzero(np.isin(movie_ids, np.array(list(only_ids), dtype=np.int64)))
+
+    result = {}
+    for start in range(0, len(rows), BATCH_SIZE):
+        batch = rows[start:start + BATCH_SIZE]
+        similarity = (normalized_t[batch] @ normalized).tocsr()
+        common = (seen_t[batch] @ seen).tocsr()
+        common.data = common.data / (common.data + SHRINKAGE)
+        similarity = similarity.multiply(common).tocsr()
+
+        for offset, row in enumerate(batch):
+            begin, end = similarity.indptr[offset], similarity.indptr[offset + 1]
+            columns = similarity.indices[begin:end]
+            values = similarity.data[begin:end]
+            keep = (columns != row) & (values > 0)
+            columns, values = columns[keep], values[keep]
+            if len(values) > top_k:
+                best = np.argpartition(-values, top_k)[:top_k]
+                columns, values = columns[best], values[best]
+            order = np.argsort(-values, kind='stable')
+            result[int(movie_ids[row])] = (
+                [int(movie_id) for movie_id in movie_ids[columns[order]]],
+                [round(float(score), 4) for score in values[order]],
+            )
+    return result
+
+
+# Films dont les interactions ont changé depuis la dernière construction de l'index (mode incrémental)
+# les suppressions ne sont pas vues : la reconstruction complète planifiée les rattrape
+def changed_movie_ids():
+    last_build = SimilarMovies.objects.aggregate(last=Max('updated_at'))['last']
+    if last_build is None:
+        return None
+    changed = set()
+    for model in (Rating, Favorite, Watchlist):
+        changed.update(model.objects.filter(created_at__gt=last_build).values_list('movie_id', flat=True))
+    return changed
+
+
+# (Re)construit l'index des films similaires : tous les films, ou seulement movie_ids
+# la matrice est toujours complète (les voisins dépendent de tout le monde), seules les lignes demandées
+# sont recalculées et écrites ; renvoie le nombre de films mis à jour
+def build_similar_movies(movie_ids=None, top_k=SimilarMovies.TOP_K):
+    if movie_ids is not None and not movie_ids:
+        return 0
+    matrix, _, all_movie_ids = interaction_matrix()
+    neighbors = similar_movies(matrix, all_movie_ids, only_ids=movie_ids, top_k=top_k)
+
+    # un film demandé sans aucune interaction n'a plus de voisins
+    targets = set(neighbors) | (set(movie_ids) if movie_ids is not None else set())
+    rows = [
+        SimilarMovies(movie_id=movie_id, neighbors=neighbors.get(movie_id, ([], []))[0],
+                      scores=neighbors.get(movie_id, ([], []))[1])
+        for movie_id in targets
+    ]
+    SimilarMovies.objects.bulk_create(
+        rows, batch_size=1000, update_conflicts=True,
+        unique_fields=['movie'], update_fields=['neighbors', 'scores', 'updated_at']
+    )
+    if movie_ids is None:
+        # reconstruction complète : les films qui n'ont plus aucune interaction disparaissent de l'index
+        SimilarMovies.objects.exclude(movie_id__in=list(targets)).delete()
+    bump_generation('similar')
+    return len(rows)
+
+
+#
+# Recommandations "pour vous" : factorisation ALS pour retours implicites (Hu, Koren, Volinsky 2008)
+# préférence p = 1 si le poids de l'interaction est positif (bonne note, favori, watchlist), 0 sinon,
+# confiance c = 1 + ALS_ALPHA * |poids| : une mauvaise note est un "n'aime pas" sûr, un film jamais vu un 0 peu sûr
+#
+
+ALS_FACTORS = 32
+ALS_REGULARIZATION = 0.1
+ALS_ALPHA = 10.0
+ALS_ITERATIONS = 10
+# interactions traitées par système résolu en bloc (borne la mémoire : ALS_BATCH_NNZ x facteurs² floats)
+ALS_BATCH_NNZ = 16384
+# utilisateurs notés par produit matriciel (borne la mémoire : SCORE_BATCH x nombre de films)
+SCORE_BATCH = 256
+
+
+# Une demi-étape ALS : les facteurs de chaque ligne de `confidence` (csr : ALS_ALPHA * |poids|)
+# à facteurs `fixed` fixés, x = (YtY + Yt(C - I)Y + λI)^-1 Yt C p, toutes les lignes d'un bloc résolues ensemble
+def als_solve(confidence, preference, fixed, regularization):
+    nb_rows, nb_factors = confidence.shape[0], fixed.shape[1]
+    gram = fixed.T @ fixed + regularization * np.eye(nb_factors, dtype=np.float32)
+    result = np.zeros((nb_rows, nb_factors), dtype=np.float32)
+    indptr = confidence.indptr
+
+    start = 0
+    while start < nb_rows:
+        end = int(np.searchsorted(indptr, indptr[start] + ALS_BATCH_NNZ, side='right')) - 1
+        end = min(max(end, start + 1), nb_rows)
+        block = confidence[start:end]
+        if block.nnz:
+            # produits extérieurs y yt des seules colonnes du bloc, puis Yt(C - I)Y de chaque ligne
+            # en un produit creux x dense (au lieu d'une boucle par ligne)
+            columns, local = np.unique(block.indices, return_inverse=True)
+            y = fixed[columns]
+            outer = (y[:, :, None] * y[:, None, :]).reshape(len(columns), -1)
+            weights = sparse.csr_matrix((block.data, local, block.indptr), shape=(end - start, len(columns)))
+            targets = sparse.csr_matrix(
+                ((1 + block.data) * preference[start:end].data, local, block.indptr),
+                shape=(end - start, len(columns))
+            )
+            a = (weights @ outer).reshape(-1, nb_factors, nb_factors)
+            b = targets @ y
+            result[start:end] = np.linalg.solve(gram + a, b[:, :, None])[:, :, 0]
+        start = end
+    return result
+
+
+def confidence_preference(matrix, alpha):
+    confidence = matrix.copy()
+    confidence.data = (alpha * np.abs(matrix.data)).astype(np.float32)
+    preference = matrix.copy()
+    preference.data = (matrix.data > 0).astype(np.float32)
+    return confidence, preference
+
+
+# Entraîne le modèle : renvoie (facteurs utilisateurs, facteurs films)
+def train_als(matrix, factors=ALS_FACTORS, regularization=ALS_REGULARIZATION, alpha=ALS_ALPHA,
+              iterations=ALS_ITERATIONS, seed=0):
+    confidence, preference = confidence_preference(matrix, alpha)
+    confidence_t, preference_t = confidence.T.tocsr(), preference.T.tocsr()
+    rng = np.random.default_rng(seed)
+    user_factors = (rng.standard_normal((matrix.shape[0], factors)) * 0.01).astype(np.float32)
+    item_factors = (rng.standard_normal((matrix.shape[1], factors)) * 0.01).astype(np.float32)
+    for _ in range(iterations):
+        user_factors = als_solve(confidence, preference, item_factors, regularization)
+        item_factors = als_solve(confidence_t, preference_t, user_factors, regularization)
+    return user_factors, item_factors
+
+
+# top-n des films par utilisateur, sans ceux avec lesquels il a déjà interagi (lignes de `seen`)
+# renvoie une liste de (indices des films, scores) dans l'ordre des lignes
+def top_n(user_factors, item_factors, seen, n):
+    result = []
+    n = min(n, item_factors.shape[0])
+    for start in range(0, user_factors.shape[0], SCORE_BATCH):
+        scores = user_factors[start:start + SCORE_BATCH] @ item_factors.T
+        block = seen[start:start + SCORE_BATCH]
+        rows = np.repeat(np.arange(block.shape[0]), np.diff(block.indptr))
+        scores[rows, block.indices] = -np.inf
+        best = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+        for row, columns in enumerate(best):
+            values = scores[row, columns]
+            order = np.argsort(-values, kind='stable')
+            columns, values = columns[order], values[order]
+            keep = np.isfinite(values)
+            result.append((columns[keep], values[keep]))
+    return result
+
+
+def to_bytes(array):
+    buffer = io.BytesIO()
+    np.save(buffer, array, allow_pickle=False)
+    return buffer.getvalue()
+
+
+def from_bytes(data):
+    return np.load(io.BytesIO(bytes(data)), allow_pickle=False)
+
+
+# Entraîne le modèle sur toutes les interactions et recalcule les recommandations de tous les utilisateurs
+# renvoie le nombre d'utilisateurs mis à jour
+def build_recommendations(factors=ALS_FACTORS, regularization=ALS_REGULARIZATION, alpha=ALS_ALPHA,
+                          iterations=ALS_ITERATIONS, top=UserRecommendations.TOP_N):
+    started = timezone.now()
+    matrix, user_ids, movie_ids = interaction_matrix()
+    if not matrix.nnz:
+        remove_stale_recommendations(started)
+        bump_generation('reco')
+        return 0
+    user_factors, item_factors = train_als(matrix, factors, regularization, alpha, iterations)
+
+    model = RecommenderModel.objects.create(
+        factors=factors, regularization=regularization, alpha=alpha,
+        movie_ids=to_bytes(movie_ids), item_factors=to_bytes(item_factors)
+    )
+    RecommenderModel.objects.exclude(pk=model.pk).delete()
+
+    rows = [
+        UserRecommendations(
+            user_id=int(user_id),
+            movies=[int(movie_id) for movie_id in movie_ids[columns]],
+            scores=[round(float(score), 4) for score in values],
+        )
+        for user_id, (columns, values) in zip(user_ids, top_n(user_factors, item_factors, matrix, top))
+    ]
+    UserRecommendations.objects.bulk_create(
+        rows, batch_size=1000, update_conflicts=True,
+        unique_fields=['user'], update_fields=['movies', 'scores', 'updated_at']
+    )
+    remove_stale_recommendations(started)
+    # une seule génération pour tous les utilisateurs (voir RecommendationsView)
+    bump_generation('reco')
+    return len(rows)
+
+
+# listes ni réécrites par cet entraînement ni recalculées pendant : utilisateurs sans plus aucune interaction
+# (la vue leur sert les films populaires)
+def remove_stale_recommendations(started):
+    UserRecommendations.objects.filter(updated_at__lt=started).delete()
+
+
+# dernier modèle, gardé en mémoire dans le worker tant qu'il n'est pas remplacé
+_loaded_model = {}
+
+
+def latest_model():
+    model_id = RecommenderModel.objects.order_by('-pk').values_list('pk', flat=True).first()
+    if model_id is None:
+        return None
+    if _loaded_model.get('id') != model_id:
+        model = RecommenderModel.objects.get(pk=model_id)
+        _loaded_model.clear()
+        _loaded_model.update(
+            id=model_id, regularization=model.regularization, alpha=model.alpha,
+            movie_ids=from_bytes(model.movie_ids), item_factors=from_bytes(model.item_factors),
+        )
+    return _loaded_model
+
+
+# Recalcule les recommandations d'un utilisateur après une interaction, sans ré-entraîner :
+# ses facteurs sont résolus à facteurs des films fixés (une demi-étape ALS sur une seule ligne)
+def refresh_user_recommendations(user_id, top=UserRecommendations.TOP_N):
+    model = latest_model()
+    if model is None:
+        return False
+    movie_ids = model['movie_ids']
+    weights = {}
+    for movie_id, rating in Rating.objects.filter(user_id=user_id).values_list('movie_id', 'rating'):
+        weights[movie_id] = weights.get(movie_id, 0) + (rating - RATING_MIDPOINT) / RATING_SCALE
+    for model_class, weight in ((Favorite, FAVORITE_WEIGHT), (Watchlist, WATCHLIST_WEIGHT)):
+        for movie_id in model_class.objects.filter(user_id=user_id).values_list('movie_id', flat=True):
+            weights[movie_id] = weights.get(movie_id, 0) + weight
+
+    # les films ajoutés depuis l'entraînement n'ont pas de facteurs : ignorés jusqu'au prochain
+    known = {int(movie_id): index for index, movie_id in enumerate(movie_ids)}
+    weights = {known[movie_id]: weight for movie_id, weight in weights.items() if movie_id in known}
+    if not weights:
+        # rien de connu du modèle : la vue sert les films populaires
+        UserRecommendations.objects.filter(user_id=user_id).delete()
+    else:
+        columns = np.array(list(weights), dtype=np.int64)
+        values = np.array(list(weights.values()), dtype=np.float32)
+        row = sparse.csr_matrix((values, columns, [0, len(columns)]), shape=(1, len(movie_ids)))
+        confidence, preference = confidence_preference(row, model['alpha'])
+        user_factors = als_solve(confidence, preference, model['item_factors'], model['regularization'])
+        (best, scores), = top_n(user_factors, model['item_factors'], row, top)
+        UserRecommendations.objects.update_or_create(user_id=user_id, defaults={
+            'movies': [int(movie_id) for movie_id in movie_ids[best]],
+            'scores': [round(float(score), 4) for score in scores],
+        })
+    schedule_bump(f'reco:{user_id}')
+    return True
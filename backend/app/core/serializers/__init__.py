@@ -1,15 +1,15 @@
 from .user import UserSerializer, UserCreateSerializer, RoleSerializer
-from .movie import (MovieSerializer, MovieListSerializer, GenreSerializer, 
+from .movie import (MovieSerializer, MovieListSerializer, TrendingMovieSerializer, GenreSerializer, 
                     DirectorSerializer, ActorSerializer, ImageSerializer)
-from .rating import RatingSerializer, RatingCreateSerializer
-from .favorite import FavoriteSerializer, FavoriteCreateSerializer
-from .watchlist import WatchlistSerializer, WatchlistCreateSerializer
+from .rating import RatingSerializer, RatingCreateSerializer, UserRatingSerializer
+from .favorite import FavoriteSerializer, FavoriteListSerializer, FavoriteCreateSerializer
+from .watchlist import WatchlistSerializer, WatchlistListSerializer, WatchlistCreateSerializer
 
 __all__ = [
     'UserSerializer', 'UserCreateSerializer', 'RoleSerializer',
-    'MovieSerializer', 'MovieListSerializer', 'GenreSerializer',
+    'MovieSerializer', 'MovieListSerializer', 'TrendingMovieSerializer', 'GenreSerializer',
     'DirectorSerializer', 'ActorSerializer', 'ImageSerializer',
-    'RatingSerializer', 'RatingCreateSerializer',
-    'FavoriteSerializer', 'FavoriteCreateSerializer',
-    'WatchlistSerializer', 'WatchlistCreateSerializer',
+    'RatingSerializer', 'RatingCreateSerializer', 'UserRatingSerializer',
+    'FavoriteSerializer', 'FavoriteListSerializer', 'FavoriteCreateSerializer',
+    'WatchlistSerializer', 'WatchlistListSerializer', 'WatchlistCreateSerializer',
 ]
\ No newline at end of file
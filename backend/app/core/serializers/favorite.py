@@ -13,6 +13,15 @@ class FavoriteSerializer(serializers.ModelSerializer):
         model = Favorite
         fields = ['id', 'user', 'movie', 'created_at']
 
+# serializer pour la liste des favoris de l'utilisateur connecté
+# (pas de user : c'est toujours celui qui fait la requête)
+class FavoriteListSerializer(serializers.ModelSerializer):
+    movie = MovieListSerializer(read_only=True)
+    
+    class Meta:
+        model = Favorite
+        fields = ['id', 'movie', 'created_at']
+
 # serializer pour la création de favoris
 class FavoriteCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from ..models import Movie, Genre, Director, Actor, Image
+from ..images import variant_urls
 
 
 ##
@@ -34,6 +35,18 @@ class ImageSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'url', 'is_main', 'created_at'] 
 
 
+# image principale des listes : en plus de l'original, les versions redimensionnées (webp/jpeg)
+# variants est vide tant que le worker ne les a pas générées, le front se rabat alors sur url
+class MainImageSerializer(ImageSerializer):
+    variants = serializers.SerializerMethodField()
+
+    def get_variants(self, obj):
+        return variant_urls(obj)
+
+    class Meta(ImageSerializer.Meta):
+        fields = ImageSerializer.Meta.fields + ['variants']
+
+
 # serializer pour les films (page Film avec les détails dans mon front)
 class MovieSerializer(serializers.ModelSerializer):
     # on ajoute les relations
@@ -57,9 +70,13 @@ class MovieListSerializer(serializers.ModelSerializer):
 
     # methode pour recup l'image principale
     def get_main_image(self, obj):
-        main_image = obj.images.filter(is_main=True).first()
+        # si la vue a préchargé l'image principale (main_image_prefetch) on évite une requête par film
+        if hasattr(obj, 'main_images'):
+            main_image = obj.main_images[0] if obj.main_images else None
+        else:
+            main_image = obj.images.filter(is_main=True).first()
         if main_image:
-            return ImageSerializer(main_image).data
+            return MainImageSerializer(main_image).data
         return None
     
     main_image = serializers.SerializerMethodField() # on utilise la methode get_main_image defini au dessus
@@ -69,4 +86,12 @@ class MovieListSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Movie
-        fields = ['id_film', 'title', 'release_date', 'main_image', 'average_rating']
\ No newline at end of file
+        fields = ['id_film', 'title', 'release_date', 'main_image', 'average_rating']
+
+
+# film du classement des tendances : score ramené à maintenant (calculé par la vue)
+class TrendingMovieSerializer(MovieListSerializer):
+    trending_score = serializers.FloatField(read_only=True)
+
+    class Meta(MovieListSerializer.Meta):
+        fields = MovieListSerializer.Meta.fields + ['trending_score']
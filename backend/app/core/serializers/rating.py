@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from ..models import Rating
 from django.core.validators import MinValueValidator, MaxValueValidator
+from .movie import MovieListSerializer
 
 
 # serializer pour les notes
@@ -12,6 +13,15 @@ class RatingSerializer(serializers.ModelSerializer):
         model = Rating
         fields = ['id', 'user', 'movie', 'rating', 'created_at']
 
+# serializer pour la liste des notes de l'utilisateur connecté
+# (pas de user : c'est toujours celui qui fait la requête)
+class UserRatingSerializer(serializers.ModelSerializer):
+    movie = MovieListSerializer(read_only=True)
+    
+    class Meta:
+        model = Rating
+        fields = ['id', 'movie', 'rating', 'created_at']
+
 
 # serializer pour la création d'une note
 class RatingCreateSerializer(serializers.ModelSerializer):
@@ -12,6 +12,15 @@ class WatchlistSerializer(serializers.ModelSerializer):
         model = Watchlist
         fields = ['id', 'user', 'movie', 'created_at']
 
+# serializer pour la watchlist de l'utilisateur connecté
+# (pas de user : c'est toujours celui qui fait la requête)
+class WatchlistListSerializer(serializers.ModelSerializer):
+    movie = MovieListSerializer(read_only=True)
+    
+    class Meta:
+        model = Watchlist
+        fields = ['id', 'movie', 'created_at']
+
 
 class WatchlistCreateSerializer(serializers.ModelSerializer):
     class Meta:
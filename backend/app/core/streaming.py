@@ -0,0 +1,40 @@
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+
+#
+# Export en flux (NDJSON : un objet json par ligne)
+# le queryset est lu par morceaux avec iterator(chunk_size) (curseur serveur sur postgres),
+# les prefetch_related sont faits morceau par morceau : la mémoire du worker ne dépend pas de la taille de la table
+#
+
+EXPORT_CHUNK_SIZE = 500
+
+
+def ndjson_lines(queryset, serializer_class, context=None, chunk_size=EXPORT_CHUNK_SIZE):
+    batch = []
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        batch.append(obj)
+        if len(batch) >= chunk_size:
+            yield render_batch(batch, serializer_class, context)
+            batch = []
+    if batch:
+        yield render_batch(batch, serializer_class, context)
+
+
+# un serializer many=True par lot : les champs ne sont construits qu'une fois par lot, pas par objet
+# un morceau du flux par lot (pas une écriture réseau par ligne)
+def render_batch(batch, serializer_class, context):
+    renderer = JSONRenderer()
+    data = serializer_class(batch, many=True, context=context or {}).data
+    return b''.join(renderer.render(item) + b'\n' for item in data)
+
+
+def ndjson_response(queryset, serializer_class, filename, context=None):
+    response = StreamingHttpResponse(
+        ndjson_lines(queryset, serializer_class, context),
+        content_type='application/x-ndjson'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    # pas de mise en tampon par un proxy (nginx) : le client reçoit les lignes au fur et à mesure
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,63 @@
+from celery import shared_task
+from .cache import bump_generation
+from .images import build_variants
+from .models import Image, Movie, OutboundEmail, TrendingScore
+
+
+# versions redimensionnées d'une affiche (déclenchée après l'upload, voir core/images.py)
+@shared_task
+def generate_image_variants(image_id):
+    image = Image.objects.filter(pk=image_id).first()
+    if image is None or not image.url:
+        return
+    variants = build_variants(image)
+    # update() : pas de post_save, donc pas de nouvelle génération en boucle
+    Image.objects.filter(pk=image_id).update(variants=variants)
+    # les listes en cache contiennent l'ancienne image principale
+    bump_generation('image')
+
+
+# envoie les mails en attente de la boîte d'envoi, une connexion SMTP par lot
+# lancée après chaque mail ajouté, et chaque minute par celery beat pour les nouveaux essais (CELERY_BEAT_SCHEDULE) :
+# une seule planification quel que soit le nombre de mails, même quand le SMTP est en panne
+# (en mode eager, sans broker ni beat, rien n'est envoyé dans la requête : c'est la commande send_outbox)
+@shared_task
+def deliver_outbox():
+    while OutboundEmail.deliver_due():
+        pass
+
+
+# index des films similaires (planifié dans CELERY_BEAT_SCHEDULE) :
+# incrémental = seulement les films qui ont de nouvelles interactions depuis la dernière construction
+@shared_task
+def rebuild_similar_movies(incremental=False):
+    from .recommendations import build_similar_movies, changed_movie_ids  # numpy / scipy : seulement dans le worker
+    movie_ids = changed_movie_ids() if incremental else None
+    return build_similar_movies(movie_ids)
+
+
+# recommandations "pour vous" : tout le modèle la nuit (CELERY_BEAT_SCHEDULE), un utilisateur après son activité
+@shared_task
+def train_recommendations():
+    from .recommendations import build_recommendations
+    return build_recommendations()
+
+
+@shared_task
+def refresh_user_recommendations(user_id):
+    from .recommendations import refresh_user_recommendations as refresh
+    return refresh(user_id)
+
+
+# classement des tendances recalculé depuis les événements récents (les scores sont maintenus au fil de l'eau)
+@shared_task
+def rebuild_trending():
+    return TrendingScore.rebuild()
+
+
+# note bayésienne de tous les films avec la moyenne globale du moment (un UPDATE, sans signaux)
+@shared_task
+def refresh_bayesian_ratings():
+    count = Movie.refresh_bayesian_ratings()
+    bump_generation('movie')
+    return count
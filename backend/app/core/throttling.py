@@ -0,0 +1,128 @@
+import threading
+from django.core.cache import cache
+from django.core.cache.backends.redis import RedisCacheClient
+from rest_framework.throttling import SimpleRateThrottle
+
+#
+# Limitation des écritures coûteuses (connexion, inscription, notes) par seau à jetons
+# taux "N/période" (REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']) : le seau contient au plus N jetons,
+# chaque requête en consomme un et il se remplit de N jetons par période (rafale de N, puis débit régulier)
+# l'état (jetons, date) est dans le cache partagé (redis) : la limite vaut pour tous les workers
+# lecture + écriture atomiques : script lua sur redis, verrou du process avec le cache local (locmem)
+#
+
+STATS_PREFIX = 'throttle:stats'
+
+# même calcul que TokenBucketThrottle.consume, exécuté d'un bloc par redis ; les nombres sont renvoyés
+# en texte (redis tronque les nombres lua en entiers)
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local duration = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * capacity / duration)
+if tokens < 1 then
+    return {0, tostring(tokens)}
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens - 1), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(duration))
+return {1, tostring(tokens - 1)}
+"""
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    cache = cache
+    lock = threading.Lock()
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        allowed, self.tokens = self.consume(self.timer())
+        if not allowed:
+            record_throttled(self.scope)
+        return allowed
+
+    # prend un jeton s'il en reste : (accepté, jetons restants)
+    def consume(self, now):
+        client = self.cache._cache
+        if isinstance(client, RedisCacheClient):
+            key = self.cache.make_and_validate_key(self.key)
+            script = client.get_client(key, write=True).register_script(TOKEN_BUCKET_SCRIPT)
+            allowed, tokens = script(keys=[key], args=[self.num_requests, self.duration, now])
+            return bool(allowed), float(tokens)
+
+        # cache local au process (sans REDIS_URL) : un verrou suffit
+        with self.lock:
+            tokens, updated = self.cache.get(self.key, (self.num_requests, now))
+            tokens = min(self.num_requests, tokens + max(0, now - updated) * self.num_requests / self.duration)
+            if tokens < 1:
+                return False, tokens
+            # le seau est plein au bout d'une période : inutile de garder la clé plus longtemps
+            self.cache.set(self.key, (tokens - 1, now), self.duration)
+            return True, tokens - 1
+
+    # secondes avant le prochain jeton (header Retry-After du 429)
+    def wait(self):
+        return (1 - self.tokens) * self.duration / self.num_requests
+
+
+# par adresse IP (X-Forwarded-For selon NUM_PROXIES, comme les throttles DRF)
+class IPThrottle(TokenBucketThrottle):
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+# par utilisateur connecté, sinon par IP
+class UserThrottle(TokenBucketThrottle):
+    def get_cache_key(self, request, view):
+        ident = request.user.pk if request.user.is_authenticated else self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+# Connexion : par IP, et par compte visé depuis une même IP (essais sur un compte précis)
+# la clé du compte contient l'IP : des essais faits exprès depuis une autre IP ne bloquent pas son propriétaire
+# vérifiés avant authenticate() : un rejet ne coûte ni hash du mot de passe ni requête SQL
+class LoginIPThrottle(IPThrottle):
+    scope = 'login_ip'
+
+
+class LoginEmailThrottle(TokenBucketThrottle):
+    scope = 'login_email'
+
+    def get_cache_key(self, request, view):
+        # corps JSON qui n'est pas un objet (liste...) : la vue le refuse, pas de clé
+        email = request.data.get('email') if isinstance(request.data, dict) else None
+        if not isinstance(email, str) or not email:
+            return None
+        ident = f'{self.get_ident(request)}:{email.strip().casefold()}'
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class RegisterIPThrottle(IPThrottle):
+    scope = 'register_ip'
+
+
+class RatingUserThrottle(UserThrottle):
+    scope = 'rating_user'
+
+
+def record_throttled(scope):
+    key = f'{STATS_PREFIX}:{scope}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+# nombre de requêtes rejetées (429) par scope depuis le démarrage du cache
+def get_throttle_stats():
+    scopes = list(TokenBucketThrottle.THROTTLE_RATES)
+    values = cache.get_many([f'{STATS_PREFIX}:{scope}' for scope in scopes])
+    return {scope: values.get(f'{STATS_PREFIX}:{scope}', 0) for scope in scopes}
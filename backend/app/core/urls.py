@@ -1,7 +1,13 @@
+from django.conf import settings
 from django.urls import path
-from .views.user import RegisterView, login_view, logout_view, profile_view, users_list_view, change_password_view, get_csrf_token_view
+from .views.user import (
+    RegisterView, login_view, logout_view, token_login_view, token_refresh_view, token_logout_view,
+    profile_view, users_list_view, users_export_view, change_password_view, get_csrf_token_view,
+    throttle_stats_view
+)
 from .views.movie import (
-    MovieListView, MovieDetailView, MovieCreateView, MovieUpdateView, MovieDeleteView, admin_movies_view,
+    MovieListView, MovieFacetsView, MovieDetailView, SimilarMoviesView, TrendingMoviesView, MovieCreateView, MovieUpdateView, MovieDeleteView, admin_movies_view,
+    admin_movies_export_view, catalog_cache_stats_view, autocomplete_view,
     GenreListView, DirectorListView, ActorListView,
     DirectorCreateView, DirectorUpdateView, DirectorDeleteView,
     ActorCreateView, ActorUpdateView, ActorDeleteView
@@ -13,6 +19,25 @@ from .views.rating import (
     get_movie_ratings_view, UserRatingsListView
 )
 from .views.contact import send_contact_email, get_contact_info
+from .views.movie_state import movie_states_view
+from .views.recommendation import RecommendationsView
+from .views.async_read import (
+    movie_list_async, movie_detail_async, genre_list_async, check_favorite_async, check_watchlist_async
+)
+
+# mode ASGI : les lectures les plus appelées passent par les vues async (même urls, mêmes réponses)
+if settings.ASYNC_READ_VIEWS:
+    movie_list = movie_list_async
+    movie_detail = movie_detail_async
+    genre_list = genre_list_async
+    check_favorite = check_favorite_async
+    check_watchlist = check_watchlist_async
+else:
+    movie_list = MovieListView.as_view()
+    movie_detail = MovieDetailView.as_view()
+    genre_list = GenreListView.as_view()
+    check_favorite = check_favorite_view
+    check_watchlist = check_watchlist_view
 
 urlpatterns = [
     # URL CSRF
@@ -22,16 +47,25 @@ urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', login_view, name='login'),
     path('logout/', logout_view, name='logout'),
+    path('token/', token_login_view, name='token-login'),  # mode JWT sans état
+    path('token/refresh/', token_refresh_view, name='token-refresh'),  # rotation du refresh
+    path('token/logout/', token_logout_view, name='token-logout'),
     path('profile/', profile_view, name='profile'),
     path('change-password/', change_password_view, name='change-password'),
     path('users/', users_list_view, name='users-list'),  # (admin only)
+    path('users/export/', users_export_view, name='users-export'),  # NDJSON en flux (admin only)
     
     # URL Movies
-    path('movies/', MovieListView.as_view(), name='movies-list'),
-    path('movies/<int:id_film>/', MovieDetailView.as_view(), name='movie-detail'),
+    path('movies/', movie_list, name='movies-list'),
+    path('movies/<int:id_film>/', movie_detail, name='movie-detail'),
+    path('movies/<int:id_film>/similar/', SimilarMoviesView.as_view(), name='movie-similar'),  # index pré-calculé
+    path('movies/autocomplete/', autocomplete_view, name='movies-autocomplete'),  # index préfixe en mémoire
+    path('movies/facets/', MovieFacetsView.as_view(), name='movies-facets'),  # liste filtrée + comptes par facette
+    path('movies/states/', movie_states_view, name='movie-states'),  # favori/watchlist/note de plusieurs films
+    path('movies/trending/', TrendingMoviesView.as_view(), name='movies-trending'),  # classement pré-calculé
     
     # URL pour les filtres et listes
-    path('genres/', GenreListView.as_view(), name='genres-list'),
+    path('genres/', genre_list, name='genres-list'),
     path('directors/', DirectorListView.as_view(), name='directors-list'),
     path('actors/', ActorListView.as_view(), name='actors-list'),
     
@@ -41,7 +75,7 @@ urlpatterns = [
     path('favorites/remove/', remove_favorite_view, name='remove-favorite'),
     path('favorites/toggle/', toggle_favorite_api_view, name='toggle-favorite-api'),
     path('favorites/<int:movie_id>/', toggle_favorite_view, name='toggle-favorite'),
-    path('favorites/<int:movie_id>/check/', check_favorite_view, name='check-favorite'),
+    path('favorites/<int:movie_id>/check/', check_favorite, name='check-favorite'),
     
     # URL Watchlist
     path('watchlist/', WatchlistListView.as_view(), name='watchlist-list'),
@@ -49,7 +83,10 @@ urlpatterns = [
     path('watchlist/remove/', remove_watchlist_view, name='remove-watchlist'),
     path('watchlist/toggle/', toggle_watchlist_api_view, name='toggle-watchlist-api'),
     path('watchlist/<int:movie_id>/', toggle_watchlist_view, name='toggle-watchlist'),
-    path('watchlist/<int:movie_id>/check/', check_watchlist_view, name='check-watchlist'),
+    path('watchlist/<int:movie_id>/check/', check_watchlist, name='check-watchlist'),
+    
+    # URL Recommandations "pour vous" (listes pré-calculées)
+    path('recommendations/', RecommendationsView.as_view(), name='recommendations'),
     
     # URL Ratings/Notes
     path('ratings/', UserRatingsListView.as_view(), name='user-ratings-list'),
@@ -64,9 +101,12 @@ urlpatterns = [
     
     # URL Admin CRUD - Movies
     path('admin/movies/', admin_movies_view, name='admin-movies'),
+    path('admin/movies/export/', admin_movies_export_view, name='admin-movies-export'),  # NDJSON en flux
     path('admin/movies/create/', MovieCreateView.as_view(), name='movie-create'),
     path('admin/movies/<int:id_film>/update/', MovieUpdateView.as_view(), name='movie-update'),
     path('admin/movies/<int:id_film>/delete/', MovieDeleteView.as_view(), name='movie-delete'),
+    path('admin/cache-stats/', catalog_cache_stats_view, name='catalog-cache-stats'),
+    path('admin/throttle-stats/', throttle_stats_view, name='throttle-stats'),  # requêtes rejetées (429)
     
     # URL Admin CRUD - Directors
     path('admin/directors/create/', DirectorCreateView.as_view(), name='director-create'),
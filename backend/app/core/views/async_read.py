@@ -0,0 +1,155 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.http import http_date
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated, NotFound, ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.request import Request
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from ..authentication import arequest_user, auth_failed_data
+from ..cache import acached_list, conditional_response, json_response
+from ..models import Movie, Genre, Favorite, Watchlist, MovieDocument
+from ..serializers import GenreSerializer
+from .movie import MovieListView, GenreListView, document_validators, absolute_image_urls
+
+#
+# Versions async (ORM async de django) des lectures les plus appelées, pour le mode ASGI
+# mêmes urls, mêmes réponses, même cache et mêmes ETag que les vues DRF (DRF n'a pas de vues async)
+# branchées à la place des vues DRF quand ASYNC_READ_VIEWS est activé (voir urls.py et le README)
+#
+
+
+def not_found():
+    return json_response({'detail': str(NotFound.default_detail)}, status=404)
+
+
+# même message que get_object_or_404 dans les vues DRF
+def movie_not_found():
+    return json_response({'detail': f'No {Movie._meta.object_name} matches the given query.'}, status=404)
+
+
+def invalid_page():
+    return json_response({'detail': str(PageNumberPagination.invalid_page_message)}, status=404)
+
+
+# session ou token -> utilisateur sans bloquer la boucle, 403 comme DRF si anonyme ou token invalide
+async def get_user_or_403(request):
+    try:
+        user = await arequest_user(request)
+    except AuthenticationFailed as e:
+        return None, json_response(auth_failed_data(e), status=403)
+    if not user.is_authenticated:
+        return None, json_response({'detail': str(NotAuthenticated.default_detail)}, status=403)
+    return user, None
+
+
+# pagination par page, même format que PageNumberPagination (count / next / previous / results)
+async def paginate(request, queryset, serializer_class):
+    page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+    try:
+        page = int(request.GET.get('page', 1))
+    except ValueError:
+        return None
+    if page < 1:
+        return None
+
+    count = await queryset.acount()
+    start = (page - 1) * page_size
+    if start and start >= count:
+        return None
+    objects = [obj async for obj in queryset[start:start + page_size]]
+
+    url = request.build_absolute_uri()
+    next_link = replace_query_param(url, 'page', page + 1) if start + page_size < count else None
+    previous_link = None
+    if page > 1:
+        previous_link = remove_query_param(url, 'page') if page == 2 else replace_query_param(url, 'page', page - 1)
+    return {
+        'count': count,
+        'next': next_link,
+        'previous': previous_link,
+        'results': serializer_class(objects, many=True).data,
+    }
+
+
+# Liste des films (page Home) : filtres, tri et recherche de MovieListView
+@require_GET
+async def movie_list_async(request):
+    # pagination par curseur : on laisse la vue DRF (dans un thread)
+    if 'pagination' in request.GET or 'cursor' in request.GET:
+        return await sync_to_async(MovieListView.as_view())(request)
+
+    async def build():
+        # les filtres DRF ne font que construire le queryset (sauf la validation du genre : dans un thread)
+        view = MovieListView(request=Request(request), format_kwarg=None, args=(), kwargs={})
+        try:
+            queryset = await sync_to_async(view.filter_queryset)(view.get_queryset())
+        except ValidationError as e:
+            return json_response(e.detail, status=400)
+        data = await paginate(request, queryset, view.get_serializer_class())
+        if data is None:
+            return invalid_page()
+        return json_response(data)
+
+    return await acached_list(
+        request, MovieListView.__name__, MovieListView.cache_models, build,
+        cache_authenticated=MovieListView.cache_authenticated
+    )
+
+
+# Détail d'un film : document pré-calculé + ETag, comme MovieDetailView.retrieve
+@require_GET
+async def movie_detail_async(request, id_film):
+    versions = await MovieDocument.aget_versions(id_film)
+    etag = last_modified = None
+    if versions is not None:
+        etag, last_modified = document_validators(id_film, versions)
+        not_modified = conditional_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+    data = await MovieDocument.aget_data(id_film)
+    if data is None:
+        return not_found()
+    response = json_response(absolute_image_urls(request, data))
+    if etag is not None:
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+# Liste des genres (filtres du front)
+@require_GET
+async def genre_list_async(request):
+    async def build():
+        data = await paginate(request, Genre.objects.all(), GenreSerializer)
+        if data is None:
+            return invalid_page()
+        return json_response(data)
+
+    return await acached_list(request, GenreListView.__name__, GenreListView.cache_models, build)
+
+
+# Favori / watchlist : un seul EXISTS chacun (le film inexistant répond 404 comme la vue DRF)
+@require_GET
+async def check_favorite_async(request, movie_id):
+    user, forbidden = await get_user_or_403(request)
+    if forbidden:
+        return forbidden
+    if not await Movie.objects.filter(id_film=movie_id).aexists():
+        return movie_not_found()
+    return json_response({
+        'is_favorite': await Favorite.objects.filter(user=user, movie_id=movie_id).aexists()
+    })
+
+
+@require_GET
+async def check_watchlist_async(request, movie_id):
+    user, forbidden = await get_user_or_403(request)
+    if forbidden:
+        return forbidden
+    if not await Movie.objects.filter(id_film=movie_id).aexists():
+        return movie_not_found()
+    return json_response({
+        'is_in_watchlist': await Watchlist.objects.filter(user=user, movie_id=movie_id).aexists()
+    })
@@ -2,9 +2,14 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from django.core.mail import send_mail
 from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
+from ..authentication import full_user
+from ..models import OutboundEmail
+
+# préfixe ajouté au sujet du mail (OutboundEmail.subject : 255 caractères)
+SUBJECT_PREFIX = '[Cinemet Contact] '
+SUBJECT_MAX_LENGTH = OutboundEmail._meta.get_field('subject').max_length - len(SUBJECT_PREFIX)
 
 @csrf_exempt
 @api_view(['POST'])
@@ -13,14 +18,19 @@ def send_contact_email(request):
     #Envoie un email de contact à l'administrateur via Mailpit
     subject = request.data.get('subject')
     message = request.data.get('message')
-    user_email = request.user.email
-    user_name = f"{request.user.first_name} {request.user.last_name}"
+    user = full_user(request.user)
+    user_email = user.email
+    user_name = f"{user.first_name} {user.last_name}"
     
     # validation des données
     if not subject or not message:
         return Response({
             'error': 'Le sujet et le message sont requis'
         }, status=status.HTTP_400_BAD_REQUEST)
+    if len(str(subject)) > SUBJECT_MAX_LENGTH:
+        return Response({
+            'error': f'Le sujet ne doit pas dépasser {SUBJECT_MAX_LENGTH} caractères'
+        }, status=status.HTTP_400_BAD_REQUEST)
     
     # message complet
     full_message = f"""
@@ -36,24 +46,17 @@ Message:
 Envoyé depuis l'application Cinemet
     """
     
-    try:
-        # Envoi email
-        send_mail(
-            subject=f"[Cinemet Contact] {subject}",
-            message=full_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[settings.ADMIN_EMAIL],
-            fail_silently=False,
-        )
-        
-        return Response({
-            'message': 'Email envoyé avec succès à l\'administrateur'
-        }, status=status.HTTP_200_OK)
-        
-    except Exception as e:
-        return Response({
-            'error': f'Erreur lors de l\'envoi de l\'email: {str(e)}'
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    # le mail est mis dans la boîte d'envoi et envoyé par le worker (voir models/outbound_email.py) :
+    # la réponse n'attend pas le serveur SMTP, et un SMTP lent ou en panne ne fait pas échouer la requête
+    OutboundEmail.queue(
+        subject=f"{SUBJECT_PREFIX}{subject}",
+        body=full_message,
+        to=[settings.ADMIN_EMAIL],
+    )
+
+    return Response({
+        'message': 'Message enregistré, il va être envoyé à l\'administrateur'
+    }, status=status.HTTP_202_ACCEPTED)
 
 
 @api_view(['GET'])
@@ -61,8 +64,9 @@ Envoyé depuis l'application Cinemet
 def get_contact_info(request):
 
     #Retourne les informations de contact pré-remplies pour l'utilisateur (user)
+    user = full_user(request.user)
     return Response({
-        'user_name': f"{request.user.first_name} {request.user.last_name}",
-        'user_email': request.user.email,
+        'user_name': f"{user.first_name} {user.last_name}",
+        'user_email': user.email,
         'admin_info': 'Ce message sera envoyé à l\'équipe d\'administration de Cinemet'
     })
@@ -5,17 +5,22 @@ from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-from ..models import Favorite, Movie
-from ..serializers import FavoriteSerializer
+from ..authentication import with_full_user
+from ..models import Favorite, Movie, main_image_prefetch
+from ..serializers import FavoriteSerializer, FavoriteListSerializer
 
 
 # Liste des favoris de l'utilisateur connecté
 class FavoriteListView(generics.ListAPIView):
-    serializer_class = FavoriteSerializer
+    # lignes compactes (sans l'utilisateur), nombre de requêtes fixe quelle que soit la taille de page
+    serializer_class = FavoriteListSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return Favorite.objects.filter(user=self.request.user)
+        # film joint et image principale chargée en lot (pas de requête par ligne)
+        return Favorite.objects.filter(user=self.request.user).select_related(
+            'movie'
+        ).prefetch_related(main_image_prefetch('movie__')).order_by('-created_at')
 
 
 # Ajouter/retirer un film des favoris
@@ -33,7 +38,7 @@ def toggle_favorite_view(request, movie_id):
         if created:
             return Response({
                 'message': 'Film ajouté aux favoris',
-                'favorite': FavoriteSerializer(favorite).data
+                'favorite': FavoriteSerializer(with_full_user(favorite, request.user)).data
             }, status=status.HTTP_201_CREATED)
         else:
             return Response({
@@ -85,7 +90,7 @@ def add_favorite_view(request):
     if created:
         return Response({
             'message': 'Film ajouté aux favoris',
-            'favorite': FavoriteSerializer(favorite).data
+            'favorite': FavoriteSerializer(with_full_user(favorite, request.user)).data
         }, status=status.HTTP_201_CREATED)
     else:
         return Response({
@@ -144,5 +149,5 @@ def toggle_favorite_api_view(request):
         return Response({
             'message': 'Film ajouté aux favoris',
             'is_favorite': True,
-            'favorite': FavoriteSerializer(favorite).data
+            'favorite': FavoriteSerializer(with_full_user(favorite, request.user)).data
         }, status=status.HTTP_201_CREATED)
\ No newline at end of file
@@ -1,24 +1,56 @@
+import time
 from rest_framework import generics, filters
-from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny, IsAuthenticatedOrReadOnly
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from django.conf import settings
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.utils.cache import quote_etag
+from django.utils import timezone
+from django.utils.http import http_date
 from django_filters.rest_framework import DjangoFilterBackend
-from ..models import Movie, Genre, Director, Actor
+from ..autocomplete import DEFAULT_LIMIT, MAX_LIMIT, autocomplete
+from ..cache import CachedListMixin, conditional_response, get_stats
+from ..facets import facet_counts
+from ..filters import MovieFilter, MovieSearchFilter
+from ..permissions import IsAdminRole
+from ..streaming import ndjson_response
+from ..models import Movie, Genre, Director, Actor, MovieDocument, SimilarMovies, TrendingScore, main_image_prefetch
 from ..serializers import (
-    MovieSerializer, MovieListSerializer, GenreSerializer,
+    MovieSerializer, MovieListSerializer, TrendingMovieSerializer, GenreSerializer,
     DirectorSerializer, ActorSerializer
 )
 
 # View pour lister les films avec pagination, recherche, filtrage et tri
-class MovieListView(generics.ListAPIView):
-    # Liste des films
-    queryset = Movie.objects.all()
+# les requêtes anonymes sont servies depuis le cache partagé (voir core/cache.py)
+class MovieListView(CachedListMixin, generics.ListAPIView):
+    # Liste des films (image principale préchargée en une requête pour toute la page)
+    queryset = Movie.objects.prefetch_related(main_image_prefetch())
     serializer_class = MovieListSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]  # Lecture publique, écriture authentifiée
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]  # Ajout de filtres
-    filterset_fields = ['genres']  # Filtrage par genres
-    search_fields = ['title']  # Recherche sur titre
+    # la recherche passe après le tri : sans ?ordering= elle trie par pertinence
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, MovieSearchFilter]  # Ajout de filtres
+    filterset_class = MovieFilter  # genres, réalisateurs, acteurs, années, durée, note (voir filters.py)
+    # ?ordering=-bayesian_rating : les mieux notés (note bayésienne indexée, voir models/movie.py)
+    ordering_fields = ['id_film', 'title', 'release_date', 'average_rating', 'bayesian_rating']
+    # ?search= : titre, description, réalisateurs et acteurs (voir filters.py)
     ordering = ['-created_at']  # Tri par date de création décroissante
+    cache_models = ('movie', 'rating', 'genre', 'image', 'director', 'actor')
+    cache_authenticated = False
+
+# Liste filtrée + comptes par facette dans la même réponse (mêmes paramètres que MovieListView)
+# "facets" : genres, réalisateurs, acteurs, années, tranches de durée, seuils de note (voir core/facets.py)
+# en cache comme la liste : la page sans filtre (la plus demandée) ne recalcule rien
+class MovieFacetsView(MovieListView):
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        queryset = MovieSearchFilter().filter_queryset(self.request, Movie.objects.all(), self)
+        filterset = MovieFilter(self.request.query_params, queryset=queryset, request=self.request)
+        filterset.is_valid()  # déjà validé par filter_queryset (400 sinon)
+        response.data['facets'] = facet_counts(filterset, queryset)
+        return response
 
 # Vue pour afficher le détail d'un film spécifique (Page film détaillée)
 class MovieDetailView(generics.RetrieveAPIView):
@@ -28,125 +60,198 @@ class MovieDetailView(generics.RetrieveAPIView):
     permission_classes = [IsAuthenticatedOrReadOnly]
     lookup_field = 'id_film'  # Recherche par identifiant personnalisé
 
+    def retrieve(self, request, *args, **kwargs):
+        id_film = self.kwargs['id_film']
+
+        # GET conditionnel : ETag / Last-Modified à partir des dates du document et du film
+        # si le client a déjà cette version on répond 304 sans charger le document
+        versions = MovieDocument.get_versions(id_film)
+        etag = last_modified = None
+        if versions is not None:
+            etag, last_modified = document_validators(id_film, versions)
+            not_modified = conditional_response(request, etag, last_modified)
+            if not_modified is not None:
+                return not_modified
+
+        # on sert le document pré-calculé (MovieDocument) au lieu de re-sérialiser film + relations
+        data = MovieDocument.get_data(id_film)
+        if data is None:
+            raise Http404
+        response = Response(absolute_image_urls(request, data))
+        if etag is not None:
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+# ETag et Last-Modified de la page détail (dates du document et du film)
+def document_validators(id_film, versions):
+    etag = quote_etag(f"{id_film}-{'-'.join(str(int(date.timestamp() * 1000000)) for date in versions)}")
+    return etag, int(max(versions).timestamp())
+
+
+# le document stocke des chemins relatifs, on rend les urls absolues comme le serializer
+def absolute_image_urls(request, data):
+    for image in data['images']:
+        if image['url']:
+            image['url'] = request.build_absolute_uri(image['url'])
+    return data
+
+# Films similaires (filtrage collaboratif item-item) : lus dans l'index pré-calculé SimilarMovies
+# (voir core/recommendations.py), une lecture par clé primaire + les films voisins, puis cache partagé
+# ?limit= : nombre de films (10 par défaut, au plus SimilarMovies.TOP_K)
+class SimilarMoviesView(CachedListMixin, generics.ListAPIView):
+    serializer_class = MovieListSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = None
+    cache_models = ('similar', 'movie', 'rating', 'image')
+
+    def get_cache_name(self):
+        return f"{self.__class__.__name__}:{self.kwargs['id_film']}"
+
+    def get_queryset(self):
+        id_film = self.kwargs['id_film']
+        neighbors = SimilarMovies.objects.filter(movie_id=id_film).values_list('neighbors', flat=True).first()
+        if neighbors is None:
+            # pas encore dans l'index : 404 seulement si le film n'existe pas
+            get_object_or_404(Movie, id_film=id_film)
+            return []
+        try:
+            limit = min(max(int(self.request.query_params.get('limit', 10)), 1), SimilarMovies.TOP_K)
+        except ValueError:
+            raise ValidationError({'limit': 'Entier attendu'})
+        ids = neighbors[:limit]
+        movies = Movie.objects.filter(pk__in=ids).prefetch_related(main_image_prefetch()).in_bulk()
+        # ordre de l'index (similarité décroissante), un voisin supprimé depuis est ignoré
+        return [movies[pk] for pk in ids if pk in movies]
+
+# Films tendance : top-n lu dans l'index trié de TrendingScore (scores maintenus à chaque événement,
+# voir core/models/trending.py), aucun parcours des notes / favoris / watchlist à la requête
+# en cache partagé par tranche de TRENDING_CACHE_SECONDS ; ?limit= : 20 par défaut, 100 au plus
+class TrendingMoviesView(CachedListMixin, generics.ListAPIView):
+    serializer_class = TrendingMovieSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = None
+    cache_models = ('movie', 'rating', 'image')
+
+    def get_cache_name(self):
+        return f'{self.__class__.__name__}:{int(time.time() // settings.TRENDING_CACHE_SECONDS)}'
+
+    def get_queryset(self):
+        try:
+            limit = min(max(int(self.request.query_params.get('limit', 20)), 1), 100)
+        except ValueError:
+            raise ValidationError({'limit': 'Entier attendu'})
+        ranking = TrendingScore.objects.select_related('movie').prefetch_related(
+            main_image_prefetch('movie__')
+        ).order_by('-score')[:limit]
+        now = timezone.now()
+        movies = []
+        for row in ranking:
+            row.movie.trending_score = round(TrendingScore.current_value(row.score, now), 3)
+            movies.append(row.movie)
+        return movies
+
 # Vue pour créer un film (réservée à l'admin)
 class MovieCreateView(generics.CreateAPIView):
     queryset = Movie.objects.all()
     serializer_class = MovieSerializer
-    permission_classes = [IsAuthenticated]  # Authentification requise
-    
-    def get_queryset(self):
-        # Seulement les utilisateurs avec le rôle admin peuvent créer des films
-        if self.request.user.role and self.request.user.role.role == 'admin':
-            return Movie.objects.all()
-        return Movie.objects.none()
+    permission_classes = [IsAdminRole]  # réservé aux admins
 
 # CRUD complet pour les films (admin seulement)
 class MovieUpdateView(generics.UpdateAPIView):
     queryset = Movie.objects.all()
     serializer_class = MovieSerializer
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAdminRole]  # réservé aux admins
     lookup_field = 'id_film'
-    
-    def get_queryset(self):
-        if self.request.user.role and self.request.user.role.role == 'admin':
-            return Movie.objects.all()
-        return Movie.objects.none()
 
 class MovieDeleteView(generics.DestroyAPIView):
     queryset = Movie.objects.all()
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAdminRole]  # réservé aux admins
     lookup_field = 'id_film'
-    
-    def get_queryset(self):
-        if self.request.user.role and self.request.user.role.role == 'admin':
-            return Movie.objects.all()
-        return Movie.objects.none()
 
 # Vue pour lister tous les films (gestion admin)
 @api_view(['GET'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAdminRole])
 def admin_movies_view(request):
-    # Vérifie si l'utilisateur est admin
-    if request.user.role and request.user.role.role == 'admin':
-        movies = Movie.objects.all()
-        return Response(MovieSerializer(movies, many=True).data)
-    # Refuse l'accès si l'utilisateur n'est pas admin
-    return Response({'error': 'Permission refusée'}, status=403)
-
-# Vues pour Genre, Director, Actor (pour les filtres et l'admin)
-class GenreListView(generics.ListAPIView):
+    movies = Movie.objects.prefetch_related('genres', 'directors', 'actors', 'images')
+    return Response(MovieSerializer(movies, many=True).data)
+
+# Export de tous les films en flux NDJSON (un film par ligne, même format que admin/movies/)
+# pour les gros catalogues : lu et envoyé par morceaux, sans tout charger en mémoire
+@api_view(['GET'])
+@permission_classes([IsAdminRole])
+def admin_movies_export_view(request):
+    movies = Movie.objects.prefetch_related('genres', 'directors', 'actors', 'images').order_by('pk')
+    # sans request dans le contexte, comme admin/movies/ : urls d'images relatives dans les deux
+    return ndjson_response(movies, MovieSerializer, 'movies.ndjson')
+
+# Statistiques du cache du catalogue (admin seulement)
+@api_view(['GET'])
+@permission_classes([IsAdminRole])
+def catalog_cache_stats_view(request):
+    return Response(get_stats())
+
+# Autocomplétion de la barre de recherche : ?q=nol -> films, réalisateurs et acteurs (les plus populaires d'abord)
+# servie depuis l'index en mémoire du worker (voir core/autocomplete.py) : ni requête SQL ni sérialiseur
+# publique, sans authentification (rien ne dépend de l'utilisateur)
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def autocomplete_view(request):
+    try:
+        limit = min(max(int(request.query_params.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except ValueError:
+        raise ValidationError({'limit': 'Entier attendu'})
+    return Response(autocomplete(request.query_params.get('q', ''), limit))
+
+# Vues pour Genre, Director, Actor (pour les filtres et l'admin, servies depuis le cache partagé)
+class GenreListView(CachedListMixin, generics.ListAPIView):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    cache_models = ('genre',)
 
-class DirectorListView(generics.ListAPIView):
+class DirectorListView(CachedListMixin, generics.ListAPIView):
     queryset = Director.objects.all()
     serializer_class = DirectorSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    cache_models = ('director',)
 
-class ActorListView(generics.ListAPIView):
+class ActorListView(CachedListMixin, generics.ListAPIView):
     queryset = Actor.objects.all()
     serializer_class = ActorSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    cache_models = ('actor',)
 
 # Vues CRUD pour l'admin
 class DirectorCreateView(generics.CreateAPIView):
     queryset = Director.objects.all()
     serializer_class = DirectorSerializer
-    permission_classes = [IsAuthenticated]
-    
-    def get_queryset(self):
-        if self.request.user.role and self.request.user.role.role == 'admin':
-            return Director.objects.all()
-        return Director.objects.none()
+    permission_classes = [IsAdminRole]  # réservé aux admins
 
 class DirectorUpdateView(generics.UpdateAPIView):
     queryset = Director.objects.all()
     serializer_class = DirectorSerializer
-    permission_classes = [IsAuthenticated]
-    
-    def get_queryset(self):
-        if self.request.user.role and self.request.user.role.role == 'admin':
-            return Director.objects.all()
-        return Director.objects.none()
+    permission_classes = [IsAdminRole]  # réservé aux admins
 
 class DirectorDeleteView(generics.DestroyAPIView):
     queryset = Director.objects.all()
-    permission_classes = [IsAuthenticated]
-    
-    def get_queryset(self):
-        if self.request.user.role and self.request.user.role.role == 'admin':
-            return Director.objects.all()
-        return Director.objects.none()
+    permission_classes = [IsAdminRole]  # réservé aux admins
 
 class ActorCreateView(generics.CreateAPIView):
     queryset = Actor.objects.all()
     serializer_class = ActorSerializer
-    permission_classes = [IsAuthenticated]
-    
-    def get_queryset(self):
-        if self.request.user.role and self.request.user.role.role == 'admin':
-            return Actor.objects.all()
-        return Actor.objects.none()
+    permission_classes = [IsAdminRole]  # réservé aux admins
 
 class ActorUpdateView(generics.UpdateAPIView):
     queryset = Actor.objects.all()
     serializer_class = ActorSerializer
-    permission_classes = [IsAuthenticated]
-    
-    def get_queryset(self):
-        if self.request.user.role and self.request.user.role.role == 'admin':
-            return Actor.objects.all()
-        return Actor.objects.none()
+    permission_classes = [IsAdminRole]  # réservé aux admins
 
 class ActorDeleteView(generics.DestroyAPIView):
     queryset = Actor.objects.all()
-    permission_classes = [IsAuthenticated]
-    
-    def get_queryset(self):
-        if self.request.user.role and self.request.user.role.role == 'admin':
-            return Actor.objects.all()
-        return Actor.objects.none()
+    permission_classes = [IsAdminRole]  # réservé aux admins
 
 
 
@@ -0,0 +1,60 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from ..models import Favorite, Watchlist, Rating
+
+# nombre max de films par appel
+MAX_MOVIE_STATES = 100
+# plus grand id_film possible (colonne int4) : au-delà la base refuserait la requête (500)
+MAX_MOVIE_ID = 2147483647
+
+
+# État de plusieurs films pour l'utilisateur connecté (favori, watchlist, note) en un seul appel
+# ?ids=1,2,3 -> 3 requêtes au total, quel que soit le nombre de films
+# (remplace un check_favorite + check_watchlist + get_user_rating par film)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def movie_states_view(request):
+    raw_ids = [value for value in ','.join(request.GET.getlist('ids')).split(',') if value.strip()]
+    # avant la conversion : une liste énorme n'est pas lue en entier
+    if len(raw_ids) > MAX_MOVIE_STATES:
+        return Response({
+            'error': f'{MAX_MOVIE_STATES} films maximum par appel'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        movie_ids = list(dict.fromkeys(int(value) for value in raw_ids))
+        if any(not 0 < movie_id <= MAX_MOVIE_ID for movie_id in movie_ids):
+            raise ValueError
+    except ValueError:
+        return Response({
+            'error': 'ids doit être une liste d\'identifiants de films (ex: ?ids=1,2,3)'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    if not movie_ids:
+        return Response({
+            'error': 'ids requis'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    favorites = set(
+        Favorite.objects.filter(user=request.user, movie_id__in=movie_ids).values_list('movie_id', flat=True)
+    )
+    watchlist = set(
+        Watchlist.objects.filter(user=request.user, movie_id__in=movie_ids).values_list('movie_id', flat=True)
+    )
+    ratings = dict(
+        Rating.objects.filter(user=request.user, movie_id__in=movie_ids).values_list('movie_id', 'rating')
+    )
+
+    # un id inconnu répond simplement "pas en favori, pas dans la watchlist, pas de note"
+    return Response({
+        'results': [
+            {
+                'id_film': movie_id,
+                'is_favorite': movie_id in favorites,
+                'in_watchlist': movie_id in watchlist,
+                'rating': ratings.get(movie_id),
+            }
+            for movie_id in movie_ids
+        ]
+    })
@@ -1,16 +1,22 @@
 from rest_framework import generics, status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from django.shortcuts import get_object_or_404
-from django.db.models import Avg
-from ..models import Rating, Movie
-from ..serializers import RatingSerializer
+from django.db import transaction
+from django.db.models import Count
+from ..authentication import with_full_user
+from ..models import Rating, Movie, main_image_prefetch
+from ..pagination import KeysetPagination
+from ..serializers import RatingSerializer, UserRatingSerializer
+from ..throttling import RatingUserThrottle
 
 
 # Noter un film ou modifier une note existante
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@throttle_classes([RatingUserThrottle])
 def rate_movie_view(request):
     movie_id = request.data.get('movie_id')
     movie = get_object_or_404(Movie, id_film=movie_id)
@@ -22,21 +28,19 @@ def rate_movie_view(request):
         }, status=status.HTTP_400_BAD_REQUEST)
     
     # Créer ou mettre à jour la note
-    rating, created = Rating.objects.update_or_create(
-        user=request.user,
-        movie=movie,
-        defaults={'rating': rating_value}
-    )
-    
-    # Recalculer la moyenne du film
-    average = Rating.objects.filter(movie=movie).aggregate(Avg('rating'))['rating__avg']
-    movie.average_rating = round(average, 2) if average else 0
-    movie.save()
+    # les compteurs du film sont mis à jour par le signal, dans la même transaction
+    with transaction.atomic():
+        rating, created = Rating.objects.update_or_create(
+            user=request.user,
+            movie=movie,
+            defaults={'rating': int(rating_value)}
+        )
+    movie.refresh_from_db(fields=['average_rating'])
     
     action = 'ajoutée' if created else 'mise à jour'
     return Response({
         'message': f'Note {action} avec succès',
-        'rating': RatingSerializer(rating).data,
+        'rating': RatingSerializer(with_full_user(rating, request.user)).data,
         'movie_average': movie.average_rating
     }, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
 
@@ -50,7 +54,7 @@ def get_user_rating_view(request):
     
     try:
         rating = Rating.objects.get(user=request.user, movie=movie)
-        return Response(RatingSerializer(rating).data)
+        return Response(RatingSerializer(with_full_user(rating, request.user)).data)
     except Rating.DoesNotExist:
         return Response({
             'message': 'Aucune note trouvée pour ce film'
@@ -65,13 +69,11 @@ def delete_rating_view(request):
     movie = get_object_or_404(Movie, id_film=movie_id)
     
     try:
-        rating = Rating.objects.get(user=request.user, movie=movie)
-        rating.delete()
-        
-        # Recalculer la moyenne du film
-        average = Rating.objects.filter(movie=movie).aggregate(Avg('rating'))['rating__avg']
-        movie.average_rating = round(average, 2) if average else 0
-        movie.save()
+        # les compteurs du film sont mis à jour par le signal, dans la même transaction
+        with transaction.atomic():
+            rating = Rating.objects.get(user=request.user, movie=movie)
+            rating.delete()
+        movie.refresh_from_db(fields=['average_rating'])
         
         return Response({
             'message': 'Note supprimée avec succès',
@@ -84,34 +86,43 @@ def delete_rating_view(request):
 
 
 # Récupérer toutes les notes d'un film avec statistiques
+# total et moyenne viennent des compteurs du film, la distribution d'un seul GROUP BY,
+# et les notes sont paginées par curseur (pas de count) avec les utilisateurs joints
 @api_view(['GET'])
 def get_movie_ratings_view(request, movie_id):
     movie = get_object_or_404(Movie, id_film=movie_id)
-    ratings = Rating.objects.filter(movie=movie)
     
-    # Statistiques
-    total_ratings = ratings.count()
-    average = ratings.aggregate(Avg('rating'))['rating__avg']
-    average_rating = round(average, 2) if average else 0
+    # Distribution des notes (une requête pour les 11 valeurs)
+    counts = dict(
+        Rating.objects.filter(movie=movie).order_by().values_list('rating').annotate(total=Count('id'))
+    )
+    distribution = {f'{i}_points': counts.get(i, 0) for i in range(0, 11)}
     
-    # Distribution des notes
-    distribution = {}
-    for i in range(0, 11):
-        distribution[f'{i}_points'] = ratings.filter(rating=i).count()
+    # Notes du film, page par page (?cursor= pour la suite, voir core/pagination.py)
+    ratings = Rating.objects.filter(movie=movie).select_related('user', 'movie').order_by('-created_at')
+    paginator = KeysetPagination(api_settings.PAGE_SIZE)
+    page = paginator.paginate_queryset(ratings, request)
+    links = paginator.get_paginated_response([]).data
     
     return Response({
         'movie_id': movie_id,
-        'total_ratings': total_ratings,
-        'average_rating': average_rating,
+        'total_ratings': movie.rating_count,
+        'average_rating': movie.average_rating,
         'distribution': distribution,
-        'ratings': RatingSerializer(ratings, many=True).data
+        'ratings': RatingSerializer(page, many=True).data,
+        'next': links['next'],
+        'previous': links['previous'],
     })
 
 
 # Liste des notes données par l'utilisateur connecté
+# lignes compactes (sans l'utilisateur), nombre de requêtes fixe quelle que soit la taille de page
 class UserRatingsListView(generics.ListAPIView):
-    serializer_class = RatingSerializer
+    serializer_class = UserRatingSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return Rating.objects.filter(user=self.request.user).order_by('-created_at')
\ No newline at end of file
+        # film joint et image principale chargée en lot (pas de requête par ligne)
+        return Rating.objects.filter(user=self.request.user).select_related(
+            'movie'
+        ).prefetch_related(main_image_prefetch('movie__')).order_by('-created_at')
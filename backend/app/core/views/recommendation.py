@@ -0,0 +1,49 @@
+from rest_framework import generics
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from ..cache import CachedListMixin
+from ..models import Movie, Rating, Favorite, Watchlist, UserRecommendations, main_image_prefetch
+from ..serializers import MovieListSerializer
+
+
+# Recommandations "pour vous" : liste pré-calculée (ALS, voir core/recommendations.py), jamais de calcul ici
+# un utilisateur sans recommandations (nouveau, ou modèle pas encore entraîné) reçoit les films les plus notés
+# réponse en cache par utilisateur, invalidée par son activité (génération reco:<id>) ou un ré-entraînement (reco)
+# ?limit= : nombre de films (20 par défaut, au plus UserRecommendations.TOP_N)
+class RecommendationsView(CachedListMixin, generics.ListAPIView):
+    serializer_class = MovieListSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = None
+
+    @property
+    def cache_models(self):
+        return ('reco', f'reco:{self.request.user.pk}', 'movie', 'rating', 'image')
+
+    def get_cache_name(self):
+        return f'{self.__class__.__name__}:{self.request.user.pk}'
+
+    def get_queryset(self):
+        try:
+            limit = min(max(int(self.request.query_params.get('limit', 20)), 1), UserRecommendations.TOP_N)
+        except ValueError:
+            raise ValidationError({'limit': 'Entier attendu'})
+        user = self.request.user
+        ids = UserRecommendations.objects.filter(user=user).values_list('movies', flat=True).first()
+        if not ids:
+            return self.most_rated(user, limit)
+
+        # les films vus depuis le dernier calcul sont retirés tout de suite (en attendant le recalcul)
+        movies = Movie.objects.exclude(ratings__user=user).exclude(favorites__user=user).exclude(watchlist__user=user)
+        movies = movies.filter(pk__in=ids).prefetch_related(main_image_prefetch()).in_bulk()
+        return [movies[pk] for pk in ids if pk in movies][:limit]
+
+    # les plus notés lus dans l'index (rating_count, id_film) : limit + nombre de films vus, puis on retire les vus
+    # (pas de tri de tout le catalogue ni d'anti-jointure ; un utilisateur sans liste a peu d'interactions)
+    def most_rated(self, user, limit):
+        seen = set(Rating.objects.filter(user=user).values_list('movie_id', flat=True))
+        seen.update(Favorite.objects.filter(user=user).values_list('movie_id', flat=True))
+        seen.update(Watchlist.objects.filter(user=user).values_list('movie_id', flat=True))
+        ranking = Movie.objects.order_by('-rating_count', '-pk').values_list('pk', flat=True)[:limit + len(seen)]
+        ids = [pk for pk in ranking if pk not in seen][:limit]
+        movies = Movie.objects.filter(pk__in=ids).prefetch_related(main_image_prefetch()).in_bulk()
+        return [movies[pk] for pk in ids if pk in movies]
@@ -1,5 +1,5 @@
 from rest_framework import generics, status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, throttle_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from django.contrib.auth import authenticate, login, logout
@@ -10,6 +10,12 @@ from django.views.decorators.csrf import ensure_csrf_cookie
 from django.http import JsonResponse
 from ..models import User, Role
 from ..serializers import UserSerializer, UserCreateSerializer
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import RefreshToken
+from ..authentication import full_user, tokens_for_user, rotate_refresh_token
+from ..permissions import IsAdminRole
+from ..throttling import LoginIPThrottle, LoginEmailThrottle, RegisterIPThrottle, get_throttle_stats
+from ..streaming import ndjson_response
 
 
 # Inscription
@@ -17,6 +23,7 @@ class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserCreateSerializer
     permission_classes = [AllowAny]
+    throttle_classes = [RegisterIPThrottle]
     
     def perform_create(self, serializer):
         user_role, created = Role.objects.get_or_create(role='user')
@@ -28,10 +35,12 @@ class RegisterView(generics.CreateAPIView):
 # Connexion
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([LoginIPThrottle, LoginEmailThrottle])
 @ensure_csrf_cookie
 def login_view(request):
-    email = request.data.get('email')
-    password = request.data.get('password')
+    data = request.data if isinstance(request.data, dict) else {}  # corps JSON qui n'est pas un objet : 400
+    email = data.get('email')
+    password = data.get('password')
     
     if email and password:
         user = authenticate(username=email, password=password)
@@ -56,16 +65,76 @@ def logout_view(request):
     return Response({'message': 'Déconnexion réussie'})
 
 
+# Connexion sans état (JWT) : mêmes identifiants que login/, renvoie access + refresh
+# les appels suivants passent Authorization: Bearer <access> (ni session ni CSRF)
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+@throttle_classes([LoginIPThrottle, LoginEmailThrottle])
+def token_login_view(request):
+    data = request.data if isinstance(request.data, dict) else {}  # corps JSON qui n'est pas un objet : 400
+    email = data.get('email')
+    password = data.get('password')
+
+    if email and password:
+        user = authenticate(username=email, password=password)
+        if user:
+            refresh = tokens_for_user(user)
+            return Response({
+                'message': 'Connexion réussie',
+                'user': UserSerializer(user).data,
+                'access': str(refresh.access_token),
+                'refresh': str(refresh),
+            })
+        return Response({'error': 'Identifiants invalides'},
+                       status=status.HTTP_401_UNAUTHORIZED)
+
+    return Response({'error': 'Email et password requis'},
+                   status=status.HTTP_400_BAD_REQUEST)
+
+
+# Nouveau token d'accès : le refresh est à usage unique, un nouveau est renvoyé (rotation)
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def token_refresh_view(request):
+    token = request.data.get('refresh')
+    if not token:
+        return Response({'error': 'Refresh token requis'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        refresh = rotate_refresh_token(token)
+    except TokenError as e:
+        return Response({'error': str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+    return Response({'access': str(refresh.access_token), 'refresh': str(refresh)})
+
+
+# Déconnexion JWT : le refresh passe en liste noire (le token d'accès expire tout seul)
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def token_logout_view(request):
+    token = request.data.get('refresh')
+    if not token:
+        return Response({'error': 'Refresh token requis'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        RefreshToken(token).blacklist()
+    except TokenError as e:
+        return Response({'error': str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+    return Response({'message': 'Déconnexion réussie'})
+
+
 # Profil utilisateur
 @csrf_exempt # Ajout de notre Token lors de la requête
 @api_view(['GET', 'PUT', 'PATCH'])
 @permission_classes([IsAuthenticated])
 def profile_view(request):
+    # en JWT request.user ne contient que les claims
+    user = full_user(request.user)
     if request.method == 'GET':
-        return Response(UserSerializer(request.user).data)
+        return Response(UserSerializer(user).data)
     
     elif request.method in ['PUT', 'PATCH']:
-        serializer = UserSerializer(request.user, data=request.data, partial=True)
+        serializer = UserSerializer(user, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
             return Response({
@@ -86,25 +155,38 @@ def change_password_view(request):
         return Response({'error': 'Mot de passe actuel et nouveau requis'}, 
                        status=status.HTTP_400_BAD_REQUEST)
     
-    if not request.user.check_password(current_password):
+    user = full_user(request.user)
+    if not user.check_password(current_password):
         return Response({'error': 'Mot de passe actuel incorrect'}, 
                        status=status.HTTP_400_BAD_REQUEST)
     
-    request.user.set_password(new_password)
-    request.user.save()
+    user.set_password(new_password)
+    user.save()
     
     return Response({'message': 'Mot de passe changé avec succès'})
 
 
 # Liste des utilisateurs (admin seulement)
 @api_view(['GET'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAdminRole])
 def users_list_view(request):
-    if request.user.role and request.user.role.role == 'admin':
-        users = User.objects.all()
-        return Response(UserSerializer(users, many=True).data)
-    return Response({'error': 'Permission refusée'}, 
-                   status=status.HTTP_403_FORBIDDEN)
+    users = User.objects.select_related('role')
+    return Response(UserSerializer(users, many=True).data)
+
+
+# Export de tous les utilisateurs en flux NDJSON (admin seulement, même format que users/)
+@api_view(['GET'])
+@permission_classes([IsAdminRole])
+def users_export_view(request):
+    users = User.objects.select_related('role').order_by('pk')
+    return ndjson_response(users, UserSerializer, 'users.ndjson')
+
+
+# Requêtes rejetées (429) par les limitations, par scope (admin seulement)
+@api_view(['GET'])
+@permission_classes([IsAdminRole])
+def throttle_stats_view(request):
+    return Response(get_throttle_stats())
 
 
 # Obtenir le token CSRF
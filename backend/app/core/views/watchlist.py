@@ -5,17 +5,22 @@ from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-from ..models import Watchlist, Movie
-from ..serializers import WatchlistSerializer
+from ..authentication import with_full_user
+from ..models import Watchlist, Movie, main_image_prefetch
+from ..serializers import WatchlistSerializer, WatchlistListSerializer
 
 
 # Liste de la watchlist de l'utilisateur connecté
 class WatchlistListView(generics.ListAPIView):
-    serializer_class = WatchlistSerializer
+    # lignes compactes (sans l'utilisateur), nombre de requêtes fixe quelle que soit la taille de page
+    serializer_class = WatchlistListSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return Watchlist.objects.filter(user=self.request.user)
+        # film joint et image principale chargée en lot (pas de requête par ligne)
+        return Watchlist.objects.filter(user=self.request.user).select_related(
+            'movie'
+        ).prefetch_related(main_image_prefetch('movie__')).order_by('-created_at')
 
 
 # Ajouter/retirer un film de la watchlist
@@ -33,7 +38,7 @@ def toggle_watchlist_view(request, movie_id):
         if created:
             return Response({
                 'message': 'Film ajouté à la watchlist',
-                'watchlist': WatchlistSerializer(watchlist_item).data
+                'watchlist': WatchlistSerializer(with_full_user(watchlist_item, request.user)).data
             }, status=status.HTTP_201_CREATED)
         else:
             return Response({
@@ -85,7 +90,7 @@ def add_watchlist_view(request):
     if created:
         return Response({
             'message': 'Film ajouté à la watchlist',
-            'watchlist': WatchlistSerializer(watchlist_item).data
+            'watchlist': WatchlistSerializer(with_full_user(watchlist_item, request.user)).data
         }, status=status.HTTP_201_CREATED)
     else:
         return Response({
@@ -144,5 +149,5 @@ def toggle_watchlist_api_view(request):
         return Response({
             'message': 'Film ajouté à la watchlist',
             'is_in_watchlist': True,
-            'watchlist': WatchlistSerializer(watchlist_item).data
+            'watchlist': WatchlistSerializer(with_full_user(watchlist_item, request.user)).data
         }, status=status.HTTP_201_CREATED)
\ No newline at end of file
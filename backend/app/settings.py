@@ -1,7 +1,7 @@
 # Ajout backend d'authentification par email
 AUTHENTICATION_BACKENDS = [
     'app.core.backends.EmailBackend',
-    'django.contrib.auth.backends.ModelBackend',
+    'app.core.backends.CachedModelBackend',
 ]
 """
 Django settings for app project.
@@ -15,7 +15,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import math
+from datetime import timedelta
 from pathlib import Path
+from celery.schedules import crontab
+from decouple import config
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -43,7 +48,9 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
+    "rest_framework_simplejwt.token_blacklist",
     "corsheaders",
 ]
 
@@ -140,12 +147,122 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
+        # mode sans état : Authorization: Bearer <access>, voir core/authentication.py
+        'app.core.authentication.StatelessJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    # pagination par page, ou par curseur sur demande (?pagination=cursor), voir core/pagination.py
+    'DEFAULT_PAGINATION_CLASS': 'app.core.pagination.PageOrCursorPagination',
     'PAGE_SIZE': 10,
+    # seaux à jetons des écritures coûteuses (voir core/throttling.py), "N/période" : rafale de N, N par période
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': config('THROTTLE_LOGIN_IP', default='20/min'),
+        'login_email': config('THROTTLE_LOGIN_EMAIL', default='5/min'),
+        'register_ip': config('THROTTLE_REGISTER_IP', default='10/hour'),
+        'rating_user': config('THROTTLE_RATING_USER', default='60/min'),
+    },
+    # nombre de proxys devant django (X-Forwarded-For) pour trouver l'IP du client, 0 : REMOTE_ADDR
+    'NUM_PROXIES': config('THROTTLE_NUM_PROXIES', default=0, cast=int),
+}
+
+# Tokens JWT (token/, token/refresh/, token/logout/)
+# accès court : le rôle des claims est relu à chaque refresh ; refresh à usage unique (rotation + liste noire)
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=config('JWT_ACCESS_MINUTES', default=5, cast=int)),
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=config('JWT_REFRESH_DAYS', default=7, cast=int)),
+    'ROTATE_REFRESH_TOKENS': True,
+    'BLACKLIST_AFTER_ROTATION': True,
+    'USER_ID_FIELD': 'id_user',
+    'USER_ID_CLAIM': 'user_id',
+}
+
+# Cache partagé (réponses du catalogue, voir core/cache.py)
+# redis si REDIS_URL est défini (docker-compose), sinon cache mémoire local
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# sessions et utilisateur connecté (avec son rôle) en cache, voir core/backends.py
+# seulement avec un cache partagé (redis) : avec un cache local à chaque process, une déconnexion
+# ou un changement de rôle ne serait pas vu par les autres process
+SESSION_ENGINE = (
+    'django.contrib.sessions.backends.cached_db' if REDIS_URL else 'django.contrib.sessions.backends.db'
+)
+AUTH_USER_CACHE_TIMEOUT = 60 * 15 if REDIS_URL else 0
+
+# durée de vie des réponses du catalogue en cache (secondes)
+CATALOG_CACHE_TIMEOUT = 60 * 60
+# retard maximal des notes (moyenne, nombre de votes) dans les listes en cache (voir DELAYED_GENERATIONS)
+RATING_CACHE_SECONDS = config('RATING_CACHE_SECONDS', default=5 * 60, cast=int)
+
+# Note bayésienne (tri "mieux notés", voir Movie.bayesian_rating) : votes fictifs ajoutés à chaque film,
+# et moyenne utilisée tant qu'il n'y a aucune note
+BAYESIAN_MIN_VOTES = config('BAYESIAN_MIN_VOTES', default=10, cast=int)
+BAYESIAN_DEFAULT_MEAN = 5.0
+
+# Films tendance (voir core/models/trending.py) : demi-vie de l'activité et époque des scores
+TRENDING_HALF_LIFE_HOURS = config('TRENDING_HALF_LIFE_HOURS', default=48, cast=float)
+# nulle, négative, infinie ou nan : λ = ln 2 / demi-vie n'aurait pas de sens (ou sortirait des float)
+if not 0 < TRENDING_HALF_LIFE_HOURS < math.inf:
+    raise ImproperlyConfigured('TRENDING_HALF_LIFE_HOURS doit être un nombre d\'heures positif')
+TRENDING_EPOCH = '2026-01-01'
+# le classement servi peut avoir jusqu'à TRENDING_CACHE_SECONDS de retard
+TRENDING_CACHE_SECONDS = 60
+
+# vues async pour les lectures les plus appelées (liste/détail des films, genres, check favori/watchlist)
+# à activer quand le projet est servi en ASGI (uvicorn), voir le README
+ASYNC_READ_VIEWS = config('ASYNC_READ_VIEWS', default=False, cast=bool)
+
+# Celery (tâches en arrière-plan, voir app/celery.py et core/tasks.py)
+# broker redis comme le cache ; sans broker (en local) les tâches s'exécutent directement dans le process
+CELERY_BROKER_URL = config('CELERY_BROKER_URL', default=REDIS_URL)
+CELERY_TASK_ALWAYS_EAGER = not CELERY_BROKER_URL
+CELERY_TASK_IGNORE_RESULT = True
+# tâches planifiées (celery beat, lancé avec le worker : celery -A app worker -B)
+CELERY_BEAT_SCHEDULE = {
+    # boîte d'envoi : mails dont l'heure du nouvel essai est passée
+    'outbox-retry': {
+        'task': 'app.core.tasks.deliver_outbox',
+        'schedule': crontab(),
+    },
+    # films similaires : les films avec de nouvelles interactions toutes les heures, tout l'index la nuit
+    'similar-movies-incremental': {
+        'task': 'app.core.tasks.rebuild_similar_movies',
+        'schedule': crontab(minute=15),
+        'kwargs': {'incremental': True},
+    },
+    'similar-movies-full': {
+        'task': 'app.core.tasks.rebuild_similar_movies',
+        'schedule': crontab(hour=3, minute=30),
+    },
+    # tendances : recalcul complet chaque nuit (sort les films sans activité récente du classement)
+    'trending-rebuild': {
+        'task': 'app.core.tasks.rebuild_trending',
+        'schedule': crontab(hour=4, minute=30),
+    },
+    # note bayésienne : recalcul avec la moyenne globale du moment
+    'bayesian-ratings': {
+        'task': 'app.core.tasks.refresh_bayesian_ratings',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    # recommandations "pour vous" : ré-entraînement complet chaque nuit
+    'recommendations-train': {
+        'task': 'app.core.tasks.train_recommendations',
+        'schedule': crontab(hour=4, minute=0),
+    },
 }
 
 # Configuration CORS pour le frontend Next.js
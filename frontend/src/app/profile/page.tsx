@@ -3,6 +3,7 @@
 import { useState, useEffect } from 'react'
 import { useRouter } from 'next/navigation'
 import Navbar from '@/components/Navbar'
+import Poster from '@/components/Poster'
 import { Heart, Bookmark, Star, User, Mail, Calendar, Edit2, Trash2 } from 'lucide-react'
 
 interface User {
@@ -26,6 +27,7 @@ interface Movie {
     url: string
     is_main: boolean
     created_at: string
+    variants?: { width: number; webp: string; jpeg: string }[]
   }
   average_rating?: number
 }
@@ -370,9 +372,10 @@ export default function ProfilePage() {
                         <div className="flex">
                           <div className="w-24 h-36 bg-gray-700 flex-shrink-0">
                             {favorite.movie.main_image?.url ? (
-                              <img
-                                src={favorite.movie.main_image.url}
+                              <Poster
+                                image={favorite.movie.main_image}
                                 alt={favorite.movie.title}
+                                sizes="96px"
                                 className="w-full h-full object-cover"
                               />
                             ) : (
@@ -434,9 +437,10 @@ export default function ProfilePage() {
                         <div className="flex">
                           <div className="w-24 h-36 bg-gray-700 flex-shrink-0">
                             {item.movie.main_image?.url ? (
-                              <img
-                                src={item.movie.main_image.url}
+                              <Poster
+                                image={item.movie.main_image}
                                 alt={item.movie.title}
+                                sizes="96px"
                                 className="w-full h-full object-cover"
                               />
                             ) : (
@@ -1,5 +1,6 @@
 import { useState, useEffect } from 'react'
 import { useRouter } from 'next/navigation'
+import Poster from './Poster'
 
 interface Movie {
   id_film: number
@@ -13,6 +14,7 @@ interface Movie {
     url: string
     is_main: boolean
     created_at: string
+    variants?: { width: number; webp: string; jpeg: string }[]
   }
   average_rating?: number
 }
@@ -130,9 +132,10 @@ export default function MovieList({
         <div key={movie.id_film} className="bg-white rounded-lg shadow-md overflow-hidden hover:shadow-lg transition-shadow">
           <div className="relative">
             {movie.main_image ? (
-              <img
-                src={movie.main_image.url}
+              <Poster
+                image={movie.main_image}
                 alt={movie.title}
+                sizes="(min-width: 1280px) 25vw, (min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw"
                 className="w-full h-64 object-cover cursor-pointer"
                 onClick={() => router.push(`/movies/${movie.id_film}`)}
               />
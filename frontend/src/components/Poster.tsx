@@ -0,0 +1,48 @@
+interface ImageVariant {
+  width: number
+  webp: string
+  jpeg: string
+}
+
+export interface PosterImage {
+  url: string
+  // versions redimensionnées générées par le backend (vide tant que le worker ne les a pas créées)
+  variants?: ImageVariant[]
+}
+
+interface PosterProps {
+  image: PosterImage
+  alt: string
+  // largeur affichée, pour que le navigateur choisisse la bonne version (attribut sizes)
+  sizes: string
+  className?: string
+  onClick?: () => void
+}
+
+// Affiche d'un film : webp si le navigateur le supporte, jpeg sinon, à la taille affichée
+export default function Poster({ image, alt, sizes, className, onClick }: PosterProps) {
+  const variants = image.variants ?? []
+
+  // pas encore de versions : on affiche l'original
+  if (variants.length === 0) {
+    return <img src={image.url} alt={alt} className={className} onClick={onClick} />
+  }
+
+  const srcSet = (format: 'webp' | 'jpeg') =>
+    variants.map((variant) => `${variant[format]} ${variant.width}w`).join(', ')
+
+  return (
+    <picture>
+      <source type="image/webp" srcSet={srcSet('webp')} sizes={sizes} />
+      <img
+        src={variants[variants.length - 1].jpeg}
+        srcSet={srcSet('jpeg')}
+        sizes={sizes}
+        alt={alt}
+        className={className}
+        onClick={onClick}
+        loading="lazy"
+      />
+    </picture>
+  )
+}